@@ -1,28 +1,119 @@
-from web3 import Web3
+from web3 import Web3, AsyncWeb3
 import json
 import os
 from decimal import getcontext
+from pathlib import Path
 
 getcontext().prec = 50
 
 RPC_URL = os.getenv("RPC_URL", "https://arb1.arbitrum.io/rpc")
 REDIS_URL = os.getenv("REDIS_URL", "redis://:redispw@redis:6379/0")
 
+# Pula połączeń Redis; po błędzie połączenia tryb awaryjny (lokalny cache) z ponowieniem po backoffie
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "50"))
+REDIS_POOL_TIMEOUT = float(os.getenv("REDIS_POOL_TIMEOUT", "2"))
+REDIS_RETRY_MAX = float(os.getenv("REDIS_RETRY_MAX", "30"))
+REDIS_FALLBACK_MAX_SIZE = int(os.getenv("REDIS_FALLBACK_MAX_SIZE", "5000"))
+
+# Natywna ścieżka AsyncWeb3 (RPC_ASYNC=0 wymusza sync Web3 przez asyncio.to_thread)
+RPC_ASYNC = os.getenv("RPC_ASYNC", "1") == "1"
+RPC_MAX_CONNECTIONS = int(os.getenv("RPC_MAX_CONNECTIONS", "64"))
+RPC_MAX_CONNECTIONS_PER_HOST = int(os.getenv("RPC_MAX_CONNECTIONS_PER_HOST", "32"))
+RPC_KEEPALIVE_TIMEOUT = float(os.getenv("RPC_KEEPALIVE_TIMEOUT", "30"))
+RPC_TIMEOUT = float(os.getenv("RPC_TIMEOUT", "10"))
+
+# Współdzielona sesja HTTP dla API cenowych (DefiLlama, CoinGecko)
+PRICE_HTTP_MAX_CONNECTIONS = int(os.getenv("PRICE_HTTP_MAX_CONNECTIONS", "20"))
+PRICE_HTTP_KEEPALIVE_TIMEOUT = float(os.getenv("PRICE_HTTP_KEEPALIVE_TIMEOUT", "30"))
+
+# Ceny tokenów odświeżane w tle przed wygaśnięciem (PRICE_WARMER_ENABLED=0 - pobieranie per żądanie)
+PRICE_CACHE_TTL = int(os.getenv("PRICE_CACHE_TTL", "10"))
+PRICE_WARMER_ENABLED = os.getenv("PRICE_WARMER_ENABLED", "1") == "1"
+PRICE_REFRESH_INTERVAL = float(os.getenv("PRICE_REFRESH_INTERVAL", "6"))
+PRICE_REFRESH_JITTER = float(os.getenv("PRICE_REFRESH_JITTER", "1"))
+PRICE_REFRESH_MAX_BACKOFF = float(os.getenv("PRICE_REFRESH_MAX_BACKOFF", "60"))
+
+# Routing wieloskokowy (2-3 pule jednego DEXa) obok pul bezpośrednich (ROUTING_ENABLED=0 wyłącza)
+ROUTING_ENABLED = os.getenv("ROUTING_ENABLED", "1") == "1"
+ROUTE_MAX_HOPS = int(os.getenv("ROUTE_MAX_HOPS", "3"))
+ROUTE_MAX_FANOUT = int(os.getenv("ROUTE_MAX_FANOUT", "4"))
+ROUTE_MAX_PATHS = int(os.getenv("ROUTE_MAX_PATHS", "16"))
+
+# Podział zlecenia między pule pary (na krzywych quote z cache); SPLIT_MAX_LEGS - maks. liczba pul
+SPLIT_ENABLED = os.getenv("SPLIT_ENABLED", "1") == "1"
+SPLIT_MAX_LEGS = int(os.getenv("SPLIT_MAX_LEGS", "4"))
+
+# Model gazu swapu per (DEX, router, kierunek, przedział przekroczonych ticków) kalibrowany w tle
+# przez eth_estimateGas ze state override; GAS_PER_TICK_CROSSED - dopłata dla przedziałów bez próbki
+GAS_MODEL_ENABLED = os.getenv("GAS_MODEL_ENABLED", "1") == "1"
+GAS_MODEL_REFRESH_INTERVAL = float(os.getenv("GAS_MODEL_REFRESH_INTERVAL", "600"))
+GAS_PER_TICK_CROSSED = int(os.getenv("GAS_PER_TICK_CROSSED", "20000"))
+
+# Cena gazu odświeżana raz na blok (base fee L2 z ArbGasInfo + gaz komponentu L1 z NodeInterface);
+# GAS_ORACLE_MAX_AGE - po tylu sekundach bez nowego bloku żądanie samo odświeża cenę
+GAS_ORACLE_ENABLED = os.getenv("GAS_ORACLE_ENABLED", "1") == "1"
+GAS_ORACLE_MAX_AGE = float(os.getenv("GAS_ORACLE_MAX_AGE", "30"))
+
+# Maksymalna liczba pozycji w POST /exchange/batch
+EXCHANGE_BATCH_MAX_ITEMS = int(os.getenv("EXCHANGE_BATCH_MAX_ITEMS", "100"))
+
+# Subskrypcje quote przez WebSocket: przeliczenie raz na blok per (token_from, token_to, amount)
+SUBSCRIPTION_POLL_INTERVAL = float(os.getenv("SUBSCRIPTION_POLL_INTERVAL", "2"))
+SUBSCRIPTION_MAX_PER_CONNECTION = int(os.getenv("SUBSCRIPTION_MAX_PER_CONNECTION", "20"))
+SUBSCRIPTION_MAX_CONCURRENCY = int(os.getenv("SUBSCRIPTION_MAX_CONCURRENCY", "16"))
+SUBSCRIPTION_QUEUE_SIZE = int(os.getenv("SUBSCRIPTION_QUEUE_SIZE", "32"))
+
+# Snapshot stanu pul odświeżany per blok (SNAPSHOT_ENABLED=0 wyłącza)
+SNAPSHOT_ENABLED = os.getenv("SNAPSHOT_ENABLED", "1") == "1"
+SNAPSHOT_POLL_INTERVAL = float(os.getenv("SNAPSHOT_POLL_INTERVAL", "1.0"))
+SNAPSHOT_MAX_AGE = float(os.getenv("SNAPSHOT_MAX_AGE", "10"))
+
+# Lokalna symulacja swapu V3 z ticków w snapshocie (LOCAL_QUOTES_ENABLED=0 - zawsze Quoter on-chain)
+LOCAL_QUOTES_ENABLED = os.getenv("LOCAL_QUOTES_ENABLED", "1") == "1"
+
+# Krzywa quote per pula i kierunek: drabinka kwot (log, w USD) z Quotera jednym batchem per blok,
+# dowolna kwota z interpolacji; dokładny Quoter tylko gdy ograniczenie błędu > QUOTE_CURVE_TOLERANCE
+QUOTE_CURVE_ENABLED = os.getenv("QUOTE_CURVE_ENABLED", "1") == "1"
+QUOTE_CURVE_MIN_USD = float(os.getenv("QUOTE_CURVE_MIN_USD", "1"))
+QUOTE_CURVE_MAX_USD = float(os.getenv("QUOTE_CURVE_MAX_USD", "10000000"))
+QUOTE_CURVE_POINTS_PER_DECADE = int(os.getenv("QUOTE_CURVE_POINTS_PER_DECADE", "4"))
+QUOTE_CURVE_TOLERANCE = float(os.getenv("QUOTE_CURVE_TOLERANCE", "0.0005"))
+QUOTE_CURVE_MAX_AGE = float(os.getenv("QUOTE_CURVE_MAX_AGE", "10"))
+TICK_WORD_RADIUS = int(os.getenv("TICK_WORD_RADIUS", "2"))
+
+# Cache L1 w pamięci procesu przed Redis (L1_CACHE_MAX_SIZE=0 wyłącza); TTL w sekundach per klasa klucza
+L1_CACHE_MAX_SIZE = int(os.getenv("L1_CACHE_MAX_SIZE", "10000"))
+L1_CACHE_TTLS = {
+    "price": float(os.getenv("L1_TTL_PRICE", "5")),
+    "mid_price": float(os.getenv("L1_TTL_MID_PRICE", "2")),
+    "quote": float(os.getenv("L1_TTL_QUOTE", "2")),
+    "liquidity": float(os.getenv("L1_TTL_LIQUIDITY", "5")),
+    "tx_cost": float(os.getenv("L1_TTL_TX_COST", "5"))
+}
+CACHE_INVALIDATION_CHANNEL = os.getenv("CACHE_INVALIDATION_CHANNEL", "cache:invalidate")
+
+# Logi przez kolejkę zapisywaną w osobnym wątku; LOG_LEVELS / LOG_SAMPLE_RATES - per moduł,
+# np. "exchange_utils=DEBUG,services.redis_cache=WARNING" i "exchange_utils=0.1" (ułamek logów poniżej WARNING)
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_LEVELS = os.getenv("LOG_LEVELS", "")
+LOG_SAMPLE_RATES = os.getenv("LOG_SAMPLE_RATES", "")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text")
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
 w3 = Web3(Web3.HTTPProvider(RPC_URL))
+async_w3 = AsyncWeb3(AsyncWeb3.AsyncHTTPProvider(RPC_URL))
 
-if w3.is_connected():
-    print("Połączono z siecią Arbitrum!")
-else:
-    print("Nie udało się połączyć z siecią!")
+# Pliki ABI obok config.py - niezależnie od katalogu roboczego (np. pytest z katalogu repozytorium)
+ABI_DIR = Path(__file__).resolve().parent
 
-with open('uniswap_abi.json') as f:
+with open(ABI_DIR / 'uniswap_abi.json') as f:
     uniswap_abi = json.load(f)
 
-with open('sushiswap_abi.json') as f:
+with open(ABI_DIR / 'sushiswap_abi.json') as f:
     sushiswap_abi = json.load(f)
 
-with open('camelot_abi.json') as f:
+with open(ABI_DIR / 'camelot_abi.json') as f:
     camelot_abi = json.load(f)
 
-with open('erc20_abi.json') as f:
+with open(ABI_DIR / 'erc20_abi.json') as f:
     erc20_abi = json.load(f)
\ No newline at end of file
@@ -1,43 +1,142 @@
 import numpy as np
-from typing import List
-from models import TransactionOptionRaw
+from itertools import chain
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
 
-def rank_options(options: List[TransactionOptionRaw]) -> List[TransactionOptionRaw]:
-    """Ranking TOPSIS: amount_to, liquidity, fee, gas."""
-    if not options:
-        return []
+# Kolumny spakowanej macierzy opcji; TOPSIS używa pierwszych czterech
+COLUMNS = ("amount_to", "liquidity", "dex_fee", "gas_cost", "value_to_usd")
+AMOUNT_TO, LIQUIDITY, DEX_FEE, GAS_COST, VALUE_TO_USD = range(len(COLUMNS))
+TOPSIS_CRITERIA = 4
+# Kryteria do maksymalizacji (amount_to, liquidity); fee i gas - do minimalizacji
+BENEFIT = np.array([True, True, False, False])
+DEFAULT_WEIGHTS = np.array([0.7, 0.2, 0.08, 0.02])
+DEFAULT_STRATEGY = "topsis"
+EPSILON = 1e-10
+
+Weights = Union[None, Sequence[float], np.ndarray]
+
+
+def pack_options(option_sets: Sequence[Sequence]) -> Tuple[np.ndarray, np.ndarray]:
+    """Opcje wielu żądań jako jedna macierz float64 (n, len(COLUMNS)) i offsety segmentów (m + 1)."""
+    counts = np.fromiter((len(options) for options in option_sets), dtype=np.int64, count=len(option_sets))
+    offsets = np.zeros(len(option_sets) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    total = int(offsets[-1])
+    matrix = np.fromiter(
+        chain.from_iterable(
+            (o.amount_to, o.liquidity, o.dex_fee, o.gas_cost, o.value_to_usd)
+            for options in option_sets for o in options
+        ),
+        dtype=np.float64, count=total * len(COLUMNS)
+    ).reshape(total, len(COLUMNS))
+    return matrix, offsets
+
+
+def segment_ids(offsets: np.ndarray) -> np.ndarray:
+    """Numer segmentu (żądania) dla każdego wiersza macierzy."""
+    return np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+
+
+def _row_weights(weights: Weights, segments: np.ndarray) -> np.ndarray:
+    """Wagi per wiersz: domyślne, jeden wektor dla wszystkich albo macierz (m, 4) - wektor per żądanie."""
+    if weights is None:
+        return DEFAULT_WEIGHTS
+    weights = np.asarray(weights, dtype=np.float64)
+    if weights.ndim == 1:
+        return weights
+    return weights[segments]
+
+
+def weights_matrix(per_request: Sequence[Optional[Sequence[float]]]) -> Optional[np.ndarray]:
+    """Macierz wag (m, 4) z wektorów per żądanie (None - DEFAULT_WEIGHTS); None, gdy żadne żądanie nie podało wag."""
+    if all(weights is None for weights in per_request):
+        return None
+    return np.array([DEFAULT_WEIGHTS if weights is None else weights for weights in per_request], dtype=np.float64)
+
+
+def topsis_scores(matrix: np.ndarray, offsets: np.ndarray, weights: Weights = None) -> np.ndarray:
+    """TOPSIS dla wszystkich segmentów naraz: normy i ideały przez redukcje per segment (reduceat)."""
+    segments = segment_ids(offsets)
+    if not len(segments):
+        return np.empty(0)
+    criteria = matrix[:, :TOPSIS_CRITERIA].copy()
+    criteria[:, LIQUIDITY] = np.log1p(criteria[:, LIQUIDITY])
 
-    matrix = np.array([
-        [opt.amount_to, np.log1p(opt.liquidity), opt.dex_fee, opt.gas_cost]
-        for opt in options
-    ])
+    # reduceat nie obsługuje pustych segmentów - redukcje tylko po niepustych, indeksowane numerem segmentu
+    starts = offsets[:-1]
+    non_empty = np.flatnonzero(np.diff(offsets))
+    compact = np.empty(len(starts), dtype=np.int64)
+    compact[non_empty] = np.arange(len(non_empty))
+    rows = compact[segments]
 
-    epsilon = 1e-10
-    norm_matrix = matrix / (np.sqrt((matrix ** 2).sum(axis=0)) + epsilon)
+    norms = np.sqrt(np.add.reduceat(criteria ** 2, starts[non_empty], axis=0))
+    weighted = criteria / (norms[rows] + EPSILON) * _row_weights(weights, segments)
 
-    weights = np.array([0.7, 0.2, 0.08, 0.02])
-    weighted_matrix = norm_matrix * weights
+    seg_max = np.maximum.reduceat(weighted, starts[non_empty], axis=0)
+    seg_min = np.minimum.reduceat(weighted, starts[non_empty], axis=0)
+    ideal_best = np.where(BENEFIT, seg_max, seg_min)
+    ideal_worst = np.where(BENEFIT, seg_min, seg_max)
 
-    ideal_best = np.array([
-        np.max(weighted_matrix[:, 0]),
-        np.max(weighted_matrix[:, 1]),
-        np.min(weighted_matrix[:, 2]),
-        np.min(weighted_matrix[:, 3])
-    ])
+    dist_best = np.linalg.norm(weighted - ideal_best[rows], axis=1)
+    dist_worst = np.linalg.norm(weighted - ideal_worst[rows], axis=1)
+    total = dist_best + dist_worst
+    # Segment z jedną opcją (albo identycznymi) - obie odległości 0, kolejność bez zmian
+    return np.divide(dist_worst, total, out=np.zeros_like(total), where=total > 0)
 
-    ideal_worst = np.array([
-        np.min(weighted_matrix[:, 0]),
-        np.min(weighted_matrix[:, 1]),
-        np.max(weighted_matrix[:, 2]),
-        np.max(weighted_matrix[:, 3])
-    ])
 
-    dist_best = np.linalg.norm(weighted_matrix - ideal_best, axis=1)
-    dist_worst = np.linalg.norm(weighted_matrix - ideal_worst, axis=1)
+def max_net_output_scores(matrix: np.ndarray, offsets: np.ndarray, weights: Weights = None) -> np.ndarray:
+    """O(n): wartość wyjścia po koszcie gazu (USD) - w obrębie żądania ta sama kolejność co w tokenie wyjściowym."""
+    return matrix[:, VALUE_TO_USD] - matrix[:, GAS_COST]
 
-    scores = dist_worst / (dist_best + dist_worst)
 
-    ranked_options = [(score, option) for score, option in zip(scores, options)]
-    ranked_options.sort(reverse=True, key=lambda x: x[0])
+def max_output_scores(matrix: np.ndarray, offsets: np.ndarray, weights: Weights = None) -> np.ndarray:
+    """O(n): sama kwota wyjściowa (bez gazu, fee i płynności)."""
+    return matrix[:, AMOUNT_TO]
 
-    return [opt for _, opt in ranked_options]
+
+STRATEGIES: Dict[str, Callable[[np.ndarray, np.ndarray, Weights], np.ndarray]] = {
+    "topsis": topsis_scores,
+    "max_net_output": max_net_output_scores,
+    "max_output": max_output_scores
+}
+
+
+def score_segments(matrix: np.ndarray, offsets: np.ndarray,
+                   strategies: Optional[Sequence[Optional[str]]] = None, weights: Weights = None) -> np.ndarray:
+    """Wyniki wierszy; strategies - nazwa per segment (None - DEFAULT_STRATEGY), każda liczona raz dla całej macierzy."""
+    if strategies is None:
+        return STRATEGIES[DEFAULT_STRATEGY](matrix, offsets, weights)
+    names = [name or DEFAULT_STRATEGY for name in strategies]
+    unique = set(names)
+    if len(unique) == 1:
+        return STRATEGIES[unique.pop()](matrix, offsets, weights)
+
+    segments = segment_ids(offsets)
+    segment_strategy = np.array(names)
+    scores = np.empty(len(segments))
+    for name in unique:
+        rows = segment_strategy[segments] == name
+        scores[rows] = STRATEGIES[name](matrix, offsets, weights)[rows]
+    return scores
+
+
+def rank_segments(scores: np.ndarray, offsets: np.ndarray) -> List[np.ndarray]:
+    """Indeksy opcji w segmencie od najlepszej (stabilnie - remisy w kolejności wejścia)."""
+    segments = segment_ids(offsets)
+    order = np.lexsort((-scores, segments))
+    local = order - offsets[segments[order]]
+    return np.split(local, offsets[1:-1])
+
+
+def rank_many(option_sets: Sequence[Sequence], strategies: Optional[Sequence[Optional[str]]] = None,
+              weights: Weights = None) -> List[list]:
+    """Ranking wielu zbiorów opcji jednym przebiegiem NumPy (batch, przeliczenie per blok)."""
+    matrix, offsets = pack_options(option_sets)
+    order = rank_segments(score_segments(matrix, offsets, strategies, weights), offsets)
+    return [[options[i] for i in indices] for options, indices in zip(option_sets, order)]
+
+
+def rank_options(options: Sequence, strategy: Optional[str] = None, weights: Weights = None) -> list:
+    """Ranking jednego zbioru opcji (domyślnie TOPSIS: amount_to, liquidity, fee, gas)."""
+    if not options:
+        return []
+    return rank_many([options], [strategy], weights)[0]
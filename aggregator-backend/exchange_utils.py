@@ -1,15 +1,37 @@
 from decimal import Decimal
-from typing import Optional, List
+from typing import Awaitable, Callable, Optional, List, Tuple
 import asyncio
-from models import TransactionOption
+import inspect
+import logging
+from models import TransactionOption, RouteHop, SplitLeg, SplitTransactionOption
 from token_manager import TokenManager
 from config import w3
 from services import CoinGeckoService
-from services.defillama_service import DefiLlamaService
-from pools_config import TOKENS, DEX_CONFIGS, get_pool_fee
+from services.price_warmer import price_warmer, price_cache_key, fetch_api_prices
+from config import PRICE_CACHE_TTL, ROUTING_ENABLED, SPLIT_ENABLED
+from services.local_quote_service import local_quote_service
+from services.quote_curve_service import quote_curve_service
+from services.pool_state import PoolStateBatch
+from services.single_flight import single_flight
+from services.routing_service import routing_service
+from services.split_optimizer import split_optimizer
+from services.gas_model_service import gas_model_service
+from services.gas_oracle_service import gas_oracle_service
+from services.metrics_service import STAGE_SECONDS
+from pools_config import TOKENS
+from pool_registry import PoolPlan, pool_registry
+from log_manager import get_logger
+
+logger = get_logger(__name__)
 
 token_manager = TokenManager(TOKENS)
-defillama_service = DefiLlamaService(chain="arbitrum")
+defillama_service = price_warmer.defillama_service
+
+async def call_dex(method, *args, **kwargs):
+    """Wywołuje metodę serwisu DEX: natywnie (AsyncWeb3) albo w wątku (fallback sync Web3)."""
+    if inspect.iscoroutinefunction(method):
+        return await method(*args, **kwargs)
+    return await asyncio.to_thread(method, *args, **kwargs)
 
 def calculate_exchange_amount(token_from: str, tokens: list, amount: Decimal,
                               price_base: Decimal, price_tokens: Decimal) -> Decimal:
@@ -18,49 +40,57 @@ def calculate_exchange_amount(token_from: str, tokens: list, amount: Decimal,
     else:
         return Decimal(amount) * price_base
 
+def pool_cache_keys(dex_name: str, pair: str, token_from: str, token_to: str, amount: float) -> dict:
+    """Klucze Redis puli dla żądania (mid-price, quote, liquidity, fee DEXa)."""
+    pool_name = f"{dex_name.lower()}_{pair}"
+    rounded_amount = round(amount, 2)
+    return {
+        # Mid-price zależy od kierunku (token_from) - inaczej odwrotna para dostałaby cenę odwrotności
+        "mid_price": f"{pool_name}_mid_{token_from}",
+        "quote": f"{pool_name}_quote_{token_from}_{token_to}_{rounded_amount}",
+        "liquidity": f"{pool_name}_liquidity",
+        "dex_fee": f"{pool_name}_dexfee_{token_from}_{token_to}_{rounded_amount}"
+    }
+
+def liquidity_usd_from_balances(balances, token_addresses: list, prices: dict) -> Optional[Decimal]:
+    """Wartość płynności w USD z sald token0/token1 (None gdy brak ceny)."""
+    balance0, balance1 = balances
+
+    token0_address, token1_address = token_addresses
+    token0_price = Decimal(str(prices.get(token0_address, 0)))
+    token1_price = Decimal(str(prices.get(token1_address, 0)))
+
+    if token0_price == 0 or token1_price == 0:
+        return None
+
+    return (balance0 * token0_price) + (balance1 * token1_price)
+
 async def fetch_token_prices(coin_gecko_service, token_addresses: List[str], redis_cache_service) -> dict:
     """Pobiera ceny tokenów: najpierw DefiLlama (główny), potem CoinGecko (fallback)."""
     prices = {}
     missing_tokens_addresses = []
 
-    # Sprawdzenie cache
+    # Sprawdzenie cache (jeden MGET dla wszystkich tokenów)
+    cached_prices = await redis_cache_service.get_cached_prices([price_cache_key(address) for address in token_addresses])
     for address in token_addresses:
-        cache_key = f"coingecko_{address.lower()}"
-        cached_price = await redis_cache_service.get_cached_price(cache_key)
+        cached_price = cached_prices.get(price_cache_key(address))
         if cached_price is not None:
             prices[address] = float(cached_price)
         else:
             missing_tokens_addresses.append(address)
 
+    # Zwykle pusto - ceny odświeża price_warmer; tu tylko zimny start albo awaria odświeżania
     if missing_tokens_addresses:
-        print(f"Pobieranie {len(missing_tokens_addresses)} tokenów przez batch API (DefiLlama)...")
-        
-        # Główny serwis: DefiLlama
-        llama_prices = defillama_service.get_prices_batch(missing_tokens_addresses)
-        
-        still_missing = []
-        for addr in missing_tokens_addresses:
-            price = llama_prices.get(addr)
-            if price and price > 0:
-                prices[addr] = float(price)
-                cache_key = f"coingecko_{addr.lower()}"
-                await redis_cache_service.set_cached_price(cache_key, price, ttl=10)
-            else:
-                still_missing.append(addr)
-        
-        # Fallback - CoinGecko dla brakujących
-        if still_missing:
-            print(f"DefiLlama nie zwrócił {len(still_missing)} cen, próbuję CoinGecko (fallback)...")
-            cg_prices = coin_gecko_service.get_prices_batch(still_missing)
-            
-            for addr, price in cg_prices.items():
-                if price and price > 0:
-                    prices[addr] = float(price)
-                    cache_key = f"coingecko_{addr.lower()}"
-                    await redis_cache_service.set_cached_price(cache_key, price, ttl=10)
-                    print(f"CoinGecko (fallback): {addr[:8]}... = ${price}")
-
-    print(f"Pobrane ceny ({len(prices)}/{len(token_addresses)}): {list(prices.keys())}")
+        logger.debug("Pobieranie %s tokenów przez batch API (DefiLlama)...", len(missing_tokens_addresses))
+        api_prices = await fetch_api_prices(defillama_service, coin_gecko_service, missing_tokens_addresses)
+        for addr, price in api_prices.items():
+            prices[addr] = float(price)
+        await redis_cache_service.set_cached_prices({
+            price_cache_key(addr): (price, PRICE_CACHE_TTL) for addr, price in api_prices.items()
+        })
+
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Pobrane ceny (%s/%s): %s", len(prices), len(token_addresses), list(prices.keys()))
     return prices
 
 async def process_prices(coin_gecko_service, token_addresses, redis_cache_service, eth_address):
@@ -76,161 +106,189 @@ async def process_prices(coin_gecko_service, token_addresses, redis_cache_servic
 
     return filtered_prices, eth_price
 
-async def process_single_pool(dex_name: str,
-                               pair: str,
-                               data: dict,
+async def shared_load(redis_cache_service, key: str, load: Callable[[], Awaitable[Tuple[Optional[Decimal], bool]]],
+                      kind: str, ttl: int = 10) -> Optional[Decimal]:
+    """Wspólne obliczenie (single-flight); nową wartość zapisuje cache każdego czekającego żądania.
+
+    Zapis nie odbywa się w loaderze: wspólne zadanie trzyma cache żądania, które je uruchomiło, a po jego
+    anulowaniu (rozłączenie klienta) bufor zapisów tego żądania nie jest już wysyłany do Redis.
+    """
+    value, fresh = await single_flight.do(key, load, kind)
+    if fresh:
+        await redis_cache_service.set_cached_price(key, value, ttl=ttl)
+        logger.debug("Zapisano %s w cache dla %s", value, key)
+    return value
+
+async def process_single_pool(plan: PoolPlan,
                                dex_service,
                                token_from: str,
                                token_to: str,
                                amount: float,
                                redis_cache_service,
                                all_prices: dict,
-                               eth_price: Decimal) -> Optional[TransactionOption]:
+                               eth_price: Decimal,
+                               pool_states: Optional[PoolStateBatch] = None) -> Optional[TransactionOption]:
     """Przetwarza pojedynczą pulę DEX z asynchronicznymi wywołaniami blockchain."""
     
-    pool_address = data.get("address")
-    
-    token_addresses = token_manager.get_pool_addresses(pair)
-    
-    if not token_addresses or len(token_addresses) != 2:
-        return None
-    
-    token_decimals = token_manager.get_decimals_for_pool(token_addresses)
+    dex_name, pair, pool_address = plan.dex, plan.pair, plan.pool_address
+    token_addresses = list(plan.token_addresses)
+    token_decimals = list(plan.token_decimals)
     
-    print(f"Para {pair}: tokens=[{token_addresses[0][:8]}..., {token_addresses[1][:8]}...]")
+    logger.debug("Para %s: tokens=[%s..., %s...]", pair, token_addresses[0][:8], token_addresses[1][:8])
 
     prices = {addr: all_prices.get(addr, 0) for addr in token_addresses}
     pool_name = f"{dex_name.lower()}_{pair}"
+    cache_keys = pool_cache_keys(dex_name, pair, token_from, token_to, amount)
+
+    # Snapshot per blok (zadanie w tle) - stan puli bez Redis i RPC
+    snapshot_state = pool_states.from_snapshot(dex_name, pair) if pool_states else None
+
+    async def load_mid_price() -> Tuple[Optional[Decimal], bool]:
+        cached_mid_price = await redis_cache_service.get_cached_price(cache_keys["mid_price"])
+        if cached_mid_price is not None:
+            logger.debug("Użyto mid-price z cache dla %s: %s", pool_name, cached_mid_price)
+            return Decimal(cached_mid_price), False
+
+        logger.debug("Brak mid-price w cache dla %s, pobieram z blockchain...", pool_name)
+        pool_state = await pool_states.get(dex_name, pair) if pool_states else None
+        if pool_state is not None:
+            mid_price = dex_service.mid_price_from_state(pool_state, token_from, token_decimals, token_addresses)
+        else:
+            mid_price = await call_dex(
+                dex_service.get_mid_price, 
+                pool_address, token_from, token_to, token_decimals, token_addresses
+            )
 
-    cached_mid_price = await redis_cache_service.get_cached_price(pool_name)
-    
-    if cached_mid_price is None:
-        print(f"Brak mid-price w cache dla {pool_name}, pobieram z blockchain...")
-        mid_price = await asyncio.to_thread(
-            dex_service.get_mid_price, 
-            pool_address, token_from, token_to, token_decimals, token_addresses
-        )
-        
         if mid_price and mid_price > 0:
-            await redis_cache_service.set_cached_price(pool_name, mid_price, ttl=10)
-            print(f"Zapisano mid-price {mid_price} w cache dla {pool_name}")
+            return mid_price, True
+        logger.warning("Błąd pobierania mid-price z blockchain dla %s", pool_name)
+        return None, False
+
+    with STAGE_SECONDS.time("mid_price", dex_name, pair):
+        if snapshot_state is not None:
+            mid_price = dex_service.mid_price_from_state(snapshot_state, token_from, token_decimals, token_addresses)
         else:
-            print(f"Błąd pobierania mid-price z blockchain dla {pool_name}")
-            return None
-    else:
-        print(f"Użyto mid-price z cache dla {pool_name}: {cached_mid_price}")
-        mid_price = Decimal(cached_mid_price)
-    
-    if mid_price <= 0:
+            # Kierunek w kluczu (jak w kluczu Redis/L1) - mid-price zależy od token_from
+            mid_price = await shared_load(redis_cache_service, cache_keys["mid_price"], load_mid_price, "mid_price")
+
+    if not mid_price or mid_price <= 0:
         return None
 
-    pool_fee = get_pool_fee(dex_name, pair)
+    pool_fee = plan.fee_tier
     
-    rounded_amount = round(amount, 2)
-    quote_cache_key = f"{pool_name}_quote_{token_from}_{token_to}_{rounded_amount}"
-    
-    cached_quote = await redis_cache_service.get_cached_price(quote_cache_key)
-    if cached_quote is not None:
-        amount_out = Decimal(cached_quote)
-        print(f"Użyto quote z cache dla {quote_cache_key}: {amount_out}")
-    else:
-        print(f"Brak quote w cache dla {quote_cache_key}, pobieram z blockchain...")
-        amount_out = await asyncio.to_thread(
+    quote_cache_key = cache_keys["quote"]
+
+    async def load_quote() -> Tuple[Optional[Decimal], bool]:
+        cached_quote = await redis_cache_service.get_cached_price(quote_cache_key)
+        if cached_quote is not None:
+            logger.debug("Użyto quote z cache dla %s: %s", quote_cache_key, cached_quote)
+            return Decimal(cached_quote), False
+
+        logger.debug("Brak quote w cache dla %s, pobieram z blockchain...", quote_cache_key)
+        amount_out = await call_dex(
             dex_service.quote_exact_in,
             pool_address, token_from, token_to, Decimal(amount), 
             token_decimals, token_addresses, pool_fee, pair
         )
-        if amount_out and amount_out > 0:
-            # TTL 60s - spójne z resztą cache
-            await redis_cache_service.set_cached_price(quote_cache_key, amount_out, ttl=10)
-            print(f"Zapisano quote {amount_out} w cache dla {quote_cache_key}")
+        return amount_out, bool(amount_out and amount_out > 0)
+
+    amount_in_wei = int(Decimal(amount) * (10 ** plan.token_in.decimals))
+
+    # Lokalna symulacja z ticków snapshotu, potem krzywa quote puli; None - dokładny Quoter on-chain (przez cache)
+    with STAGE_SECONDS.time("quote", dex_name, pair):
+        snapshot = pool_states.snapshot if pool_states else None
+        swap = local_quote_service.simulate(snapshot, dex_name, pair, token_from, amount_in_wei)
+        # Liczba przekroczonych ticków wybiera przedział modelu gazu (None - brak symulacji)
+        ticks_crossed = swap.ticks_crossed if swap is not None else None
+        amount_out = None
+        if swap is not None and swap.amount_in == amount_in_wei:
+            amount_out = Decimal(swap.amount_out) / Decimal(10 ** plan.token_out.decimals)
+            logger.debug("Quote z lokalnej symulacji dla %s: %s", pool_name, amount_out)
+        else:
+            amount_out = await quote_curve_service.quote_exact_in(
+                dex_name, pair, dex_service, token_from, token_to, Decimal(amount), all_prices, pool_fee, snapshot
+            )
+            if amount_out is not None:
+                logger.debug("Quote z krzywej dla %s: %s", pool_name, amount_out)
+            else:
+                amount_out = await shared_load(redis_cache_service, quote_cache_key, load_quote, "quote")
     
     if amount_out is None or amount_out == 0:
-        print(f"Brak quote lub amount_out=0 dla {pool_address}, pomijam.")
+        logger.debug("Brak quote lub amount_out=0 dla %s, pomijam.", pool_address)
         return None
 
-    print(f"Mid-price: {mid_price}, Amount out: {amount_out}")
+    logger.debug("Mid-price: %s, Amount out: %s", mid_price, amount_out)
 
-    liquidity_cache_key = f"{pool_name}_liquidity"
-    cached_liquidity = await redis_cache_service.get_cached_price(liquidity_cache_key)
-    
-    if cached_liquidity is not None:
-        liquidity_usd = Decimal(cached_liquidity)
-        print(f"Użyto liquidity z cache dla {liquidity_cache_key}: {liquidity_usd}")
-    else:
-        print(f"Brak liquidity w cache dla {liquidity_cache_key}, pobieram z blockchain...")
-        liquidity = await asyncio.to_thread(
-            dex_service.get_liquidity,
-            pool_address, token_addresses, token_decimals, prices
-        )
+    liquidity_cache_key = cache_keys["liquidity"]
+
+    async def load_liquidity_usd() -> Tuple[Optional[Decimal], bool]:
+        cached_liquidity = await redis_cache_service.get_cached_price(liquidity_cache_key)
+        if cached_liquidity is not None:
+            logger.debug("Użyto liquidity z cache dla %s: %s", liquidity_cache_key, cached_liquidity)
+            return Decimal(cached_liquidity), False
+
+        logger.debug("Brak liquidity w cache dla %s, pobieram z blockchain...", liquidity_cache_key)
+        pool_state = await pool_states.get(dex_name, pair) if pool_states else None
+        if pool_state is not None:
+            liquidity = dex_service.liquidity_from_state(pool_state, token_decimals)
+        else:
+            liquidity = await call_dex(
+                dex_service.get_liquidity,
+                pool_address, token_addresses, token_decimals, prices
+            )
 
         if liquidity is None:
-            print(f"Pominięto pulę {pool_address} z powodu braku płynności.")
-            return None
+            logger.debug("Pominięto pulę %s z powodu braku płynności.", pool_address)
+            return None, False
 
-        balance0, balance1 = liquidity
+        liquidity_usd = liquidity_usd_from_balances(liquidity, token_addresses, prices)
+        return liquidity_usd, liquidity_usd is not None
 
-        token0_address, token1_address = token_addresses
-        token0_price = Decimal(str(prices.get(token0_address, 0)))
-        token1_price = Decimal(str(prices.get(token1_address, 0)))
+    with STAGE_SECONDS.time("liquidity", dex_name, pair):
+        if snapshot_state is not None:
+            liquidity_usd = liquidity_usd_from_balances(
+                dex_service.liquidity_from_state(snapshot_state, token_decimals), token_addresses, prices
+            )
+        else:
+            liquidity_usd = await shared_load(redis_cache_service, liquidity_cache_key, load_liquidity_usd, "liquidity")
 
-        if token0_price == 0 or token1_price == 0:
-            return None
+    if liquidity_usd is None:
+        return None
 
-        liquidity_usd = (balance0 * token0_price) + (balance1 * token1_price)
+    token_from_address = plan.token_in.address
+    token_to_address = plan.token_out.address
 
-        await redis_cache_service.set_cached_price(liquidity_cache_key, liquidity_usd, ttl=10)
-        print(f"Zapisano liquidity {liquidity_usd} w cache dla {liquidity_cache_key}")
+    dex_fee_cache_key = cache_keys["dex_fee"]
 
-    token_from_address = token_manager.get_address_by_symbol(token_from)
-    token_to_address = token_manager.get_address_by_symbol(token_to)
-    
-    token_from_decimals = token_manager.get_decimals_by_symbol(token_from)
-    amount_in_wei = int(Decimal(amount) * (10 ** token_from_decimals))
-    
-    router_address = DEX_CONFIGS[dex_name]['contracts']['router']
-    
-    fee_tier = pool_fee if pool_fee else 500
+    async def load_dex_fee() -> Tuple[Optional[Decimal], bool]:
+        cached_dex_fee = await redis_cache_service.get_cached_price(dex_fee_cache_key)
+        if cached_dex_fee is not None:
+            logger.debug("Użyto dex fee z cache dla %s: %s", dex_fee_cache_key, cached_dex_fee)
+            return Decimal(cached_dex_fee), False
 
-    dex_fee_cache_key = f"{pool_name}_dexfee_{token_from}_{token_to}_{rounded_amount}"
-    gas_cost_cache_key = f"{pool_name}_gascost_{token_from}_{token_to}_{rounded_amount}"
-    
-    cached_dex_fee = await redis_cache_service.get_cached_price(dex_fee_cache_key)
-    cached_gas_cost = await redis_cache_service.get_cached_price(gas_cost_cache_key)
-    
-    if cached_dex_fee is not None and cached_gas_cost is not None:
-        dex_fee = Decimal(cached_dex_fee)
-        gas_cost = Decimal(cached_gas_cost)
-        print(f"Użyto transaction cost z cache dla {dex_fee_cache_key}: dex_fee={dex_fee}, gas_cost={gas_cost}")
-    else:
-        print(f"Brak transaction cost w cache, pobieram z blockchain...")
-        cost_result = await asyncio.to_thread(
-            dex_service.get_transaction_cost,
-            pool_address=pool_address,
-            token_from_address=token_from_address,
-            token_to_address=token_to_address,
-            amount_in_wei=amount_in_wei,
-            fee_tier=fee_tier,
-            router_address=router_address,
-            liquidity=liquidity_usd,
-            eth_price=eth_price
-        )
+        logger.debug("Brak dex fee w cache, pobieram z blockchain...")
+        pool_state = await pool_states.get(dex_name, pair) if pool_states else None
+        if pool_state is not None:
+            dex_fee = dex_service.dex_fee_from_state(pool_state, token_from_address)
+        else:
+            dex_fee = await call_dex(dex_service.get_dex_fee_percent, pool_address, token_from_address)
 
-        if cost_result is None:
-            return None
-        
-        dex_fee, gas_cost = cost_result
-        
-        if dex_fee is not None and gas_cost is not None:
-            await redis_cache_service.set_cached_price(dex_fee_cache_key, dex_fee, ttl=10)
-            await redis_cache_service.set_cached_price(gas_cost_cache_key, gas_cost, ttl=10)
-            print(f"Zapisano transaction cost w cache: dex_fee={dex_fee}, gas_cost={gas_cost}")
+        return dex_fee, dex_fee is not None
+
+    with STAGE_SECONDS.time("dex_fee", dex_name, pair):
+        if snapshot_state is not None:
+            dex_fee = dex_service.dex_fee_from_state(snapshot_state, token_from_address)
         else:
-            return None
+            dex_fee = await shared_load(redis_cache_service, dex_fee_cache_key, load_dex_fee, "tx_cost")
     
-    if dex_fee is None or gas_cost is None:
+    if dex_fee is None:
         return None
 
+    # Gas z modelu w pamięci (bez eth_estimateGas i bez klucza zależnego od kwoty), cena gazu bieżącego bloku
+    with STAGE_SECONDS.time("tx_cost", dex_name, pair):
+        gas_price = await gas_oracle_service.get()
+        gas_cost = gas_price.swap_cost_usd(plan.dex, gas_model_service.estimate(plan, ticks_crossed), eth_price)
+
     token_from_price = all_prices.get(token_from_address, 1)
     token_to_price = all_prices.get(token_to_address, 1)
 
@@ -241,7 +299,7 @@ async def process_single_pool(dex_name: str,
         dex=dex_name,
         pool=pair,
         price=float(mid_price),
-        liquidity=liquidity_usd,
+        liquidity=float(liquidity_usd),
         dex_fee=float(dex_fee),
         gas_cost=float(gas_cost),
         amount_from=amount,
@@ -252,34 +310,157 @@ async def process_single_pool(dex_name: str,
 
 
 async def process_dex_pools(dex_name: str,
-                            pools: dict, 
                             dex_service, 
                             token_from: str, 
                             token_to: str, 
                             amount: float, 
                             redis_cache_service,
                             all_prices: dict,
-                            eth_price: Decimal) -> List[TransactionOption]:
+                            eth_price: Decimal,
+                            pool_states: Optional[PoolStateBatch] = None) -> List[TransactionOption]:
     """Przetwarza pule DEX równolegle z asynchronicznymi wywołaniami blockchain."""
 
-    pool_tasks = []
-    for pair, data in pools.items():
-        tokens = pair.split('/')
-        if set(tokens) == {token_from, token_to}:
-            pool_tasks.append(
-                process_single_pool(
-                    dex_name, pair, data, dex_service, token_from, token_to, amount,
-                    redis_cache_service, all_prices, eth_price
-                )
-            )
+    pool_tasks = [
+        process_single_pool(
+            plan, dex_service, token_from, token_to, amount,
+            redis_cache_service, all_prices, eth_price, pool_states
+        )
+        for plan in pool_registry.plans(token_from, token_to)
+        if plan.dex == dex_name
+    ]
     
     results = await asyncio.gather(*pool_tasks, return_exceptions=True)
     
     options = []
     for result in results:
         if isinstance(result, Exception):
-            print(f"Błąd przetwarzania puli w {dex_name}: {result}")
+            logger.warning("Błąd przetwarzania puli w %s: %s", dex_name, result)
         elif result is not None:
             options.append(result)
     
-    return options
\ No newline at end of file
+    return options
+
+async def process_routes(token_from: str,
+                         token_to: str,
+                         amount: float,
+                         dex_services: dict,
+                         all_prices: dict,
+                         eth_price: Decimal,
+                         pool_states: Optional[PoolStateBatch] = None) -> List[TransactionOption]:
+    """Opcje tras wieloskokowych (2-3 pule jednego DEXa), rankowane razem z pulami bezpośrednimi."""
+    if not ROUTING_ENABLED:
+        return []
+    routes = routing_service.find_routes(token_from, token_to)
+    if not routes:
+        return []
+
+    snapshot = pool_states.snapshot if pool_states else None
+    quoted, gas_price = await asyncio.gather(
+        routing_service.quote_routes(routes, Decimal(amount), dex_services, all_prices, snapshot),
+        gas_oracle_service.get()
+    )
+
+    options = []
+    for route, hop_amounts in quoted.items():
+        liquidity_usd = None
+        fee_kept = Decimal(1)
+        for hop in route.hops:
+            dex_service = dex_services[hop.dex]
+            plan = hop.plan
+            state = await pool_states.get(hop.dex, hop.pair) if pool_states else None
+            fee = dex_service.dex_fee_from_state(state, plan.token_in.address) if state else None
+            hop_liquidity = liquidity_usd_from_balances(
+                dex_service.liquidity_from_state(state, plan.token_decimals),
+                plan.token_addresses, all_prices
+            ) if state else None
+            if fee is None or hop_liquidity is None:
+                break
+            fee_kept *= 1 - fee
+            # Płynność trasy = najsłabsza pula
+            liquidity_usd = hop_liquidity if liquidity_usd is None else min(liquidity_usd, hop_liquidity)
+        else:
+            gas = sum(gas_model_service.estimate(hop.plan) for hop in route.hops)
+            # Trasa to jedna transakcja - komponent L1 liczony raz
+            gas_cost = gas_price.swap_cost_usd(route.dex, gas, eth_price)
+            amount_out = hop_amounts[-1]
+            value_from_usd = amount * float(all_prices.get(route.hops[0].plan.token_in.address, 1))
+            value_to_usd = float(amount_out) * float(all_prices.get(route.hops[-1].plan.token_out.address, 1))
+            options.append(TransactionOption(
+                dex=route.dex,
+                pool=route.name,
+                price=float(amount_out / Decimal(amount)),
+                liquidity=float(liquidity_usd),
+                dex_fee=float(1 - fee_kept),
+                gas_cost=float(gas_cost),
+                amount_from=amount,
+                amount_to=float(amount_out),
+                value_from_usd=value_from_usd,
+                value_to_usd=value_to_usd,
+                route=[
+                    RouteHop(dex=hop.dex, pair=hop.pair, token_in=hop.token_in, token_out=hop.token_out,
+                             amount_in=float(amount_in), amount_out=float(hop_out))
+                    for hop, amount_in, hop_out in zip(route.hops, hop_amounts, hop_amounts[1:])
+                ]
+            ))
+    logger.debug("Trasy wieloskokowe %s->%s: %s/%s", token_from, token_to, len(options), len(routes))
+    return options
+
+
+async def process_split(token_from: str,
+                        token_to: str,
+                        amount: float,
+                        dex_services: dict,
+                        options: List[TransactionOption],
+                        all_prices: dict,
+                        pool_states: Optional[PoolStateBatch] = None) -> Optional[SplitTransactionOption]:
+    """Podział zlecenia między pule bezpośrednie pary; None, gdy najlepsza jest jedna pula."""
+    direct = [o for o in options if o.route is None]
+    if not SPLIT_ENABLED or len(direct) < 2:
+        return None
+
+    token_to_address = token_manager.get_address_by_symbol(token_to)
+    token_to_price = float(all_prices.get(token_to_address, 0) or 0)
+    if token_to_price <= 0:
+        return None
+    dec_in = token_manager.get_decimals_by_symbol(token_from)
+    dec_out = token_manager.get_decimals_by_symbol(token_to)
+    amount_in_wei = int(Decimal(amount) * Decimal(10 ** dec_in))
+    snapshot = pool_states.snapshot if pool_states else None
+    fee_tiers = {(plan.dex, plan.pair): plan.fee_tier for plan in pool_registry.plans(token_from, token_to)}
+
+    # Krzywe z cache/ticków snapshotu - optymalizacja bez wywołań RPC per kandydat podziału
+    curves = await asyncio.gather(*(
+        quote_curve_service.get_curve(
+            o.dex, o.pool, dex_services[o.dex], token_from, token_to, amount_in_wei,
+            all_prices, fee_tiers.get((o.dex, o.pool)), snapshot
+        )
+        for o in direct
+    ))
+    by_key = {(o.dex, o.pool): o for o in direct}
+    curves = {(o.dex, o.pool): curve for o, curve in zip(direct, curves) if curve is not None}
+    gas_out = {key: int(by_key[key].gas_cost / token_to_price * 10 ** dec_out) for key in curves}
+
+    plan = split_optimizer.optimize(curves, amount_in_wei, gas_out)
+    if plan is None or len(plan.legs) < 2:
+        return None
+
+    best_single = max(direct, key=lambda o: o.amount_to - o.gas_cost / token_to_price)
+    amount_to = plan.amount_out / 10 ** dec_out
+    gas_cost = sum(by_key[key].gas_cost for key, _, _ in plan.legs)
+    if amount_to - gas_cost / token_to_price <= best_single.amount_to - best_single.gas_cost / token_to_price:
+        return None
+
+    logger.debug("Podział %s->%s na %s pule: %s (najlepsza pula: %s)", token_from, token_to, len(plan.legs), amount_to, best_single.amount_to)
+    return SplitTransactionOption(
+        amount_from=amount,
+        amount_to=amount_to,
+        value_from_usd=amount * float(all_prices.get(token_manager.get_address_by_symbol(token_from), 1)),
+        value_to_usd=amount_to * token_to_price,
+        gas_cost=gas_cost,
+        best_single_amount_to=best_single.amount_to,
+        legs=[
+            SplitLeg(dex=dex, pair=pair, amount_in=leg_in / 10 ** dec_in, amount_out=leg_out / 10 ** dec_out,
+                     share=leg_in / amount_in_wei)
+            for (dex, pair), leg_in, leg_out in plan.legs
+        ]
+    )
@@ -1,6 +1,6 @@
 from abc import ABC, abstractmethod
 from decimal import Decimal
-from typing import Optional
+from typing import Optional, List, Dict, Tuple
 
 class ICacheService(ABC):
     """Interfejs dla serwisów cache."""
@@ -12,4 +12,11 @@ class ICacheService(ABC):
     @abstractmethod
     async def set_cached_price(self, key: str, value: Decimal, ttl: int = 60) -> None:
         pass
-    
\ No newline at end of file
+
+    @abstractmethod
+    async def get_cached_prices(self, keys: List[str]) -> Dict[str, Optional[float]]:
+        pass
+
+    @abstractmethod
+    async def set_cached_prices(self, items: Dict[str, Tuple[Decimal, int]]) -> None:
+        pass
@@ -6,6 +6,6 @@ class ISingleTokenPriceService(ABC):
     """Interfejs dla serwisów pobierających cenę pojedynczego tokena w USD."""
 
     @abstractmethod
-    def get_price(self, token_id: str) -> Optional[Decimal]:
+    async def get_price(self, token_id: str) -> Optional[Decimal]:
         """Pobiera cenę tokena w USD."""
         pass
@@ -0,0 +1,147 @@
+import atexit
+import logging
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+import orjson
+from config import LOG_LEVEL, LOG_LEVELS, LOG_SAMPLE_RATES, LOG_FORMAT, LOG_QUEUE_SIZE
+
+# Atrybuty LogRecord - pozostałe (z extra=) trafiają do logu strukturalnego jako pola
+_RECORD_ATTRS = set(logging.makeLogRecord({}).__dict__) | {"message", "asctime"}
+
+
+def _parse_mapping(value: str) -> Dict[str, str]:
+    """"moduł=wartość,moduł=wartość" -> dict."""
+    mapping = {}
+    for item in value.split(","):
+        name, sep, setting = item.partition("=")
+        if sep and name.strip():
+            mapping[name.strip()] = setting.strip()
+    return mapping
+
+
+class SamplingFilter(logging.Filter):
+    """Przepuszcza ułamek rekordów poniżej WARNING per moduł (najdłuższy pasujący prefiks nazwy loggera)."""
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self._rates = rates
+        self._resolved: Dict[str, float] = {}
+        self.sampled_out = 0
+
+    def _rate(self, name: str) -> float:
+        rate = self._resolved.get(name)
+        if rate is None:
+            prefix = name
+            while prefix and prefix not in self._rates:
+                prefix = prefix.rpartition(".")[0]
+            rate = self._rates.get(prefix, 1.0)
+            self._resolved[name] = rate
+        return rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self._rate(record.name)
+        if rate >= 1.0 or random.random() < rate:
+            return True
+        self.sampled_out += 1
+        return False
+
+
+class DeferredQueueHandler(QueueHandler):
+    """QueueHandler bez formatowania w wątku wywołującym; pełna kolejka - rekord odrzucany zamiast blokować pętlę."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # msg % args liczone dopiero w wątku listenera (argumenty nie powinny być później mutowane)
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class JsonFormatter(logging.Formatter):
+    """Jedna linia JSON na rekord: ts, level, logger, message i pola z extra=."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage()
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return orjson.dumps(entry, default=str).decode()
+
+
+class LogManager:
+    """Konfiguracja logowania aplikacji: root -> kolejka -> wątek zapisujący na stdout."""
+
+    def __init__(self):
+        self.handler: Optional[DeferredQueueHandler] = None
+        self.sampling: Optional[SamplingFilter] = None
+        self._listener: Optional[QueueListener] = None
+
+    def configure(self) -> None:
+        if self._listener is not None:
+            return
+        output = logging.StreamHandler(sys.stdout)
+        if LOG_FORMAT == "json":
+            output.setFormatter(JsonFormatter())
+        else:
+            output.setFormatter(logging.Formatter("%(asctime)s %(levelname)s [%(name)s] %(message)s"))
+
+        self.handler = DeferredQueueHandler(queue.Queue(maxsize=LOG_QUEUE_SIZE))
+        self.sampling = SamplingFilter({name: float(rate) for name, rate in _parse_mapping(LOG_SAMPLE_RATES).items()})
+        self.handler.addFilter(self.sampling)
+
+        # Biblioteki (web3, httpx, ...) od WARNING; LOG_LEVEL dotyczy modułów aplikacji (get_logger)
+        root = logging.getLogger()
+        root.addHandler(self.handler)
+        root.setLevel(logging.WARNING)
+        for name, level in _parse_mapping(LOG_LEVELS).items():
+            logging.getLogger(name).setLevel(level.upper())
+
+        self._listener = QueueListener(self.handler.queue, output, respect_handler_level=True)
+        self._listener.start()
+        atexit.register(self.stop)
+
+    def stop(self) -> None:
+        """Zapisuje rekordy z kolejki i zatrzymuje wątek listenera."""
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+
+    def stats(self) -> dict:
+        return {
+            "queued": self.handler.queue.qsize() if self.handler else 0,
+            "dropped": self.handler.dropped if self.handler else 0,
+            "sampled_out": self.sampling.sampled_out if self.sampling else 0
+        }
+
+
+log_manager = LogManager()
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Logger modułu (pierwsze wywołanie konfiguruje kolejkę i wątek zapisujący)."""
+    log_manager.configure()
+    # LOG_LEVEL na pakiecie najwyższego poziomu (services, routes, ...), o ile LOG_LEVELS go nie ustawia
+    package = logging.getLogger(name.partition(".")[0])
+    if package.level == logging.NOTSET:
+        package.setLevel(LOG_LEVEL)
+    return logging.getLogger(name)
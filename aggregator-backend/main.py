@@ -1,26 +1,60 @@
+import asyncio
 import os
 import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import HTMLResponse
 from fastapi import Request
-from routes import exchange_router
+from routes import exchange_router, quote_subscriptions
 from services.redis_service import redis_service
+from services.rpc_session import rpc_session
+from services.pool_snapshot_service import pool_snapshot_service
+from services.local_cache import cache_invalidation_service
+from services.http_client import http_client
+from services.price_warmer import price_warmer
+from services.gas_model_service import gas_model_service
+from services.gas_oracle_service import gas_oracle_service
+from config import w3
+from log_manager import get_logger
+
+logger = get_logger(__name__)
 
 async def lifespan_handler(app: FastAPI):
     try:
         success = await redis_service.connect()
         if success:
-            print(f"Połączono z Redis!")
+            logger.info("Połączono z Redis!")
         else:
-            print(f"[Startup] Nie udało się połączyć z Redis")
+            logger.warning("[Startup] Nie udało się połączyć z Redis")
     except Exception as e:
-        print(f"[Startup] Błąd podczas łączenia z Redis: {e}")
+        logger.warning("[Startup] Błąd podczas łączenia z Redis: %s", e)
+
+    # Sprawdzenie sieci przy starcie aplikacji, nie przy imporcie config (log_manager importuje config)
+    if await asyncio.to_thread(w3.is_connected):
+        logger.info("Połączono z siecią Arbitrum!")
+    else:
+        logger.warning("[Startup] Nie udało się połączyć z siecią!")
+
+    await cache_invalidation_service.start()
+    await rpc_session.start()
+    await pool_snapshot_service.start()
+    await price_warmer.start()
+    await gas_oracle_service.start()
+    await gas_model_service.start()
+    await quote_subscriptions.start()
 
     yield
+    await quote_subscriptions.stop()
+    await price_warmer.stop()
+    await gas_model_service.stop()
+    await gas_oracle_service.stop()
+    await pool_snapshot_service.stop()
+    await cache_invalidation_service.stop()
     # Zamykanie połączenia z Redis
     await redis_service.close()
-    print("Zamknięto połączenie z Redis")
+    logger.info("Zamknięto połączenie z Redis")
+    await rpc_session.close()
+    await http_client.close()
 
 
 app = FastAPI(
@@ -1,11 +1,47 @@
+from dataclasses import dataclass
+from typing import List, Optional
 from pydantic import BaseModel
 
 class ExchangeRequest(BaseModel):
     token_from: str
     token_to: str
     amount: float
+    # Ranking: strategia z decision_engine.STRATEGIES i wagi TOPSIS (amount_to, liquidity, dex_fee, gas_cost)
+    strategy: Optional[str] = None
+    weights: Optional[List[float]] = None
 
-class FrontendTransactionOption(BaseModel):
+class ExchangeBatchRequest(BaseModel):
+    """Lista żądań albo jedna para z listą kwot."""
+    requests: Optional[List[ExchangeRequest]] = None
+    token_from: Optional[str] = None
+    token_to: Optional[str] = None
+    amounts: Optional[List[float]] = None
+    strategy: Optional[str] = None
+    weights: Optional[List[float]] = None
+
+    def expand(self) -> List[ExchangeRequest]:
+        items = list(self.requests or [])
+        if self.token_from and self.token_to and self.amounts:
+            items.extend(
+                ExchangeRequest(token_from=self.token_from, token_to=self.token_to, amount=amount,
+                                strategy=self.strategy, weights=self.weights)
+                for amount in self.amounts
+            )
+        return items
+
+# Wyniki (ścieżka gorąca): dataclassy ze slots bez walidacji pydantic, serializowane natywnie przez orjson
+
+@dataclass(slots=True)
+class RouteHop:
+    dex: str
+    pair: str
+    token_in: str
+    token_out: str
+    amount_in: float
+    amount_out: float
+
+@dataclass(slots=True)
+class FrontendTransactionOption:
     dex: str
     pair: str
     amount_from: float
@@ -16,16 +52,29 @@ class FrontendTransactionOption(BaseModel):
     dex_fee: float
     gas_cost: float
     percentage_change: float
+    route: Optional[List[RouteHop]] = None
 
-class TransactionOptionRaw(BaseModel):
+@dataclass(slots=True)
+class SplitLeg:
     dex: str
-    pool: str
+    pair: str
+    amount_in: float
+    amount_out: float
+    share: float
+
+@dataclass(slots=True)
+class SplitTransactionOption:
+    """Zlecenie podzielone między kilka pul pary (łącznie więcej niż najlepsza pojedyncza pula po gazie)."""
+    amount_from: float
     amount_to: float
-    liquidity: float
-    dex_fee: float
+    value_from_usd: float
+    value_to_usd: float
     gas_cost: float
+    best_single_amount_to: float
+    legs: List[SplitLeg]
 
-class TransactionOption(BaseModel):
+@dataclass(slots=True)
+class TransactionOption:
     dex: str
     pool: str
     price: float
@@ -35,4 +84,5 @@ class TransactionOption(BaseModel):
     amount_from: float
     amount_to: float
     value_from_usd: float
-    value_to_usd: float
\ No newline at end of file
+    value_to_usd: float
+    route: Optional[List[RouteHop]] = None
@@ -0,0 +1,90 @@
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Dict, Mapping, Optional, Tuple
+from web3 import Web3
+from pools_config import TOKENS, DEX_CONFIGS
+from log_manager import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass(frozen=True, slots=True)
+class TokenInfo:
+    symbol: str
+    address: str
+    checksum_address: str
+    decimals: int
+
+
+@dataclass(frozen=True, slots=True)
+class PoolPlan:
+    """Plan puli dla jednego kierunku swapu - adresy, decimals, fee, router i quoter policzone przy starcie."""
+    dex: str
+    pair: str
+    pool_address: str
+    token_in: TokenInfo
+    token_out: TokenInfo
+    token_addresses: Tuple[str, str]
+    token_decimals: Tuple[int, int]
+    zero_for_one: bool
+    fee_tier: Optional[int]
+    router: str
+    quoter: str
+
+
+class PoolRegistry:
+    """Skompilowany pools_config: (token_from, token_to) -> plany pul wszystkich DEXów."""
+
+    __slots__ = ("tokens", "_plans")
+
+    def __init__(self, tokens: dict, dex_configs: dict):
+        self.tokens: Mapping[str, TokenInfo] = MappingProxyType({
+            symbol.upper(): TokenInfo(
+                symbol=symbol.upper(),
+                address=data["address"].lower(),
+                checksum_address=Web3.to_checksum_address(data["address"]),
+                decimals=data["decimals"]
+            )
+            for symbol, data in tokens.items()
+        })
+
+        plans: Dict[Tuple[str, str], list] = {}
+        for dex_name, dex_config in dex_configs.items():
+            contracts = dex_config["contracts"]
+            for pair, data in dex_config["pools"].items():
+                symbols = pair.split('/')
+                if len(symbols) != 2 or any(symbol.upper() not in self.tokens for symbol in symbols):
+                    logger.warning("Brak definicji dla tokenów w parze %s (%s) - pomijam", pair, dex_name)
+                    continue
+                first, second = (self.tokens[symbol.upper()] for symbol in symbols)
+                for token_in, token_out in ((first, second), (second, first)):
+                    plans.setdefault((token_in.symbol, token_out.symbol), []).append(PoolPlan(
+                        dex=dex_name,
+                        pair=pair,
+                        pool_address=Web3.to_checksum_address(data["address"]),
+                        token_in=token_in,
+                        token_out=token_out,
+                        token_addresses=(first.address, second.address),
+                        token_decimals=(first.decimals, second.decimals),
+                        zero_for_one=token_in.address < token_out.address,
+                        fee_tier=data.get("fee"),
+                        router=Web3.to_checksum_address(contracts["router"]),
+                        quoter=Web3.to_checksum_address(contracts["quoter"])
+                    ))
+        self._plans: Mapping[Tuple[str, str], Tuple[PoolPlan, ...]] = MappingProxyType(
+            {key: tuple(value) for key, value in plans.items()}
+        )
+
+    def token(self, symbol: str) -> Optional[TokenInfo]:
+        return self.tokens.get(symbol.upper())
+
+    def all_plans(self) -> Tuple[PoolPlan, ...]:
+        """Plany wszystkich pul w obu kierunkach."""
+        return tuple(plan for plans in self._plans.values() for plan in plans)
+
+    def plans(self, token_from: str, token_to: str) -> Tuple[PoolPlan, ...]:
+        """Plany pul bezpośrednich pary (pusta krotka - para nieobsługiwana)."""
+        return self._plans.get((token_from.upper(), token_to.upper()), ())
+
+
+pool_registry = PoolRegistry(TOKENS, DEX_CONFIGS)
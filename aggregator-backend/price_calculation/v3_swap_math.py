@@ -0,0 +1,230 @@
+from dataclasses import dataclass
+from typing import Mapping, Optional
+
+# Port 1:1 z Uniswap V3 (TickMath, SqrtPriceMath, SwapMath, TickBitmap) - arytmetyka całkowitoliczbowa.
+# Algebra (Camelot V3) używa tych samych wzorów (PriceMovementMath, TickTable).
+
+Q96 = 1 << 96
+MAX_UINT256 = (1 << 256) - 1
+MIN_TICK = -887272
+MAX_TICK = 887272
+MIN_SQRT_RATIO = 4295128739
+MAX_SQRT_RATIO = 1461446703485210103287273052203988822378723970342
+
+_TICK_RATIOS = (
+    (0x2, 0xfff97272373d413259a46990580e213a),
+    (0x4, 0xfff2e50f5f656932ef12357cf3c7fdcc),
+    (0x8, 0xffe5caca7e10e4e61c3624eaa0941cd0),
+    (0x10, 0xffcb9843d60f6159c9db58835c926644),
+    (0x20, 0xff973b41fa98c081472e6896dfb254c0),
+    (0x40, 0xff2ea16466c96a3843ec78b326b52861),
+    (0x80, 0xfe5dee046a99a2a811c461f1969c3053),
+    (0x100, 0xfcbe86c7900a88aedcffc83b479aa3a4),
+    (0x200, 0xf987a7253ac413176f2b074cf7815e54),
+    (0x400, 0xf3392b0822b70005940c7a398e4b70f3),
+    (0x800, 0xe7159475a2c29b7443b29c7fa6e889d9),
+    (0x1000, 0xd097f3bdfd2022b8845ad8f792aa5825),
+    (0x2000, 0xa9f746462d870fdf8a65dc1f90e061e5),
+    (0x4000, 0x70d869a156d2a1b890bb3df62baf32f7),
+    (0x8000, 0x31be135f97d08fd981231505542fcfa6),
+    (0x10000, 0x9aa508b5b7a84e1c677de54f3e99bc9),
+    (0x20000, 0x5d6af8dedb81196699c329225ee604),
+    (0x40000, 0x2216e584f5fa1ea926041bedfe98),
+    (0x80000, 0x48a170391f7dc42444e8fa2),
+)
+
+
+class TickDataOutOfRange(Exception):
+    """Swap wychodzi poza załadowane słowa bitmapy ticków - potrzebny Quoter on-chain."""
+
+
+@dataclass(frozen=True)
+class SwapResult:
+    amount_in: int
+    amount_out: int
+    sqrt_price_x96: int
+    tick: int
+    ticks_crossed: int
+
+
+def mul_div(a: int, b: int, denominator: int) -> int:
+    return a * b // denominator
+
+
+def mul_div_rounding_up(a: int, b: int, denominator: int) -> int:
+    result, remainder = divmod(a * b, denominator)
+    return result + 1 if remainder else result
+
+
+def div_rounding_up(a: int, b: int) -> int:
+    result, remainder = divmod(a, b)
+    return result + 1 if remainder else result
+
+
+def get_sqrt_ratio_at_tick(tick: int) -> int:
+    """TickMath.getSqrtRatioAtTick."""
+    abs_tick = abs(tick)
+    if abs_tick > MAX_TICK:
+        raise ValueError(f"Tick poza zakresem: {tick}")
+
+    ratio = 0xfffcb933bd6fad37aa2d162d1a594001 if abs_tick & 0x1 else 0x100000000000000000000000000000000
+    for mask, multiplier in _TICK_RATIOS:
+        if abs_tick & mask:
+            ratio = (ratio * multiplier) >> 128
+
+    if tick > 0:
+        ratio = MAX_UINT256 // ratio
+
+    return (ratio >> 32) + (0 if ratio % (1 << 32) == 0 else 1)
+
+
+def get_tick_at_sqrt_ratio(sqrt_price_x96: int) -> int:
+    """TickMath.getTickAtSqrtRatio - największy tick, dla którego getSqrtRatioAtTick(tick) <= cena."""
+    if not MIN_SQRT_RATIO <= sqrt_price_x96 < MAX_SQRT_RATIO:
+        raise ValueError("sqrtPriceX96 poza zakresem")
+    low, high = MIN_TICK, MAX_TICK
+    while low < high:
+        mid = (low + high + 1) // 2
+        if get_sqrt_ratio_at_tick(mid) <= sqrt_price_x96:
+            low = mid
+        else:
+            high = mid - 1
+    return low
+
+
+def get_amount0_delta(sqrt_a: int, sqrt_b: int, liquidity: int, round_up: bool) -> int:
+    if sqrt_a > sqrt_b:
+        sqrt_a, sqrt_b = sqrt_b, sqrt_a
+    numerator1 = liquidity << 96
+    numerator2 = sqrt_b - sqrt_a
+    if round_up:
+        return div_rounding_up(mul_div_rounding_up(numerator1, numerator2, sqrt_b), sqrt_a)
+    return mul_div(numerator1, numerator2, sqrt_b) // sqrt_a
+
+
+def get_amount1_delta(sqrt_a: int, sqrt_b: int, liquidity: int, round_up: bool) -> int:
+    if sqrt_a > sqrt_b:
+        sqrt_a, sqrt_b = sqrt_b, sqrt_a
+    if round_up:
+        return mul_div_rounding_up(liquidity, sqrt_b - sqrt_a, Q96)
+    return mul_div(liquidity, sqrt_b - sqrt_a, Q96)
+
+
+def get_next_sqrt_price_from_input(sqrt_price_x96: int, liquidity: int, amount_in: int, zero_for_one: bool) -> int:
+    """SqrtPriceMath.getNextSqrtPriceFromInput (token0 zaokrąglenie w górę, token1 w dół)."""
+    if amount_in == 0:
+        return sqrt_price_x96
+    if zero_for_one:
+        numerator1 = liquidity << 96
+        product = amount_in * sqrt_price_x96
+        if product <= MAX_UINT256:
+            denominator = numerator1 + product
+            if denominator <= MAX_UINT256:
+                return mul_div_rounding_up(numerator1, sqrt_price_x96, denominator)
+        return div_rounding_up(numerator1, numerator1 // sqrt_price_x96 + amount_in)
+    return sqrt_price_x96 + (amount_in << 96) // liquidity
+
+
+def compute_swap_step_exact_in(sqrt_current: int, sqrt_target: int, liquidity: int,
+                               amount_remaining: int, fee_pips: int):
+    """SwapMath.computeSwapStep dla exact input. Zwraca (sqrt_next, amount_in, amount_out, fee_amount)."""
+    zero_for_one = sqrt_current >= sqrt_target
+
+    amount_remaining_less_fee = mul_div(amount_remaining, 1_000_000 - fee_pips, 1_000_000)
+    if zero_for_one:
+        amount_in = get_amount0_delta(sqrt_target, sqrt_current, liquidity, True)
+    else:
+        amount_in = get_amount1_delta(sqrt_current, sqrt_target, liquidity, True)
+
+    if amount_remaining_less_fee >= amount_in:
+        sqrt_next = sqrt_target
+    else:
+        sqrt_next = get_next_sqrt_price_from_input(sqrt_current, liquidity, amount_remaining_less_fee, zero_for_one)
+
+    reached_target = sqrt_target == sqrt_next
+    if zero_for_one:
+        if not reached_target:
+            amount_in = get_amount0_delta(sqrt_next, sqrt_current, liquidity, True)
+        amount_out = get_amount1_delta(sqrt_next, sqrt_current, liquidity, False)
+    else:
+        if not reached_target:
+            amount_in = get_amount1_delta(sqrt_current, sqrt_next, liquidity, True)
+        amount_out = get_amount0_delta(sqrt_current, sqrt_next, liquidity, False)
+
+    if not reached_target:
+        fee_amount = amount_remaining - amount_in
+    else:
+        fee_amount = mul_div_rounding_up(amount_in, fee_pips, 1_000_000 - fee_pips)
+
+    return sqrt_next, amount_in, amount_out, fee_amount
+
+
+def next_initialized_tick_within_one_word(bitmap: Mapping[int, int], tick: int, tick_spacing: int, lte: bool):
+    """TickBitmap.nextInitializedTickWithinOneWord. Rzuca TickDataOutOfRange dla niezaładowanego słowa."""
+    compressed = tick // tick_spacing
+
+    if lte:
+        word_pos, bit_pos = compressed >> 8, compressed & 0xFF
+        if word_pos not in bitmap:
+            raise TickDataOutOfRange(word_pos)
+        masked = bitmap[word_pos] & ((1 << bit_pos) - 1 + (1 << bit_pos))
+        if masked:
+            return (compressed - (bit_pos - (masked.bit_length() - 1))) * tick_spacing, True
+        return (compressed - bit_pos) * tick_spacing, False
+
+    word_pos, bit_pos = (compressed + 1) >> 8, (compressed + 1) & 0xFF
+    if word_pos not in bitmap:
+        raise TickDataOutOfRange(word_pos)
+    masked = bitmap[word_pos] & ~((1 << bit_pos) - 1)
+    if masked:
+        lsb = (masked & -masked).bit_length() - 1
+        return (compressed + 1 + (lsb - bit_pos)) * tick_spacing, True
+    return (compressed + 1 + (255 - bit_pos)) * tick_spacing, False
+
+
+def swap_exact_in(sqrt_price_x96: int, tick: int, liquidity: int, fee_pips: int, tick_spacing: int,
+                  bitmap: Mapping[int, int], liquidity_net: Mapping[int, int],
+                  zero_for_one: bool, amount_in: int, sqrt_price_limit_x96: Optional[int] = None) -> SwapResult:
+    """Pętla UniswapV3Pool.swap dla exact input (tak jak Quoter z sqrtPriceLimitX96 = 0)."""
+    if sqrt_price_limit_x96 is None:
+        sqrt_price_limit_x96 = MIN_SQRT_RATIO + 1 if zero_for_one else MAX_SQRT_RATIO - 1
+
+    remaining = amount_in
+    amount_out = 0
+    ticks_crossed = 0
+
+    while remaining != 0 and sqrt_price_x96 != sqrt_price_limit_x96:
+        sqrt_start = sqrt_price_x96
+        tick_next, initialized = next_initialized_tick_within_one_word(bitmap, tick, tick_spacing, zero_for_one)
+        tick_next = max(MIN_TICK, min(MAX_TICK, tick_next))
+        sqrt_next = get_sqrt_ratio_at_tick(tick_next)
+
+        if (sqrt_next < sqrt_price_limit_x96) if zero_for_one else (sqrt_next > sqrt_price_limit_x96):
+            sqrt_target = sqrt_price_limit_x96
+        else:
+            sqrt_target = sqrt_next
+
+        sqrt_price_x96, step_in, step_out, step_fee = compute_swap_step_exact_in(
+            sqrt_price_x96, sqrt_target, liquidity, remaining, fee_pips
+        )
+        remaining -= step_in + step_fee
+        amount_out += step_out
+
+        if sqrt_price_x96 == sqrt_next:
+            if initialized:
+                delta = liquidity_net.get(tick_next, 0)
+                liquidity += -delta if zero_for_one else delta
+                if liquidity < 0:
+                    raise ValueError("Ujemna płynność po przekroczeniu ticka")
+                ticks_crossed += 1
+            tick = tick_next - 1 if zero_for_one else tick_next
+        elif sqrt_price_x96 != sqrt_start:
+            tick = get_tick_at_sqrt_ratio(sqrt_price_x96)
+
+    return SwapResult(
+        amount_in=amount_in - remaining,
+        amount_out=amount_out,
+        sqrt_price_x96=sqrt_price_x96,
+        tick=tick,
+        ticks_crossed=ticks_crossed
+    )
@@ -1,113 +1,417 @@
 from decimal import Decimal
 import asyncio
-from fastapi import APIRouter, HTTPException, Depends
-from models import ExchangeRequest, TransactionOption, TransactionOptionRaw, FrontendTransactionOption
-from pools_config import UNISWAP_POOLS, SUSHISWAP_POOLS, CAMELOT_POOLS, TOKENS, DEX_CONFIGS
-from services import CoinGeckoService, UniswapService, SushiswapService, CamelotService, RedisCacheService
-from exchange_utils import process_dex_pools, fetch_token_prices
-from decision_engine import rank_options
+import orjson
+from fastapi import APIRouter, HTTPException, Depends, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import ORJSONResponse, StreamingResponse, Response
+from typing import List, Optional, Sequence, Tuple
+from models import ExchangeRequest, ExchangeBatchRequest, TransactionOption, FrontendTransactionOption
+from config import ROUTING_ENABLED, EXCHANGE_BATCH_MAX_ITEMS, SUBSCRIPTION_MAX_PER_CONNECTION, SUBSCRIPTION_QUEUE_SIZE
+from pools_config import TOKENS, DEX_CONFIGS
+from pool_registry import pool_registry
+from services import (
+    CoinGeckoService, UniswapService, SushiswapService, CamelotService, RedisCacheService,
+    AsyncUniswapService, AsyncSushiswapService, AsyncCamelotService, RequestCacheService
+)
+from services.pool_state import PoolStateBatch
+from services.pool_snapshot_service import pool_snapshot_service
+from services.rpc_session import rpc_session
+from services.single_flight import single_flight
+from services.local_cache import local_cache
+from services.redis_service import redis_service
+from services.price_warmer import price_warmer
+from services.quote_curve_service import quote_curve_service
+from services.routing_service import routing_service
+from services.gas_model_service import gas_model_service
+from services.gas_oracle_service import gas_oracle_service
+from services.metrics_service import metrics_service, STAGE_SECONDS
+from services.quote_subscriptions import QuoteSubscriptionService, SubscriptionKey, subscription_key
+from exchange_utils import process_dex_pools, process_single_pool, process_routes, process_split, fetch_token_prices, pool_cache_keys, price_cache_key
+from decision_engine import STRATEGIES, TOPSIS_CRITERIA, rank_many, weights_matrix
 from token_manager import TokenManager
+from log_manager import log_manager, get_logger
+
+logger = get_logger(__name__)
 
 exchange_router = APIRouter()
 token_manager = TokenManager(TOKENS)
 
-def get_services(redis_cache_service: RedisCacheService = Depends(),
+def get_dex_services():
+    """Serwisy DEX: AsyncWeb3 gdy sesja RPC aktywna, inaczej sync Web3 (asyncio.to_thread)."""
+    if rpc_session.is_ready:
+        return AsyncUniswapService(), AsyncSushiswapService(), AsyncCamelotService()
+    return UniswapService(), SushiswapService(), CamelotService()
+
+async def get_request_cache(redis_cache_service: RedisCacheService = Depends()):
+    """Cache żądania: odczyty jednym MGET, zapisy wysyłane jednym pipeline po zakończeniu żądania."""
+    request_cache = RequestCacheService(redis_cache_service)
+    try:
+        yield request_cache
+    finally:
+        request_cache.flush_in_background()
+
+def get_services(redis_cache_service: RequestCacheService = Depends(get_request_cache),
                  coin_gecko_service: CoinGeckoService = Depends(), 
-                 uniswap_service: UniswapService = Depends(),
-                 sushiswap_service: SushiswapService = Depends(),
-                 camelot_service: CamelotService = Depends()):
+                 dex_services: tuple = Depends(get_dex_services)):
+    uniswap_service, sushiswap_service, camelot_service = dex_services
     return redis_cache_service, coin_gecko_service, uniswap_service, sushiswap_service, camelot_service
 
-@exchange_router.post("/exchange")
-async def exchange(request: ExchangeRequest,
-                   services: tuple = Depends(get_services)):
-    redis_cache_service, coin_gecko_service, uniswap_service, sushiswap_service, camelot_service = services
-    print(f"Otrzymano żądanie z danymi: {request}")
-    token_from = request.token_from.upper()
-    token_to = request.token_to.upper()
-    amount = request.amount
-    print(f"Token_from: {token_from}, Token_to: {token_to}, Amount: {amount}")
+def pair_supported(token_from: str, token_to: str) -> bool:
+    """Para ma pulę bezpośrednią lub trasę wieloskokową (tylko rejestr i cache tras, bez I/O)."""
+    return bool(pool_registry.plans(token_from, token_to)) or (
+        ROUTING_ENABLED and bool(routing_service.find_routes(token_from, token_to))
+    )
 
-    all_token_addresses = set()
-    dexes = [
-        ("Uniswap", UNISWAP_POOLS, uniswap_service),
-        ("SushiSwap", SUSHISWAP_POOLS, sushiswap_service),
-        ("Camelot", CAMELOT_POOLS, camelot_service)
-    ]
-    
-    for dex_name, pools, _ in dexes:
-        for pair in pools.keys():
-            tokens = pair.split('/')
-            if set(tokens) == {token_from, token_to}:
-                token_addresses = token_manager.get_pool_addresses(pair)
-                all_token_addresses.update(token_addresses)
-    
-    # Dodaj ETH (potrzebny dla gas cost)
-    eth_address = token_manager.get_address_by_symbol("ETH")
-    if eth_address:
-        all_token_addresses.add(eth_address)
-    
-    print(f"Pobieranie cen dla {len(all_token_addresses)} tokenów (raz na początku dla wszystkich DEXów)...")
-    all_prices = await fetch_token_prices(coin_gecko_service, list(all_token_addresses), redis_cache_service)
-    eth_price = Decimal(all_prices.get(eth_address, 0)) if eth_address else Decimal("0")
-    
+def match_pools(dexes: list, token_from: str, token_to: str, amount: float, pool_states: PoolStateBatch) -> Tuple[set, list]:
+    """Pule pary w batchu stanu; zwraca adresy tokenów i klucze Redis pul dla żądania."""
+    token_addresses_set = set()
+    cache_keys = []
+    dex_services = dict(dexes)
+    for plan in pool_registry.plans(token_from, token_to):
+        if plan.dex not in dex_services:
+            continue
+        token_addresses_set.update(plan.token_addresses)
+        pool_states.add(plan.dex, plan.pair, dex_services[plan.dex], plan.pool_address, list(plan.token_addresses))
+        cache_keys.extend(pool_cache_keys(plan.dex, plan.pair, token_from, token_to, amount).values())
+
+    # Pule tras wieloskokowych: stan w tym samym batchu, ceny tokenów pośrednich (płynność w USD)
+    for (dex_name, pair), hop in routing_service.route_pools(token_from, token_to).items():
+        token_addresses_set.update(hop.plan.token_addresses)
+        pool_states.add(dex_name, pair, dex_services[dex_name], hop.pool_address, list(hop.plan.token_addresses))
+    return token_addresses_set, cache_keys
+
+async def collect_options(dexes: list, token_from: str, token_to: str, amount: float, redis_cache_service,
+                          all_prices: dict, eth_price: Decimal, pool_states: PoolStateBatch) -> List[TransactionOption]:
+    """Opcje ze wszystkich DEXów równolegle (błąd jednego DEXa nie przerywa pozostałych)."""
     all_options = []
 
-    print(f"Przetwarzam {len(dexes)} DEXy równolegle...")
+    logger.debug("Przetwarzam %s DEXy równolegle...", len(dexes))
     tasks = [
-        process_dex_pools(dex_name, pools, dex_service, token_from, token_to, amount, 
-                         redis_cache_service, all_prices, eth_price)
-        for dex_name, pools, dex_service in dexes
+        process_dex_pools(dex_name, dex_service, token_from, token_to, amount, 
+                         redis_cache_service, all_prices, eth_price, pool_states)
+        for dex_name, dex_service in dexes
     ]
     
+    tasks.append(process_routes(token_from, token_to, amount, dict(dexes), all_prices, eth_price, pool_states))
+    
     results = await asyncio.gather(*tasks, return_exceptions=True)
     
     for i, result in enumerate(results):
         if isinstance(result, Exception):
-            print(f"Błąd w DEX {dexes[i][0]}: {result}")
+            logger.warning("Błąd w %s: %s", dexes[i][0] if i < len(dexes) else 'trasach wieloskokowych', result)
         else:
             all_options.extend(result)
+    return all_options
 
-    raw_options = [TransactionOptionRaw(
-        dex=o.dex,
-        pool=o.pool,
-        amount_to=o.amount_to,
-        liquidity=o.liquidity,
-        dex_fee=o.dex_fee,
-        gas_cost=o.gas_cost
-    ) for o in all_options]
-
-    full_option_map = {(o.dex, o.pool): o for o in all_options}
-    sorted_raw = rank_options(raw_options)
-
-    frontend_sorted = []
-    for raw in sorted_raw:
-        full = full_option_map.get((raw.dex, raw.pool))
-        if full:
-            percentage_change = 0.0
-            if full.value_from_usd > 0 and full.value_to_usd > 0:
-                percentage_change = ((full.value_to_usd - full.value_from_usd) / full.value_from_usd) * 100
-            
-            frontend_sorted.append(FrontendTransactionOption(
-                dex=full.dex,
-                pair=full.pool,
-                amount_from=full.amount_from,
-                amount_to=full.amount_to,
-                value_from_usd=full.value_from_usd,
-                value_to_usd=full.value_to_usd,
-                liquidity=full.liquidity,
-                dex_fee=full.dex_fee,
-                gas_cost=full.gas_cost,
-                percentage_change=percentage_change
-            ))
+def check_ranking(request: ExchangeRequest) -> None:
+    """422 dla nieznanej strategii rankingu albo niepoprawnych wag."""
+    if request.strategy is not None and request.strategy not in STRATEGIES:
+        raise HTTPException(status_code=422, detail=f"Unknown strategy. Available: {', '.join(STRATEGIES)}.")
+    if request.weights is not None and (len(request.weights) != TOPSIS_CRITERIA or any(w < 0 for w in request.weights)):
+        raise HTTPException(status_code=422, detail=f"Weights must be {TOPSIS_CRITERIA} non-negative numbers (amount_to, liquidity, dex_fee, gas_cost).")
+
+def rank_frontend_option_sets(option_sets: Sequence[List[TransactionOption]],
+                              requests: Sequence[Optional[ExchangeRequest]]) -> List[List[FrontendTransactionOption]]:
+    """Ranking wszystkich zbiorów opcji jednym przebiegiem decision_engine i zamiana na format frontendu."""
+    with STAGE_SECONDS.time("ranking", "", ""):
+        ranked = rank_many(
+            option_sets,
+            [request.strategy if request else None for request in requests],
+            weights_matrix([request.weights if request else None for request in requests])
+        )
+        return [[to_frontend_option(option) for option in options] for options in ranked]
+
+def rank_frontend_options(all_options: List[TransactionOption], request: Optional[ExchangeRequest] = None) -> List[FrontendTransactionOption]:
+    """Ranking (domyślnie TOPSIS) i zamiana na format frontendu."""
+    return rank_frontend_option_sets([all_options], [request])[0]
+
+def to_frontend_option(full: TransactionOption) -> FrontendTransactionOption:
+    """Opcja w formacie frontendu (z procentową zmianą wartości USD)."""
+    percentage_change = 0.0
+    if full.value_from_usd > 0 and full.value_to_usd > 0:
+        percentage_change = ((full.value_to_usd - full.value_from_usd) / full.value_from_usd) * 100
+    
+    return FrontendTransactionOption(
+        dex=full.dex,
+        pair=full.pool,
+        amount_from=full.amount_from,
+        amount_to=full.amount_to,
+        value_from_usd=full.value_from_usd,
+        value_to_usd=full.value_to_usd,
+        liquidity=full.liquidity,
+        dex_fee=full.dex_fee,
+        gas_cost=full.gas_cost,
+        percentage_change=percentage_change,
+        route=full.route
+    )
+
+def request_dexes(services: tuple) -> list:
+    """(nazwa DEXa, serwis) dla serwisów żądania; pule DEXów z pool_registry."""
+    _, _, uniswap_service, sushiswap_service, camelot_service = services
+    return [
+        ("Uniswap", uniswap_service),
+        ("SushiSwap", sushiswap_service),
+        ("Camelot", camelot_service)
+    ]
+
+async def load_prices(redis_cache_service, coin_gecko_service, token_addresses: set, cache_keys: list) -> Tuple[dict, Decimal]:
+    """Jeden MGET dla wszystkich kluczy, potem ceny tokenów (+ ETH dla kosztu gazu)."""
+    # Dodaj ETH (potrzebny dla gas cost)
+    eth_address = token_manager.get_address_by_symbol("ETH")
+    if eth_address:
+        token_addresses = token_addresses | {eth_address}
+
+    with STAGE_SECONDS.time("price_fetch", "", ""):
+        # Wszystkie klucze Redis żądania (ceny tokenów + klucze pul) jednym MGET
+        await redis_cache_service.prefetch([price_cache_key(addr) for addr in token_addresses] + cache_keys)
+
+        logger.debug("Pobieranie cen dla %s tokenów (raz na początku dla wszystkich DEXów)...", len(token_addresses))
+        all_prices = await fetch_token_prices(coin_gecko_service, list(token_addresses), redis_cache_service)
+    eth_price = Decimal(all_prices.get(eth_address, 0)) if eth_address else Decimal("0")
+    return all_prices, eth_price
+
+@exchange_router.post("/exchange", response_class=ORJSONResponse)
+async def exchange(request: ExchangeRequest,
+                   services: tuple = Depends(get_services)):
+    redis_cache_service, coin_gecko_service, *_ = services
+    logger.debug("Otrzymano żądanie z danymi: %s", request)
+    token_from = request.token_from.upper()
+    token_to = request.token_to.upper()
+    amount = request.amount
+    logger.debug("Token_from: %s, Token_to: %s, Amount: %s", token_from, token_to, amount)
+    check_ranking(request)
+
+    # Nieobsługiwana para - 404 przed pobraniem cen i stanu pul
+    if not pair_supported(token_from, token_to):
+        raise HTTPException(status_code=404, detail="No exchange options available.")
+
+    dexes = request_dexes(services)
+
+    # Stan pul ze snapshotu per blok; brakujące (slot0/globalState, fee, balanceOf) jednym Multicall3
+    snapshot = pool_snapshot_service.fresh()
+    pool_states = PoolStateBatch(snapshot)
+    all_token_addresses, cache_keys = match_pools(dexes, token_from, token_to, amount, pool_states)
+
+    all_prices, eth_price = await load_prices(redis_cache_service, coin_gecko_service, all_token_addresses, cache_keys)
+    
+    all_options = await collect_options(dexes, token_from, token_to, amount, redis_cache_service, all_prices, eth_price, pool_states)
+    frontend_sorted = rank_frontend_options(all_options, request)
 
     if frontend_sorted:
-        return {
-            "options": frontend_sorted
-        }
+        split = await process_split(token_from, token_to, amount, dict(dexes), all_options, all_prices, pool_states)
+        # Odpowiedź zwracana wprost - bez jsonable_encoder FastAPI, dataclassy serializuje orjson
+        with STAGE_SECONDS.time("serialization", "", ""):
+            return ORJSONResponse({
+                "options": frontend_sorted,
+                "split": split,
+                "snapshot": snapshot.info() if snapshot else None
+            })
     else:
         raise HTTPException(status_code=404, detail="No exchange options available.")
 
+def stream_event(event: str, data, sse: bool) -> str:
+    """Zdarzenie strumienia: SSE (event/data) albo linia NDJSON."""
+    payload = orjson.dumps(data).decode()
+    if sse:
+        return f"event: {event}\ndata: {payload}\n\n"
+    return f'{{"event": "{event}", "data": {payload}}}\n'
+
+@exchange_router.post("/exchange/stream")
+async def exchange_stream(request: ExchangeRequest,
+                          http_request: Request,
+                          services: tuple = Depends(get_services)):
+    """Opcje wysyłane od razu po przeliczeniu puli (NDJSON, albo SSE dla Accept: text/event-stream); na końcu ranking."""
+    redis_cache_service, coin_gecko_service, *_ = services
+    token_from = request.token_from.upper()
+    token_to = request.token_to.upper()
+    amount = request.amount
+    sse = "text/event-stream" in http_request.headers.get("accept", "")
+    check_ranking(request)
+    if not pair_supported(token_from, token_to):
+        raise HTTPException(status_code=404, detail="No exchange options available.")
+
+    dexes = request_dexes(services)
+    snapshot = pool_snapshot_service.fresh()
+    pool_states = PoolStateBatch(snapshot)
+    all_token_addresses, cache_keys = match_pools(dexes, token_from, token_to, amount, pool_states)
+
+    async def events():
+        tasks = []
+        try:
+            all_prices, eth_price = await load_prices(redis_cache_service, coin_gecko_service, all_token_addresses, cache_keys)
+            # Zadanie per pula (nie per DEX) - pierwsza opcja nie czeka na najwolniejszą pulę DEXa
+            dex_services = dict(dexes)
+            tasks = [
+                asyncio.ensure_future(process_single_pool(
+                    plan, dex_services[plan.dex], token_from, token_to, amount,
+                    redis_cache_service, all_prices, eth_price, pool_states
+                ))
+                for plan in pool_registry.plans(token_from, token_to)
+                if plan.dex in dex_services
+            ]
+            tasks.append(asyncio.ensure_future(
+                process_routes(token_from, token_to, amount, dex_services, all_prices, eth_price, pool_states)
+            ))
+
+            all_options = []
+            for next_done in asyncio.as_completed(tasks):
+                try:
+                    option = await next_done
+                except Exception as e:
+                    logger.warning("Błąd puli w strumieniu: %s", e)
+                    continue
+                # Pula - jedna opcja; trasy wieloskokowe - lista opcji
+                for option in (option if isinstance(option, list) else [option]):
+                    if option is not None:
+                        all_options.append(option)
+                        yield stream_event("option", to_frontend_option(option), sse)
+
+            frontend_sorted = rank_frontend_options(all_options, request)
+            if frontend_sorted:
+                yield stream_event("ranked", {
+                    "options": frontend_sorted,
+                    "snapshot": snapshot.info() if snapshot else None
+                }, sse)
+            else:
+                yield stream_event("error", {"detail": "No exchange options available."}, sse)
+        finally:
+            # Klient rozłączony w trakcie - nie liczymy dalej pul dla nikogo
+            for task in tasks:
+                task.cancel()
+            # Dependency z yield kończy się przed wysłaniem strumienia - zapisy z pul flushujemy tutaj
+            redis_cache_service.flush_in_background()
+
+    return StreamingResponse(events(), media_type="text/event-stream" if sse else "application/x-ndjson")
+
+@exchange_router.post("/exchange/batch", response_class=ORJSONResponse)
+async def exchange_batch(request: ExchangeBatchRequest,
+                         services: tuple = Depends(get_services)):
+    """Wiele par/kwot w jednym wywołaniu: wspólne pule, ceny i MGET; ranking wszystkich pozycji jednym przebiegiem."""
+    redis_cache_service, coin_gecko_service, *_ = services
+    items = request.expand()
+    if not items:
+        raise HTTPException(status_code=422, detail="Provide 'requests' or 'token_from', 'token_to' and 'amounts'.")
+    if len(items) > EXCHANGE_BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=422, detail=f"Batch limited to {EXCHANGE_BATCH_MAX_ITEMS} items.")
+    for item in items:
+        check_ranking(item)
+    logger.debug("Otrzymano batch: %s pozycji", len(items))
+
+    dexes = request_dexes(services)
+    snapshot = pool_snapshot_service.fresh()
+    # Jeden batch stanu pul dla wszystkich pozycji - pula wspólna dla wielu kwot czytana raz
+    pool_states = PoolStateBatch(snapshot)
+    all_token_addresses = set()
+    cache_keys = []
+    # Pozycje z nieobsługiwaną parą nie dokładają pul ani cen - od razu błąd w wyniku
+    supported = [pair_supported(item.token_from.upper(), item.token_to.upper()) for item in items]
+    for item, is_supported in zip(items, supported):
+        if not is_supported:
+            continue
+        token_addresses, item_keys = match_pools(dexes, item.token_from.upper(), item.token_to.upper(), item.amount, pool_states)
+        all_token_addresses |= token_addresses
+        cache_keys.extend(item_keys)
+
+    if any(supported):
+        all_prices, eth_price = await load_prices(redis_cache_service, coin_gecko_service, all_token_addresses, cache_keys)
+    else:
+        all_prices, eth_price = {}, Decimal("0")
+
+    async def item_options_for(item, is_supported: bool) -> List[TransactionOption]:
+        if not is_supported:
+            return []
+        return await collect_options(dexes, item.token_from.upper(), item.token_to.upper(), item.amount,
+                                     redis_cache_service, all_prices, eth_price, pool_states)
+
+    item_options = await asyncio.gather(*(
+        item_options_for(item, is_supported) for item, is_supported in zip(items, supported)
+    ))
+
+    # Ranking wszystkich pozycji naraz (jedna macierz, redukcje per pozycja)
+    results = []
+    for item, frontend_sorted in zip(items, rank_frontend_option_sets(item_options, items)):
+        result = {"token_from": item.token_from, "token_to": item.token_to, "amount": item.amount}
+        if frontend_sorted:
+            result["options"] = frontend_sorted
+        else:
+            result["error"] = "No exchange options available."
+        results.append(result)
+
+    with STAGE_SECONDS.time("serialization", "", ""):
+        return ORJSONResponse({
+            "results": results,
+            "snapshot": snapshot.info() if snapshot else None
+        })
+
+async def compute_subscription(key: SubscriptionKey) -> dict:
+    """Ranking dla klucza subskrypcji - ta sama ścieżka co /exchange, z własnym cache żądania."""
+    token_from, token_to, amount = key
+    redis_cache_service = RequestCacheService(RedisCacheService())
+    services = (redis_cache_service, CoinGeckoService(), *get_dex_services())
+    try:
+        dexes = request_dexes(services)
+        snapshot = pool_snapshot_service.fresh()
+        pool_states = PoolStateBatch(snapshot)
+        all_token_addresses, cache_keys = match_pools(dexes, token_from, token_to, amount, pool_states)
+        all_prices, eth_price = await load_prices(redis_cache_service, services[1], all_token_addresses, cache_keys)
+        all_options = await collect_options(dexes, token_from, token_to, amount, redis_cache_service, all_prices, eth_price, pool_states)
+        frontend_sorted = rank_frontend_options(all_options)
+    finally:
+        redis_cache_service.flush_in_background()
+
+    message = {"token_from": token_from, "token_to": token_to, "amount": amount}
+    if frontend_sorted:
+        message.update(
+            event="quote",
+            options=frontend_sorted,
+            snapshot=snapshot.info() if snapshot else None
+        )
+    else:
+        message.update(event="error", detail="No exchange options available.")
+    return message
+
+quote_subscriptions = QuoteSubscriptionService(compute_subscription)
+
+@exchange_router.websocket("/ws/quotes")
+async def quotes_websocket(websocket: WebSocket):
+    """Subskrypcje quote: {"action": "subscribe"|"unsubscribe", "token_from", "token_to", "amount"}; push po zmianie rankingu."""
+    await websocket.accept()
+    queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIPTION_QUEUE_SIZE)
+    keys = set()
+
+    async def sender():
+        while True:
+            await websocket.send_text(orjson.dumps(await queue.get()).decode())
+
+    sender_task = asyncio.create_task(sender())
+    try:
+        while True:
+            text = await websocket.receive_text()
+            try:
+                # Ramka spoza JSON - komunikat błędu zamiast zamknięcia połączenia
+                message = orjson.loads(text)
+                action = message.get("action", "subscribe")
+                key = subscription_key(message["token_from"], message["token_to"], message["amount"])
+            except (orjson.JSONDecodeError, AttributeError, KeyError, TypeError, ValueError):
+                await queue.put({"event": "error", "detail": "Expected action, token_from, token_to and amount."})
+                continue
+
+            if action == "unsubscribe":
+                keys.discard(key)
+                quote_subscriptions.unsubscribe(key, queue)
+            elif not pair_supported(key[0], key[1]):
+                await queue.put({"event": "error", "token_from": key[0], "token_to": key[1], "amount": key[2],
+                                 "detail": "No exchange options available."})
+            elif key not in keys and len(keys) >= SUBSCRIPTION_MAX_PER_CONNECTION:
+                await queue.put({"event": "error", "detail": f"Limit of {SUBSCRIPTION_MAX_PER_CONNECTION} subscriptions per connection."})
+            else:
+                keys.add(key)
+                await quote_subscriptions.subscribe(key, queue)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        quote_subscriptions.unsubscribe_all(queue)
+        sender_task.cancel()
+
 @exchange_router.get("/config")
 async def get_config():
     """Konfiguracja kontraktów dla frontendu."""
@@ -115,4 +419,25 @@ async def get_config():
         "tokens": {symbol: data['address'] for symbol, data in TOKENS.items()},
         "decimals": {symbol: data['decimals'] for symbol, data in TOKENS.items()},
         "routers": {dex: config['contracts']['router'] for dex, config in DEX_CONFIGS.items()}
-    }
\ No newline at end of file
+    }
+
+@exchange_router.get("/stats")
+async def get_stats():
+    """Liczniki single-flight (współdzielone obliczenia pul), cache L1, puli Redis, odświeżania cen, krzywych quote, subskrypcji, tras, modelu i ceny gazu oraz kolejki logów."""
+    return {
+        "single_flight": single_flight.stats(),
+        "l1_cache": local_cache.stats(),
+        "redis": redis_service.stats(),
+        "price_warmer": price_warmer.stats(),
+        "quote_curves": quote_curve_service.stats(),
+        "subscriptions": quote_subscriptions.stats(),
+        "routing": routing_service.stats(),
+        "gas_model": gas_model_service.stats(),
+        "gas_price": gas_oracle_service.stats(),
+        "logging": log_manager.stats()
+    }
+
+@exchange_router.get("/metrics")
+async def get_metrics():
+    """Metryki procesu w formacie tekstowym Prometheus: czasy etapów per DEX i pula, cache, usługi zewnętrzne, pula wątków."""
+    return Response(metrics_service.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
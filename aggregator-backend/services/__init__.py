@@ -1,6 +1,7 @@
-from .camelot_service import CamelotService
+from .camelot_service import CamelotService, AsyncCamelotService
 from .coingecko_service import CoinGeckoService
 from .redis_cache import RedisCacheService
 from .redis_service import redis_service, RedisService
-from .sushiswap_service import SushiswapService
-from .uniswap_service import UniswapService
\ No newline at end of file
+from .request_cache import RequestCacheService
+from .sushiswap_service import SushiswapService, AsyncSushiswapService
+from .uniswap_service import UniswapService, AsyncUniswapService
\ No newline at end of file
@@ -1,52 +1,223 @@
+import functools
+import inspect
 from decimal import Decimal
 from typing import Tuple, List, Dict, Any, Optional
-from config import erc20_abi, w3
+from eth_abi import decode
+from config import TICK_WORD_RADIUS
 from token_manager import TokenManager
 from web3 import Web3
 from pools_config import TOKENS, DEX_CONFIGS
+from log_manager import get_logger
+from .calculation_service import mid_price_from_univ3_sqrt
+from .multicall_service import encode_call
+from .raw_call_service import (
+    raw_call_service, AbiFunction, SLOT0, FEE, TOKEN0, LIQUIDITY, BALANCE_OF, V3_EXACT_INPUT_SINGLE
+)
+from .pool_state import PoolState, TickData
+import asyncio
 import time
 
+logger = get_logger(__name__)
+
 token_manager = TokenManager(TOKENS)
 
-_gas_price_cache = {'value': None, 'timestamp': 0}
+# TickLens Uniswap V3 (Arbitrum) - zainicjalizowane ticki słowa bitmapy jednym wywołaniem (działa też dla Sushi V3)
+TICK_LENS_ADDRESS = Web3.to_checksum_address("0xbfd8137f7d1516D3ea5cA83523914859ec47F573")
+
+WETH_ADDRESS = TOKENS['ETH']['address'].lower()
+
+
+def dex_call(operation: str, default_attr: Optional[str] = None):
+    """Metoda DEXa (sync lub async): wyjątek -> ostrzeżenie w logu i wartość domyślna (None albo atrybut serwisu)."""
+    def decorator(method):
+        def fallback(self, args, e):
+            logger.warning("Błąd %s %s %s: %s", operation, self.__class__.__name__, args[0] if args else "", e)
+            return getattr(self, default_attr) if default_attr else None
+
+        if inspect.iscoroutinefunction(method):
+            @functools.wraps(method)
+            async def async_wrapper(self, *args, **kwargs):
+                try:
+                    return await method(self, *args, **kwargs)
+                except Exception as e:
+                    return fallback(self, args, e)
+            return async_wrapper
+
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            try:
+                return method(self, *args, **kwargs)
+            except Exception as e:
+                return fallback(self, args, e)
+        return wrapper
+    return decorator
 
-def get_cached_gas_price():
-    """Gas price z cache lub blockchain."""
-    current_time = time.time()
-    
-    if _gas_price_cache['value'] is not None and _gas_price_cache['timestamp'] + 60 > current_time:
-        return _gas_price_cache['value']
-    
-    gas_price = w3.eth.gas_price
-    _gas_price_cache['value'] = gas_price
-    _gas_price_cache['timestamp'] = current_time
-    
-    return gas_price
 
 class BaseDexService:
     """Bazowa klasa dla UniswapService, SushiSwapService, CamelotService."""
-    
-    def get_liquidity(self, pool_address: str, token_addresses, token_decimals: Tuple[int, int], prices: dict) -> Optional[Tuple[Decimal, Decimal]]:
-        """Płynność puli (balanceOf dla token0 i token1)."""
+
+    default_swap_gas = 150_000
+    # Skompilowane funkcje Quotera i routera DEXa (selektor + kodeki)
+    quote_function: Optional[AbiFunction] = None
+    quoter_address: Optional[str] = None
+    # Quoter z fee tier w parametrach (Algebra ma fee dynamiczne)
+    quote_needs_fee_tier = True
+    swap_function: AbiFunction = V3_EXACT_INPUT_SINGLE
+    # Odczyt z sqrtPriceX96 w pierwszym polu (slot0 / globalState)
+    price_function: AbiFunction = SLOT0
+
+    def pool_state_calls(self, pool_address: str, token_addresses) -> List[Tuple[str, bytes]]:
+        """Wywołania Multicall3 dla stanu puli: slot0, fee, balanceOf token0/token1."""
+        return [
+            (pool_address, SLOT0.encode()),
+            (pool_address, FEE.encode()),
+            *self._balance_calls(pool_address, token_addresses)
+        ]
+
+    def decode_pool_state(self, results: List[Tuple[bool, bytes]], token_addresses) -> Optional[PoolState]:
+        """Dekoduje wyniki pool_state_calls (None gdy którekolwiek wywołanie się nie powiodło)."""
+        try:
+            (ok_slot0, slot0_data), (ok_fee, fee_data), *balance_results = results
+            balances = self._decode_balances(balance_results)
+            if not ok_slot0 or not ok_fee or balances is None:
+                logger.warning("Multicall3: nieudany odczyt stanu puli %s", self.__class__.__name__)
+                return None
+
+            sqrt_price_x96, tick = SLOT0.decode(slot0_data)
+            (fee,) = FEE.decode(fee_data)
+            return PoolState(
+                sqrt_price_x96=sqrt_price_x96,
+                tick=tick,
+                balance0=balances[0],
+                balance1=balances[1],
+                token0=min(addr.lower() for addr in token_addresses),
+                fee=fee
+            )
+        except Exception as e:
+            logger.warning("Błąd dekodowania stanu puli %s: %s", self.__class__.__name__, e)
+            return None
+
+    def quote_args(self, token_in_address: str, token_out_address: str, amount_in_wei: int, fee_tier: Optional[int]) -> tuple:
+        """Argumenty quoteExactInputSingle w kolejności Quotera DEXa."""
+        raise NotImplementedError
+
+    def quote_call(self, token_in_address: str, token_out_address: str, amount_in_wei: int, fee_tier: Optional[int]) -> Optional[Tuple[str, bytes]]:
+        """Wywołanie Quotera dla Multicall3 (None - DEX bez quote w batchu albo brak fee tier)."""
+        if self.quote_function is None or (self.quote_needs_fee_tier and not fee_tier):
+            return None
+        return (self.quoter_address, self.quote_function.encode(*self.quote_args(token_in_address, token_out_address, amount_in_wei, fee_tier)))
+
+    def decode_quote(self, data: bytes) -> int:
+        """amountOut z odpowiedzi Quotera (pierwsze słowo we wszystkich wersjach)."""
+        return self.quote_function.decode(data)[0]
+
+    def tick_data_calls(self, pool_address: str, state: PoolState, tick_spacing: int) -> List[Tuple[str, bytes]]:
+        """Wywołania Multicall3 dla ticków: liquidity() + TickLens dla słów bitmapy wokół bieżącego ticka."""
+        word = (state.tick // tick_spacing) >> 8
+        pool = Web3.to_checksum_address(pool_address)
+        return [
+            (pool_address, LIQUIDITY.encode()),
+            *[
+                (TICK_LENS_ADDRESS, encode_call("getPopulatedTicksInWord(address,int16)", ['address', 'int16'], [pool, word_pos]))
+                for word_pos in range(word - TICK_WORD_RADIUS, word + TICK_WORD_RADIUS + 1)
+            ]
+        ]
+
+    def tick_followup_calls(self, pool_address: str, results: List[Tuple[bool, bytes]], state: PoolState, tick_spacing: int) -> List[Tuple[str, bytes]]:
+        """Dodatkowe wywołania zależne od wyników tick_data_calls (TickLens zwraca wszystko od razu)."""
+        return []
+
+    def decode_tick_data(self, results: List[Tuple[bool, bytes]], state: PoolState, tick_spacing: int) -> Optional[TickData]:
+        """Dekoduje wyniki tick_data_calls do bitmapy i liquidityNet (None gdy brak kompletu słów)."""
         try:
-            token0_address, token1_address = token_addresses
-            decimals0, decimals1 = token_decimals
+            (ok_liquidity, liquidity_data), *word_results = results
+            if not ok_liquidity or not all(success for success, _ in word_results):
+                return None
 
-            token0_contract = w3.eth.contract(address=Web3.to_checksum_address(token0_address), abi=erc20_abi)
-            token1_contract = w3.eth.contract(address=Web3.to_checksum_address(token1_address), abi=erc20_abi)
+            first_word = ((state.tick // tick_spacing) >> 8) - TICK_WORD_RADIUS
+            bitmap = {first_word + offset: 0 for offset in range(len(word_results))}
+            liquidity_net = {}
+            for _, data in word_results:
+                (populated_ticks,) = decode(['(int24,int128,uint128)[]'], data)
+                for tick, net, _ in populated_ticks:
+                    compressed = tick // tick_spacing
+                    bitmap[compressed >> 8] |= 1 << (compressed & 0xFF)
+                    liquidity_net[tick] = net
 
-            balance0 = token0_contract.functions.balanceOf(pool_address).call()
-            balance1 = token1_contract.functions.balanceOf(pool_address).call()
+            return TickData(
+                tick_spacing=tick_spacing,
+                liquidity=LIQUIDITY.decode(liquidity_data)[0],
+                bitmap=bitmap,
+                liquidity_net=liquidity_net
+            )
+        except Exception as e:
+            logger.warning("Błąd dekodowania ticków %s: %s", self.__class__.__name__, e)
+            return None
 
-            balance0_normalized = Decimal(balance0) / (10 ** decimals0)
-            balance1_normalized = Decimal(balance1) / (10 ** decimals1)
+    def _balance_calls(self, pool_address: str, token_addresses) -> List[Tuple[str, bytes]]:
+        return [
+            (token_address, BALANCE_OF.encode(pool_address))
+            for token_address in token_addresses
+        ]
 
-            return balance0_normalized, balance1_normalized
+    def _decode_balances(self, results: List[Tuple[bool, bytes]]) -> Optional[Tuple[int, int]]:
+        if len(results) != 2 or not all(success for success, _ in results):
+            return None
+        return BALANCE_OF.decode(results[0][1])[0], BALANCE_OF.decode(results[1][1])[0]
 
+    def mid_price_from_state(self, state: PoolState, token_from: str, token_decimals: Tuple[int, int], token_addresses) -> Optional[Decimal]:
+        """Mid-price ze stanu puli (bez wywołań RPC)."""
+        try:
+            dec0, dec1 = token_decimals
+            is0_in = token_manager.get_address_by_symbol(token_from).lower() == token_addresses[0].lower()
+            return mid_price_from_univ3_sqrt(state.sqrt_price_x96, dec0, dec1, is0_in)
         except Exception as e:
-            print(f"Błąd przy pobieraniu płynności {pool_address}: {e}")
+            logger.warning("Błąd mid_price ze stanu puli %s: %s", self.__class__.__name__, e)
             return None
 
+    def liquidity_from_state(self, state: PoolState, token_decimals: Tuple[int, int]) -> Tuple[Decimal, Decimal]:
+        """Salda token0/token1 ze stanu puli, znormalizowane przez decimals."""
+        decimals0, decimals1 = token_decimals
+        return Decimal(state.balance0) / (10 ** decimals0), Decimal(state.balance1) / (10 ** decimals1)
+
+    def dex_fee_from_state(self, state: PoolState, token_from_address: str) -> Optional[Decimal]:
+        """Fee puli ze stanu (np. 0.003 dla 0.3%)."""
+        fee = state.fee_for(token_from_address)
+        if fee is None:
+            return None
+        return self._fee_fraction(fee)
+    
+    @dex_call("płynności")
+    def get_liquidity(self, pool_address: str, token_addresses, token_decimals: Tuple[int, int], prices: dict) -> Optional[Tuple[Decimal, Decimal]]:
+        """Płynność puli (balanceOf dla token0 i token1)."""
+        token0_address, token1_address = token_addresses
+        (balance0,) = raw_call_service.read(token0_address, BALANCE_OF, pool_address)
+        (balance1,) = raw_call_service.read(token1_address, BALANCE_OF, pool_address)
+        return self._normalize_balances(balance0, balance1, token_decimals)
+
+    @dex_call("fee")
+    def get_dex_fee_percent(self, pool_address: str, token_from_address: Optional[str] = None) -> Optional[Decimal]:
+        """Fee puli (np. 0.003 dla 0.3%)."""
+        return self._fee_fraction(raw_call_service.read(pool_address, FEE)[0])
+
+    @dex_call("mid_price")
+    def get_mid_price(self, pool_address, token_from, token_to, token_decimals, token_addresses=None) -> Optional[Decimal]:
+        """Mid-price z sqrtPriceX96 (slot0 / globalState)."""
+        token0 = self._known_token0(token_addresses) or raw_call_service.read(pool_address, TOKEN0)[0]
+        sqrt_x96 = raw_call_service.read(pool_address, self.price_function)[0]
+        return self._mid_price(token_from, token0, sqrt_x96, token_decimals)
+
+    @dex_call("quote_exact_in")
+    def quote_exact_in(self, pool_address, token_from, token_to, amount_in, token_decimals, token_addresses=None, pool_fee=None, pair=None) -> Optional[Decimal]:
+        """Quote z Quotera DEXa (amount_out już uwzględnia fee)."""
+        fee_tier = pool_fee
+        if not fee_tier and self.quote_needs_fee_tier:
+            fee_tier = raw_call_service.read(pool_address, FEE)[0]
+        token0 = self._known_token0(token_addresses) or raw_call_service.read(pool_address, TOKEN0)[0]
+        quote_args, dec_out = self._quote_request(token_from, token_to, amount_in, token_decimals, token0, fee_tier)
+        return self._amount_out(raw_call_service.read(self.quoter_address, self.quote_function, *quote_args), dec_out)
+
+    @dex_call("estymacji gas", default_attr="default_swap_gas")
     def estimate_gas_for_swap(
         self,
         token_in_address: str,
@@ -58,136 +229,129 @@ class BaseDexService:
     ) -> int:
         """
         Estymuje gas używając eth_estimateGas."""
-        try:
-            deadline = int(time.time()) + 1200
-            
-            swap_params = {
-                'tokenIn': Web3.to_checksum_address(token_in_address),
-                'tokenOut': Web3.to_checksum_address(token_out_address),
-                'fee': fee_tier,
-                'recipient': user_address,
-                'deadline': deadline,
-                'amountIn': amount_in_wei,
-                'amountOutMinimum': 0,
-                'sqrtPriceLimitX96': 0
-            }
-            
-            router_abi = self._get_router_abi()
-            router_contract = w3.eth.contract(address=Web3.to_checksum_address(router_address), abi=router_abi)
-            
-            tx_data = router_contract.encode_abi('exactInputSingle', args=[swap_params])
-            
-            weth_address = TOKENS['ETH']['address'].lower()
-            tx_value = amount_in_wei if token_in_address.lower() == weth_address else 0
-            
-            gas_estimate = w3.eth.estimate_gas({
-                'from': user_address,
-                'to': Web3.to_checksum_address(router_address),
-                'data': tx_data,
-                'value': tx_value
-            })
-            
-            gas_with_buffer = int(gas_estimate * 1.05)
-            
-            print(f"Gas estimate dla {self.__class__.__name__}: {gas_estimate} (+5% = {gas_with_buffer})")
-            return gas_with_buffer
-            
-        except Exception as e:
-            print(f"Błąd estymacji gas dla {self.__class__.__name__}: {e}")
-            return 150_000
-    
-    def _get_router_abi(self) -> list:
-        """Zwraca ABI routera."""
-        return [
-            {
-                "inputs": [
-                    {
-                        "components": [
-                            {"internalType": "address", "name": "tokenIn", "type": "address"},
-                            {"internalType": "address", "name": "tokenOut", "type": "address"},
-                            {"internalType": "uint24", "name": "fee", "type": "uint24"},
-                            {"internalType": "address", "name": "recipient", "type": "address"},
-                            {"internalType": "uint256", "name": "deadline", "type": "uint256"},
-                            {"internalType": "uint256", "name": "amountIn", "type": "uint256"},
-                            {"internalType": "uint256", "name": "amountOutMinimum", "type": "uint256"},
-                            {"internalType": "uint160", "name": "sqrtPriceLimitX96", "type": "uint160"}
-                        ],
-                        "internalType": "struct ISwapRouter.ExactInputSingleParams",
-                        "name": "params",
-                        "type": "tuple"
-                    }
-                ],
-                "name": "exactInputSingle",
-                "outputs": [{"internalType": "uint256", "name": "amountOut", "type": "uint256"}],
-                "stateMutability": "payable",
-                "type": "function"
-            }
-        ]
+        tx = self._swap_tx(token_in_address, token_out_address, amount_in_wei, fee_tier, router_address, user_address)
+        return self._gas_with_buffer(raw_call_service.estimate_gas(tx))
+
+    # Logika wspólna dla wariantów sync i async - przyjmuje wyniki odczytów RPC
+
+    def _normalize_balances(self, balance0: int, balance1: int, token_decimals: Tuple[int, int]) -> Tuple[Decimal, Decimal]:
+        decimals0, decimals1 = token_decimals
+        return Decimal(balance0) / (10 ** decimals0), Decimal(balance1) / (10 ** decimals1)
+
+    def _gas_with_buffer(self, gas_estimate: int) -> int:
+        gas_with_buffer = int(gas_estimate * 1.05)
+        logger.debug("Gas estimate dla %s: %s (+5%% = %s)", self.__class__.__name__, gas_estimate, gas_with_buffer)
+        return gas_with_buffer
+
+    def _fee_fraction(self, fee: int) -> Decimal:
+        return Decimal(fee) / Decimal(1_000_000)
+
+    def _known_token0(self, token_addresses) -> Optional[str]:
+        """token0 z konfiguracji puli (None - trzeba odczytać token0() z kontraktu)."""
+        if token_addresses and len(token_addresses) == 2:
+            return token_addresses[0]
+        return None
+
+    def _mid_price(self, token_from: str, token0: str, sqrt_x96: int, token_decimals: Tuple[int, int]) -> Decimal:
+        dec0, dec1 = token_decimals
+        is0_in = token_manager.get_address_by_symbol(token_from).lower() == token0.lower()
+        return mid_price_from_univ3_sqrt(sqrt_x96, dec0, dec1, is0_in)
+
+    def _quote_request(self, token_from: str, token_to: str, amount_in, token_decimals: Tuple[int, int],
+                       token0: str, fee_tier: Optional[int]) -> Tuple[tuple, int]:
+        """Argumenty Quotera i decimals tokena wyjściowego."""
+        token_in_addr = token_manager.get_address_by_symbol(token_from)
+        token_out_addr = token_manager.get_address_by_symbol(token_to)
+
+        dec0, dec1 = token_decimals
+        is0_in = token_in_addr.lower() == token0.lower()
+        dec_in = dec0 if is0_in else dec1
+        dec_out = dec1 if is0_in else dec0
+
+        amount_in_wei = int(Decimal(amount_in) * (Decimal(10) ** dec_in))
+        logger.debug("%s Quoter: token_in=%s (%s dec), amount_in=%s", self.__class__.__name__, token_from, dec_in, amount_in_wei)
+        return self.quote_args(token_in_addr, token_out_addr, amount_in_wei, int(fee_tier or 0)), dec_out
+
+    def _amount_out(self, quote_result: tuple, dec_out: int) -> Decimal:
+        """amountOut z odpowiedzi Quotera (pierwsze pole we wszystkich wersjach)."""
+        logger.debug("%s Quoter: amount_out_wei=%s", self.__class__.__name__, quote_result[0])
+        return Decimal(quote_result[0]) / (Decimal(10) ** dec_out)
+
+    def _swap_args(self, token_in_address: str, token_out_address: str, amount_in_wei: int,
+                   fee_tier: int, user_address: str) -> tuple:
+        """Struct ExactInputSingleParams routera (kolejność pól jak w swap_function)."""
+        return ((
+            token_in_address,
+            token_out_address,
+            fee_tier,
+            user_address,
+            int(time.time()) + 1200,
+            amount_in_wei,
+            0,
+            0
+        ),)
+
+    def _swap_tx(self, token_in_address: str, token_out_address: str, amount_in_wei: int,
+                 fee_tier: int, router_address: str, user_address: str) -> Dict[str, Any]:
+        """Transakcja exactInputSingle do eth_estimateGas (kodowanie bez RPC i bez obiektu kontraktu)."""
+        tx_data = self.swap_function.encode(
+            *self._swap_args(token_in_address, token_out_address, amount_in_wei, fee_tier, user_address)
+        )
+
+        tx_value = amount_in_wei if token_in_address.lower() == WETH_ADDRESS else 0
+
+        return {
+            'from': user_address,
+            'to': router_address,
+            'data': tx_data,
+            'value': tx_value
+        }
 
-    def get_gas_cost_usd(
+class AsyncBaseDexService(BaseDexService):
+    """Natywna ścieżka AsyncWeb3 - I/O RPC na pętli zdarzeń zamiast w asyncio.to_thread."""
+
+    @dex_call("płynności")
+    async def get_liquidity(self, pool_address: str, token_addresses, token_decimals: Tuple[int, int], prices: dict) -> Optional[Tuple[Decimal, Decimal]]:
+        """Płynność puli (balanceOf dla token0 i token1) - oba odczyty równolegle."""
+        token0_address, token1_address = token_addresses
+        (balance0,), (balance1,) = await asyncio.gather(
+            raw_call_service.read_async(token0_address, BALANCE_OF, pool_address),
+            raw_call_service.read_async(token1_address, BALANCE_OF, pool_address)
+        )
+        return self._normalize_balances(balance0, balance1, token_decimals)
+
+    @dex_call("fee")
+    async def get_dex_fee_percent(self, pool_address: str, token_from_address: Optional[str] = None) -> Optional[Decimal]:
+        """Fee puli (np. 0.003 dla 0.3%)."""
+        return self._fee_fraction((await raw_call_service.read_async(pool_address, FEE))[0])
+
+    @dex_call("mid_price")
+    async def get_mid_price(self, pool_address, token_from, token_to, token_decimals, token_addresses=None) -> Optional[Decimal]:
+        """Mid-price z sqrtPriceX96 (slot0 / globalState)."""
+        token0 = self._known_token0(token_addresses) or (await raw_call_service.read_async(pool_address, TOKEN0))[0]
+        sqrt_x96 = (await raw_call_service.read_async(pool_address, self.price_function))[0]
+        return self._mid_price(token_from, token0, sqrt_x96, token_decimals)
+
+    @dex_call("quote_exact_in")
+    async def quote_exact_in(self, pool_address, token_from, token_to, amount_in, token_decimals, token_addresses=None, pool_fee=None, pair=None) -> Optional[Decimal]:
+        """Quote z Quotera DEXa (amount_out już uwzględnia fee)."""
+        fee_tier = pool_fee
+        if not fee_tier and self.quote_needs_fee_tier:
+            fee_tier = (await raw_call_service.read_async(pool_address, FEE))[0]
+        token0 = self._known_token0(token_addresses) or (await raw_call_service.read_async(pool_address, TOKEN0))[0]
+        quote_args, dec_out = self._quote_request(token_from, token_to, amount_in, token_decimals, token0, fee_tier)
+        return self._amount_out(await raw_call_service.read_async(self.quoter_address, self.quote_function, *quote_args), dec_out)
+
+    @dex_call("estymacji gas", default_attr="default_swap_gas")
+    async def estimate_gas_for_swap(
         self,
         token_in_address: str,
         token_out_address: str,
         amount_in_wei: int,
         fee_tier: int,
         router_address: str,
-        eth_price: Decimal
-    ) -> Optional[Decimal]:
-        """Oblicza koszt gazu w USD używając eth_estimateGas."""
-        try:
-            gas_estimate = self.estimate_gas_for_swap(
-                token_in_address=token_in_address,
-                token_out_address=token_out_address,
-                amount_in_wei=amount_in_wei,
-                fee_tier=fee_tier,
-                router_address=router_address
-            )
-            
-            gas_price_wei = get_cached_gas_price()
-            gas_price_eth = Web3.from_wei(gas_price_wei, 'ether')
-            
-            gas_cost_eth = Decimal(gas_price_eth) * Decimal(gas_estimate)
-            gas_cost_usd = gas_cost_eth * eth_price
-            
-            print(f"Gas cost: {gas_estimate} gas × {gas_price_wei} wei = ${gas_cost_usd:.5f}")
-            return gas_cost_usd
-            
-        except Exception as e:
-            print(f"Błąd obliczania gas cost dla {self.__class__.__name__}: {e}")
-            return None
-
-    def get_transaction_cost(
-        self,
-        pool_address: str,
-        token_from_address: str,
-        token_to_address: str,
-        amount_in_wei: int,
-        fee_tier: int,
-        router_address: str,
-        liquidity: float,
-        eth_price: Decimal
-    ) -> Tuple[Optional[Decimal], Optional[Decimal]]:
-        """Zwraca (dex_fee, gas_cost_usd)."""
-        try:
-            dex_fee = self.get_dex_fee_percent(pool_address)
-            
-            if dex_fee is None:
-                return None, None
-            
-            gas_cost = self.get_gas_cost_usd(
-                token_in_address=token_from_address,
-                token_out_address=token_to_address,
-                amount_in_wei=amount_in_wei,
-                fee_tier=fee_tier,
-                router_address=router_address,
-                eth_price=eth_price
-            )
-
-            if gas_cost is None:
-                return None, None
-
-            return dex_fee, gas_cost
-
-        except Exception as e:
-            print(f"Błąd przy obliczaniu kosztów transakcji {self.__class__.__name__}: {e}")
-            return None, None
+        user_address: str = "0x0000000000000000000000000000000000000001"
+    ) -> int:
+        """Estymuje gas używając eth_estimateGas (AsyncWeb3)."""
+        tx = self._swap_tx(token_in_address, token_out_address, amount_in_wei, fee_tier, router_address, user_address)
+        return self._gas_with_buffer(await raw_call_service.estimate_gas_async(tx))
@@ -1,226 +1,184 @@
+import asyncio
+import time
 from decimal import Decimal
-from typing import List, Dict, Any, Optional, Tuple
-from config import camelot_abi, w3
-from token_manager import TokenManager
+from typing import List, Dict, Optional, Tuple
+from eth_abi import decode
+from config import TICK_WORD_RADIUS
 from web3 import Web3
-from pools_config import TOKENS
-from .base_dex_service import BaseDexService
-from .calculation_service import mid_price_from_univ3_sqrt
+from log_manager import get_logger
+from .base_dex_service import BaseDexService, AsyncBaseDexService, dex_call
+from .multicall_service import encode_call
+from .raw_call_service import (
+    raw_call_service, GLOBAL_STATE, LIQUIDITY, TOKEN0, TOKEN1, CAMELOT_QUOTE_EXACT_INPUT_SINGLE, ALGEBRA_EXACT_INPUT_SINGLE
+)
+from .pool_state import PoolState, TickData
 
-token_manager = TokenManager(TOKENS)
+logger = get_logger(__name__)
 
 QUOTER_ADDRESS = Web3.to_checksum_address("0x0Fc73040b26E9bC8514fA028D998E73A254Fa76E")
-quoter_abi = [
-    {
-        "inputs": [
-            {"internalType": "address", "name": "tokenIn", "type": "address"},
-            {"internalType": "address", "name": "tokenOut", "type": "address"},
-            {"internalType": "uint256", "name": "amountIn", "type": "uint256"},
-            {"internalType": "uint160", "name": "limitSqrtPrice", "type": "uint160"}
-        ],
-        "name": "quoteExactInputSingle",
-        "outputs": [
-            {"internalType": "uint256", "name": "amountOut", "type": "uint256"},
-            {"internalType": "uint16", "name": "fee", "type": "uint16"}
-        ],
-        "stateMutability": "nonpayable",
-        "type": "function"
-    }
-]
+# token0/token1 puli są niezmienne - czytane raz na pulę
+_pool_tokens_cache: Dict[str, Tuple[str, str]] = {}
 
 class CamelotService(BaseDexService):
     """Camelot V3 - dynamiczne fee z globalState."""
-    abi = camelot_abi
+    default_swap_gas = 155_000
+    quote_function = CAMELOT_QUOTE_EXACT_INPUT_SINGLE
+    swap_function = ALGEBRA_EXACT_INPUT_SINGLE
+    quoter_address = QUOTER_ADDRESS
+    quote_needs_fee_tier = False
+    price_function = GLOBAL_STATE
+
+    def quote_args(self, token_in_address: str, token_out_address: str, amount_in_wei: int, fee_tier: Optional[int]) -> tuple:
+        """quoteExactInputSingle Quotera Algebra (fee dynamiczne - bez fee tier); zwraca (amountOut, feeUsed)."""
+        return (token_in_address, token_out_address, amount_in_wei, 0)
+
+    def pool_state_calls(self, pool_address: str, token_addresses) -> List[Tuple[str, bytes]]:
+        """Wywołania Multicall3: globalState (cena + feeZto/feeOtz), balanceOf token0/token1."""
+        return [
+            (pool_address, GLOBAL_STATE.encode()),
+            *self._balance_calls(pool_address, token_addresses)
+        ]
 
-    def get_dex_fee_percent(self, pool_address: str, token_from_address: str) -> Optional[Decimal]:
-        """Fee z globalState (feeZto lub feeOtz w zależności od kierunku)."""
+    def decode_pool_state(self, results: List[Tuple[bool, bytes]], token_addresses) -> Optional[PoolState]:
+        """Kierunek fee z kolejności adresów (token0 < token1), bez odczytu token0()/token1()."""
         try:
-            pool_contract = w3.eth.contract(address=pool_address, abi=self.abi)
+            (ok_state, state_data), *balance_results = results
+            balances = self._decode_balances(balance_results)
+            if not ok_state or balances is None:
+                logger.warning("Multicall3: nieudany odczyt stanu puli Camelot")
+                return None
+
+            price, tick, fee_zto, fee_otz = GLOBAL_STATE.decode(state_data)
+            return PoolState(
+                sqrt_price_x96=price,
+                tick=tick,
+                balance0=balances[0],
+                balance1=balances[1],
+                token0=min(addr.lower() for addr in token_addresses),
+                fee_zto=fee_zto,
+                fee_otz=fee_otz
+            )
+        except Exception as e:
+            logger.warning("Błąd dekodowania stanu puli Camelot: %s", e)
+            return None
 
-            token0 = pool_contract.functions.token0().call()
-            token1 = pool_contract.functions.token1().call()
+    def tick_data_calls(self, pool_address: str, state: PoolState, tick_spacing: int) -> List[Tuple[str, bytes]]:
+        """Algebra: liquidity() + wiersze tickTable wokół bieżącego ticka (brak TickLens)."""
+        word = (state.tick // tick_spacing) >> 8
+        return [
+            (pool_address, LIQUIDITY.encode()),
+            *[
+                (pool_address, encode_call("tickTable(int16)", ['int16'], [word_pos]))
+                for word_pos in range(word - TICK_WORD_RADIUS, word + TICK_WORD_RADIUS + 1)
+            ]
+        ]
+
+    def tick_followup_calls(self, pool_address: str, results: List[Tuple[bool, bytes]], state: PoolState, tick_spacing: int) -> List[Tuple[str, bytes]]:
+        """ticks(tick) dla każdego zainicjalizowanego bitu z tickTable."""
+        bitmap = self._decode_tick_table(results, state, tick_spacing)
+        if bitmap is None:
+            return []
+        return [
+            (pool_address, encode_call("ticks(int24)", ['int24'], [tick]))
+            for tick in self._initialized_ticks(bitmap, tick_spacing)
+        ]
 
-            global_state = pool_contract.functions.globalState().call()
-            _, _, feeZto, feeOtz, *_ = global_state
+    def decode_tick_data(self, results: List[Tuple[bool, bytes]], state: PoolState, tick_spacing: int) -> Optional[TickData]:
+        """Bitmapa z tickTable i liquidityDelta z ticks() (odpowiednik liquidityNet w Uniswap)."""
+        try:
+            word_count = 2 * TICK_WORD_RADIUS + 1
+            bitmap = self._decode_tick_table(results[:word_count + 1], state, tick_spacing)
+            if bitmap is None:
+                return None
 
-            if token_from_address.lower() == token0.lower():
-                fee_basis_points = feeZto
-            elif token_from_address.lower() == token1.lower():
-                fee_basis_points = feeOtz
-            else:
-                print(f"Token {token_from_address} nie pasuje do token0 ani token1.")
+            initialized_ticks = self._initialized_ticks(bitmap, tick_spacing)
+            tick_results = results[word_count + 1:]
+            if len(tick_results) != len(initialized_ticks) or not all(success for success, _ in tick_results):
                 return None
 
-            return Decimal(fee_basis_points) / Decimal(1_000_000)
+            liquidity_net = {}
+            for tick, (_, data) in zip(initialized_ticks, tick_results):
+                _, liquidity_delta, *_ = decode(
+                    ['uint128', 'int128', 'uint256', 'uint256', 'int56', 'uint160', 'uint32', 'bool'], data
+                )
+                liquidity_net[tick] = liquidity_delta
+
+            return TickData(
+                tick_spacing=tick_spacing,
+                liquidity=LIQUIDITY.decode(results[0][1])[0],
+                bitmap=bitmap,
+                liquidity_net=liquidity_net
+            )
         except Exception as e:
-            print(f"Błąd przy pobieraniu fee z Camelot {pool_address}: {e}")
+            logger.warning("Błąd dekodowania ticków Camelot: %s", e)
             return None
 
-    def get_mid_price(self, pool_address, token_from, token_to, token_decimals, token_addresses=None) -> Optional[Decimal]:
-        """Mid-price z globalState[0] (sqrtPriceX96)."""
-        try:
-            pool = w3.eth.contract(address=Web3.to_checksum_address(pool_address), abi=self.abi)
-            
-            if token_addresses and len(token_addresses) == 2:
-                token0 = token_addresses[0].lower()
-            else:
-                token0 = pool.functions.token0().call().lower()
-            
-            dec0, dec1 = token_decimals
-            is0_in = token_manager.get_address_by_symbol(token_from).lower() == token0
-            
-            global_state = pool.functions.globalState().call()
-            sqrt_x96 = global_state[0]
-            
-            return mid_price_from_univ3_sqrt(sqrt_x96, dec0, dec1, is0_in)
-        except Exception as e:
-            print(f"Błąd mid_price Camelot: {e}")
+    def _decode_tick_table(self, results: List[Tuple[bool, bytes]], state: PoolState, tick_spacing: int) -> Optional[Dict[int, int]]:
+        (ok_liquidity, _), *word_results = results
+        if not ok_liquidity or not all(success for success, _ in word_results):
             return None
+        first_word = ((state.tick // tick_spacing) >> 8) - TICK_WORD_RADIUS
+        return {
+            first_word + offset: decode(['uint256'], data)[0]
+            for offset, (_, data) in enumerate(word_results)
+        }
 
-    def quote_exact_in(self, pool_address, token_from, token_to, amount_in, token_decimals, token_addresses=None, pool_fee=None, pair=None) -> Optional[Decimal]:
-        """Quote z Camelot Quoter (zwraca amountOut + feeUsed)."""
-        try:
-            pool   = w3.eth.contract(address=Web3.to_checksum_address(pool_address), abi=self.abi)
-            quoter = w3.eth.contract(address=QUOTER_ADDRESS, abi=quoter_abi)
-
-            token_in_addr  = Web3.to_checksum_address(token_manager.get_address_by_symbol(token_from))
-            token_out_addr = Web3.to_checksum_address(token_manager.get_address_by_symbol(token_to))
-
-            if token_addresses and len(token_addresses) == 2:
-                token0 = token_addresses[0].lower()
-            else:
-                token0 = pool.functions.token0().call().lower()
-            
-            dec0, dec1 = token_decimals
-            is0_in = token_in_addr.lower() == token0
-            dec_in  = dec0 if is0_in else dec1
-            dec_out = dec1 if is0_in else dec0
-
-            amount_in_wei = int(amount_in * Decimal(10 ** dec_in))
-            
-            print(f"Camelot Quoter: token_in={token_from} ({dec_in} dec), amount_in={amount_in_wei}")
-            
-            # Camelot Quoter zwraca (amountOut, feeUsed)
-            amount_out_wei, _fee_used = quoter.functions.quoteExactInputSingle(
-                token_in_addr, token_out_addr, amount_in_wei, 0
-            ).call()
-            
-            print(f"Camelot response: amount_out_wei={amount_out_wei}")
-            
-            return Decimal(amount_out_wei) / Decimal(10 ** dec_out)
-        except Exception as e:
-            print(f"Błąd quote_exact_in Camelot: {e}")
+    def _initialized_ticks(self, bitmap: Dict[int, int], tick_spacing: int) -> List[int]:
+        return [
+            ((word_pos << 8) + bit_pos) * tick_spacing
+            for word_pos, word in sorted(bitmap.items())
+            for bit_pos in range(256)
+            if word >> bit_pos & 1
+        ]
+
+    def _fee_from_global_state(self, global_state, pool_tokens: Tuple[str, str], token_from_address: str) -> Optional[Decimal]:
+        """feeZto gdy token_from to token0, feeOtz gdy token1 (None - token spoza puli)."""
+        token0, token1 = (token.lower() for token in pool_tokens)
+        if token_from_address.lower() not in (token0, token1):
+            logger.warning("Token %s nie pasuje do token0 ani token1.", token_from_address)
             return None
+        _, _, feeZto, feeOtz, *_ = global_state
+        return self._fee_fraction(feeZto if token_from_address.lower() == token0 else feeOtz)
 
-    def get_transaction_cost(
-        self,
-        pool_address: str,
-        token_from_address: str,
-        token_to_address: str,
-        amount_in_wei: int,
-        fee_tier: int,
-        router_address: str,
-        liquidity: float,
-        eth_price: Decimal
-    ) -> Tuple[Optional[Decimal], Optional[Decimal]]:
-        """Zwraca (dex_fee, gas_cost_usd) używając eth_estimateGas."""
-        try:
-            # Camelot ma dynamiczne fee zależne od kierunku
-            dex_fee = self.get_dex_fee_percent(pool_address, token_from_address)
-            
-            if dex_fee is None:
-                return None, None
-            
-            gas_cost = self.get_gas_cost_usd(
-                token_in_address=token_from_address,
-                token_out_address=token_to_address,
-                amount_in_wei=amount_in_wei,
-                fee_tier=fee_tier,
-                router_address=router_address,
-                eth_price=eth_price
+    @dex_call("fee")
+    def get_dex_fee_percent(self, pool_address: str, token_from_address: str) -> Optional[Decimal]:
+        """Fee z globalState (feeZto lub feeOtz w zależności od kierunku)."""
+        pool_tokens = _pool_tokens_cache.get(pool_address.lower())
+        if pool_tokens is None:
+            pool_tokens = (raw_call_service.read(pool_address, TOKEN0)[0], raw_call_service.read(pool_address, TOKEN1)[0])
+            _pool_tokens_cache[pool_address.lower()] = pool_tokens
+
+        return self._fee_from_global_state(raw_call_service.read(pool_address, GLOBAL_STATE), pool_tokens, token_from_address)
+
+    def _swap_args(self, token_in_address: str, token_out_address: str, amount_in_wei: int,
+                   fee_tier: int, user_address: str) -> tuple:
+        """Camelot nie używa fee tier w parametrach swap (Algebra: limitSqrtPrice na końcu)."""
+        return ((
+            token_in_address,
+            token_out_address,
+            user_address,
+            int(time.time()) + 1200,
+            amount_in_wei,
+            0,
+            0
+        ),)
+
+
+class AsyncCamelotService(AsyncBaseDexService, CamelotService):
+    """Camelot V3 przez AsyncWeb3 (bez asyncio.to_thread)."""
+
+    @dex_call("fee")
+    async def get_dex_fee_percent(self, pool_address: str, token_from_address: Optional[str] = None) -> Optional[Decimal]:
+        """Fee z globalState (feeZto lub feeOtz w zależności od kierunku)."""
+        pool_tokens = _pool_tokens_cache.get(pool_address.lower())
+        if pool_tokens is None:
+            (token0,), (token1,), global_state = await asyncio.gather(
+                raw_call_service.read_async(pool_address, TOKEN0),
+                raw_call_service.read_async(pool_address, TOKEN1),
+                raw_call_service.read_async(pool_address, GLOBAL_STATE)
             )
+            pool_tokens = _pool_tokens_cache[pool_address.lower()] = (token0, token1)
+        else:
+            global_state = await raw_call_service.read_async(pool_address, GLOBAL_STATE)
 
-            if gas_cost is None:
-                return None, None
-
-            return dex_fee, gas_cost
-
-        except Exception as e:
-            print(f"Błąd przy obliczaniu kosztów transakcji Camelot: {e}")
-            return None, None
-    
-    def estimate_gas_for_swap(
-        self,
-        token_in_address: str,
-        token_out_address: str,
-        amount_in_wei: int,
-        fee_tier: int,
-        router_address: str,
-        user_address: str = "0x0000000000000000000000000000000000000001"
-    ) -> int:
-        """Estymuje gas dla Camelot."""
-        try:
-            import time
-            deadline = int(time.time()) + 1200
-            
-            # Camelot nie używa fee tier w parametrach swap
-            swap_params = {
-                'tokenIn': Web3.to_checksum_address(token_in_address),
-                'tokenOut': Web3.to_checksum_address(token_out_address),
-                'recipient': user_address,
-                'deadline': deadline,
-                'amountIn': amount_in_wei,
-                'amountOutMinimum': 0,
-                'limitSqrtPrice': 0
-            }
-            
-            router_abi = self._get_router_abi()
-            router_contract = w3.eth.contract(address=Web3.to_checksum_address(router_address), abi=router_abi)
-            
-            tx_data = router_contract.encode_abi('exactInputSingle', args=[swap_params])
-            
-            weth_address = TOKENS['ETH']['address'].lower()
-            tx_value = amount_in_wei if token_in_address.lower() == weth_address else 0
-            
-            gas_estimate = w3.eth.estimate_gas({
-                'from': user_address,
-                'to': Web3.to_checksum_address(router_address),
-                'data': tx_data,
-                'value': tx_value
-            })
-            
-            gas_with_buffer = int(gas_estimate * 1.05)
-            
-            print(f"Gas estimate dla Camelot: {gas_estimate} (+5% = {gas_with_buffer})")
-            return gas_with_buffer
-            
-        except Exception as e:
-            print(f"Błąd estymacji gas dla Camelot: {e}")
-            return 155_000
-    
-    def _get_router_abi(self) -> list:
-        """Camelot używa Algebra router."""
-        return [
-            {
-                "inputs": [
-                    {
-                        "components": [
-                            {"internalType": "address", "name": "tokenIn", "type": "address"},
-                            {"internalType": "address", "name": "tokenOut", "type": "address"},
-                            {"internalType": "address", "name": "recipient", "type": "address"},
-                            {"internalType": "uint256", "name": "deadline", "type": "uint256"},
-                            {"internalType": "uint256", "name": "amountIn", "type": "uint256"},
-                            {"internalType": "uint256", "name": "amountOutMinimum", "type": "uint256"},
-                            {"internalType": "uint160", "name": "limitSqrtPrice", "type": "uint160"}
-                        ],
-                        "internalType": "struct IAlgebraSwapRouter.ExactInputSingleParams",
-                        "name": "params",
-                        "type": "tuple"
-                    }
-                ],
-                "name": "exactInputSingle",
-                "outputs": [{"internalType": "uint256", "name": "amountOut", "type": "uint256"}],
-                "stateMutability": "payable",
-                "type": "function"
-            }
-        ]
\ No newline at end of file
+        return self._fee_from_global_state(global_state, pool_tokens, token_from_address)
@@ -1,9 +1,12 @@
-import requests
+import asyncio
 import time
-import random
 from typing import Optional, Dict, List
 from decimal import Decimal
 from interfaces import ISingleTokenPriceService
+from log_manager import get_logger
+from .http_client import http_client
+
+logger = get_logger(__name__)
 
 class CoinGeckoService(ISingleTokenPriceService):
     """Fallback serwis cenowy - CoinGecko (gdy DefiLlama nie zwróci cen). Circuit Breaker wyłącza API po 3 błędach na 60s."""
@@ -24,26 +27,24 @@ class CoinGeckoService(ISingleTokenPriceService):
     CIRCUIT_TIMEOUT = 60
     FAILURE_WINDOW = 30
 
-    def get_price(self, token_address: str) -> Optional[Decimal]:
+    # Szybki fallback: 2 próby, backoff od 0.1s z jitterem
+    TIMEOUT = 5
+    MAX_ATTEMPTS = 2
+    RETRY_DELAY = 0.1
+
+    async def get_price(self, token_address: str) -> Optional[Decimal]:
         """Pobiera cenę tokena w USD."""
         token_address = token_address.lower()
         url = f"{self.BASE_URL}?contract_addresses={token_address}&vs_currencies=usd"
-        for attempt in range(2):
-            try:
-                response = requests.get(url, timeout=5)
-                response.raise_for_status()
-                data = response.json()
-                return Decimal(data.get(token_address, {}).get("usd", 0))
+        data = await self._get_json(url, "CoinGecko")
+        if data is None:
+            return None
+        return Decimal(data.get(token_address, {}).get("usd", 0))
 
-            except requests.exceptions.RequestException as e:
-                if attempt < 1:
-                    print(f"Błąd CoinGecko: {e}, ponawiam próbę...")
-                    time.sleep(0.1)
-                else:
-                    print(f"Błąd CoinGecko: {e}")
-                    return None
-
-        return None
+    async def _get_json(self, url: str, label: str):
+        return await http_client.get_json(
+            url, timeout=self.TIMEOUT, attempts=self.MAX_ATTEMPTS, base_delay=self.RETRY_DELAY, label=label
+        )
 
     def _check_circuit_breaker(self) -> bool:
         """True = circuit otwarty (pomiń API), False = circuit zamknięty (próbuj)."""
@@ -51,13 +52,13 @@ class CoinGeckoService(ISingleTokenPriceService):
         
         if self._circuit_breaker['is_open']:
             if current_time >= self._circuit_breaker['open_until']:
-                print("Circuit Breaker: Reset - próbuję CoinGecko ponownie")
+                logger.info("Circuit Breaker: Reset - próbuję CoinGecko ponownie")
                 self._circuit_breaker['is_open'] = False
                 self._circuit_breaker['failure_count'] = 0
                 return False
             else:
                 remaining = int(self._circuit_breaker['open_until'] - current_time)
-                print(f"Circuit Breaker OTWARTY - pomijam CoinGecko (reset za {remaining}s)")
+                logger.warning("Circuit Breaker OTWARTY - pomijam CoinGecko (reset za %ss)", remaining)
                 return True
         
         if self._circuit_breaker['last_failure_time'] > 0:
@@ -75,15 +76,15 @@ class CoinGeckoService(ISingleTokenPriceService):
         if self._circuit_breaker['failure_count'] >= self.FAILURE_THRESHOLD:
             self._circuit_breaker['is_open'] = True
             self._circuit_breaker['open_until'] = current_time + self.CIRCUIT_TIMEOUT
-            print(f"Circuit Breaker OTWARTY - {self._circuit_breaker['failure_count']} błędów")
+            logger.warning("Circuit Breaker OTWARTY - %s błędów", self._circuit_breaker['failure_count'])
     
     def _record_success(self):
         """Resetuje licznik błędów po sukcesie."""
         if self._circuit_breaker['failure_count'] > 0:
-            print(f"Circuit Breaker: Reset licznika ({self._circuit_breaker['failure_count']} -> 0)")
+            logger.debug("Circuit Breaker: Reset licznika (%s -> 0)", self._circuit_breaker['failure_count'])
             self._circuit_breaker['failure_count'] = 0
     
-    def get_prices_batch(self, token_addresses: List[str]) -> Dict[str, Optional[Decimal]]:
+    async def get_prices_batch(self, token_addresses: List[str]) -> Dict[str, Optional[Decimal]]:
         """Batch request. WETH przez ID 'ethereum', inne przez adresy. Circuit Breaker po 3 błędach."""
         if not token_addresses:
             return {}
@@ -103,18 +104,20 @@ class CoinGeckoService(ISingleTokenPriceService):
         result = {}
         has_any_success = False
         
-        if weth_addrs:
-            weth_price = self._get_weth_price()
-            for addr in weth_addrs:
-                result[addr] = weth_price
-            if weth_price is not None:
-                has_any_success = True
-        
-        if other_addrs:
-            other_prices = self._get_prices_by_address(other_addrs)
-            result.update(other_prices)
-            if any(price is not None for price in other_prices.values()):
-                has_any_success = True
+        # WETH i pozostałe tokeny równolegle
+        weth_price, other_prices = await asyncio.gather(
+            self._get_weth_price() if weth_addrs else _none(),
+            self._get_prices_by_address(other_addrs)
+        )
+
+        for addr in weth_addrs:
+            result[addr] = weth_price
+        if weth_addrs and weth_price is not None:
+            has_any_success = True
+
+        result.update(other_prices)
+        if any(price is not None for price in other_prices.values()):
+            has_any_success = True
         
         if has_any_success:
             self._record_success()
@@ -123,81 +126,36 @@ class CoinGeckoService(ISingleTokenPriceService):
         
         return result
     
-    def _get_weth_price(self) -> Optional[Decimal]:
+    async def _get_weth_price(self) -> Optional[Decimal]:
         """WETH przez ID 'ethereum' (adres nie działa w CoinGecko)."""
-        url = f"{self.PRICE_URL}?ids=ethereum&vs_currencies=usd"
-        
-        delay = 0.1
-        max_attempts = 2
-        for attempt in range(max_attempts):
-            try:
-                response = requests.get(url, timeout=5)
-                response.raise_for_status()
-                data = response.json()
-                price = data.get("ethereum", {}).get("usd")
-                if price:
-                    print(f"CoinGecko WETH (ethereum): ${price}")
-                    return Decimal(str(price))
-                return None
-                
-            except requests.exceptions.HTTPError as e:
-                if hasattr(e.response, 'status_code') and e.response.status_code == 429:
-                    if attempt < max_attempts - 1:
-                        jitter = random.uniform(0, 0.1)
-                        sleep_time = delay + jitter
-                        print(f"CoinGecko 429 (WETH) - czekam {sleep_time:.2f}s")
-                        time.sleep(sleep_time)
-                        delay *= 2
-                        continue
-                print(f"CoinGecko 429 (WETH) - przechodzę do fallback")
-                return None
-                
-            except requests.exceptions.RequestException as e:
-                print(f"Błąd CoinGecko WETH: {e}")
-                return None
-        
+        data = await self._get_json(f"{self.PRICE_URL}?ids=ethereum&vs_currencies=usd", "CoinGecko WETH")
+        if data is None:
+            logger.warning("CoinGecko (WETH) - przechodzę do fallback")
+            return None
+        price = data.get("ethereum", {}).get("usd")
+        if price:
+            logger.debug("CoinGecko WETH (ethereum): $%s", price)
+            return Decimal(str(price))
         return None
     
-    def _get_prices_by_address(self, token_addresses: List[str]) -> Dict[str, Optional[Decimal]]:
+    async def _get_prices_by_address(self, token_addresses: List[str]) -> Dict[str, Optional[Decimal]]:
         """Ceny przez adresy kontraktów z exponential backoff (szybki fallback przy 429)."""
         if not token_addresses:
             return {}
         
         addresses = ",".join(addr.lower() for addr in token_addresses)
-        url = f"{self.BASE_URL}?contract_addresses={addresses}&vs_currencies=usd"
-        
-        delay = 0.1
-        max_attempts = 2
-        for attempt in range(max_attempts):
-            try:
-                response = requests.get(url, timeout=5)
-                response.raise_for_status()
-                data = response.json()
-                print(f"CoinGecko batch ({len(token_addresses)} tokenów)")
-                
-                result = {}
-                for addr in token_addresses:
-                    price_data = data.get(addr.lower(), {}).get("usd")
-                    result[addr] = Decimal(str(price_data)) if price_data else None
-                
-                return result
-                
-            except requests.exceptions.HTTPError as e:
-                if hasattr(e.response, 'status_code') and e.response.status_code == 429:
-                    if attempt < max_attempts - 1:
-                        jitter = random.uniform(0, 0.1)
-                        sleep_time = delay + jitter
-                        print(f"CoinGecko 429 - czekam {sleep_time:.2f}s przed próbą {attempt + 2}")
-                        time.sleep(sleep_time)
-                        delay *= 2
-                        continue
-                    print(f"CoinGecko 429 - przechodzę do fallback po {max_attempts} próbach")
-                    return {addr: None for addr in token_addresses}
-                print(f"Błąd CoinGecko batch: {e}")
-                return {addr: None for addr in token_addresses}
-                
-            except requests.exceptions.RequestException as e:
-                print(f"Błąd CoinGecko batch: {e}")
-                return {addr: None for addr in token_addresses}
-        
-        return {addr: None for addr in token_addresses}
\ No newline at end of file
+        data = await self._get_json(f"{self.BASE_URL}?contract_addresses={addresses}&vs_currencies=usd", "CoinGecko batch")
+        if data is None:
+            logger.warning("CoinGecko batch - przechodzę do fallback po %s próbach", self.MAX_ATTEMPTS)
+            return {addr: None for addr in token_addresses}
+
+        logger.debug("CoinGecko batch (%s tokenów)", len(token_addresses))
+        result = {}
+        for addr in token_addresses:
+            price_data = data.get(addr.lower(), {}).get("usd")
+            result[addr] = Decimal(str(price_data)) if price_data else None
+        return result
+
+
+async def _none():
+    return None
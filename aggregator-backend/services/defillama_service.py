@@ -1,13 +1,14 @@
-import requests
-import time
 from typing import Optional, Dict, List
 from decimal import Decimal
+from interfaces import ISingleTokenPriceService
+from .http_client import http_client
 
-class DefiLlamaService:
+class DefiLlamaService(ISingleTokenPriceService):
     """Główny serwis cenowy - ceny z DefiLlama."""
 
     BASE_URL = "https://coins.llama.fi/prices/current"
     CHAIN = "arbitrum"
+    TIMEOUT = 6
 
     def __init__(self, chain: str = "arbitrum"):
         self.CHAIN = chain
@@ -15,46 +16,28 @@ class DefiLlamaService:
     def _format_key(self, token_address: str) -> str:
         return f"{self.CHAIN}:{token_address.lower()}"
 
-    def get_price(self, token_address: str) -> Optional[Decimal]:
+    async def get_price(self, token_address: str) -> Optional[Decimal]:
         """Cena pojedynczego tokena."""
         key = self._format_key(token_address)
-        url = f"{self.BASE_URL}/{key}"
-
-        for _ in range(3):
-            try:
-                resp = requests.get(url, timeout=6)
-                resp.raise_for_status()
-                data = resp.json().get("coins", {})
-                price = data.get(key, {}).get("price")
-                if price is None:
-                    return None
-                return Decimal(str(price))
-            except requests.exceptions.RequestException as e:
-                print(f"DefiLlama error: {e}, ponawiam próbę...")
-                time.sleep(1)
-        return None
+        data = await http_client.get_json(f"{self.BASE_URL}/{key}", timeout=self.TIMEOUT, label="DefiLlama")
+        if data is None:
+            return None
+        price = data.get("coins", {}).get(key, {}).get("price")
+        return Decimal(str(price)) if price is not None else None
         
-    def get_prices_batch(self, token_addresses: List[str]) -> Dict[str, Optional[Decimal]]:
+    async def get_prices_batch(self, token_addresses: List[str]) -> Dict[str, Optional[Decimal]]:
         """Batch request dla wielu tokenów."""
         if not token_addresses:
             return {}
 
         keys = ",".join(self._format_key(addr) for addr in token_addresses)
-        url = f"{self.BASE_URL}/{keys}"
-
-        for _ in range(3):
-            try:
-                resp = requests.get(url, timeout=6)
-                resp.raise_for_status()
-                coins = resp.json().get("coins", {})
-                out: Dict[str, Optional[Decimal]] = {}
-                for addr in token_addresses:
-                    k = self._format_key(addr)
-                    price = coins.get(k, {}).get("price")
-                    out[addr] = Decimal(str(price)) if price is not None else None
-                return out
-            except requests.exceptions.RequestException as e:
-                print(f"DefiLlama batch error: {e}, ponawiam próbę...")
-                time.sleep(1)
-
-        return {addr: None for addr in token_addresses}
\ No newline at end of file
+        data = await http_client.get_json(f"{self.BASE_URL}/{keys}", timeout=self.TIMEOUT, label="DefiLlama batch")
+        if data is None:
+            return {addr: None for addr in token_addresses}
+
+        coins = data.get("coins", {})
+        out: Dict[str, Optional[Decimal]] = {}
+        for addr in token_addresses:
+            price = coins.get(self._format_key(addr), {}).get("price")
+            out[addr] = Decimal(str(price)) if price is not None else None
+        return out
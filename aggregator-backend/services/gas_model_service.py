@@ -0,0 +1,165 @@
+import asyncio
+import bisect
+import statistics
+import time
+from typing import Dict, List, Optional, Tuple
+from web3 import Web3
+from config import GAS_MODEL_ENABLED, GAS_MODEL_REFRESH_INTERVAL, GAS_PER_TICK_CROSSED
+from pool_registry import PoolPlan, pool_registry
+from pools_config import TOKENS
+from log_manager import get_logger
+from .local_quote_service import local_quote_service
+from .pool_snapshot_service import pool_snapshot_service, STATE_DEX_SERVICES
+from .raw_call_service import raw_call_service, tx_param
+from .rpc_session import rpc_session
+
+logger = get_logger(__name__)
+
+# Dolne granice przedziałów liczby przekroczonych ticków (klucz modelu)
+TICK_BUCKETS = (0, 1, 2, 4, 8, 16)
+
+# Konto symulacji: saldo ETH nadpisane w eth_estimateGas (bez salda i allowance estymacja revertuje)
+CALIBRATION_ACCOUNT = "0x0000000000000000000000000000000000000001"
+CALIBRATION_BALANCE = hex(10 ** 30)
+# Kolejne kwoty próbek rosną x4 od 0.0001 WETH, do wyjścia poza załadowane ticki
+CALIBRATION_STEPS = 16
+CALIBRATION_STARTUP_WAIT = 15
+
+WETH_ADDRESS = TOKENS["ETH"]["address"].lower()
+
+GasKey = Tuple[str, str, bool, int]
+
+
+def ticks_bucket(ticks_crossed: int) -> int:
+    return bisect.bisect_right(TICK_BUCKETS, ticks_crossed) - 1
+
+
+class GasModelService:
+    """Gas swapu z pamięci: (dex, router, zero_for_one, przedział ticków) -> gas, kalibracja w tle."""
+
+    def __init__(self):
+        self._model: Dict[GasKey, int] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.calibrated_at: Optional[float] = None
+        self.calibrations = 0
+        self.failures = 0
+        self.samples_failed = 0
+
+    def estimate(self, plan: PoolPlan, ticks_crossed: Optional[int] = None) -> int:
+        """Gas swapu w puli planu (ticks_crossed z lokalnej symulacji; None - przedział 0)."""
+        bucket = ticks_bucket(ticks_crossed or 0)
+        gas = self._model.get((plan.dex, plan.router, plan.zero_for_one, bucket))
+        if gas is None:
+            # Kierunek bez próbki (token_in inny niż WETH) - ten sam router w drugą stronę
+            gas = self._model.get((plan.dex, plan.router, not plan.zero_for_one, bucket))
+        if gas is None:
+            base = (
+                self._model.get((plan.dex, plan.router, plan.zero_for_one, 0))
+                or self._model.get((plan.dex, plan.router, not plan.zero_for_one, 0))
+                or STATE_DEX_SERVICES[plan.dex].default_swap_gas
+            )
+            gas = base + GAS_PER_TICK_CROSSED * TICK_BUCKETS[bucket]
+        return gas
+
+    async def start(self):
+        if not GAS_MODEL_ENABLED:
+            logger.info("GAS_MODEL_ENABLED=0 - gas swapu z wartości domyślnych DEXów")
+            return
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            logger.info("Uruchomiono kalibrację modelu gazu (co %ss)", GAS_MODEL_REFRESH_INTERVAL)
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def _samples(self, snapshot) -> List[Tuple[GasKey, PoolPlan, int]]:
+        """Próbki swapów z WETH (value zamiast allowance): najmniejsza kwota w każdym przedziale ticków."""
+        samples = []
+        for plan in pool_registry.all_plans():
+            if plan.token_in.address != WETH_ADDRESS:
+                continue
+            amount = 10 ** max(plan.token_in.decimals - 4, 0)
+            seen = set()
+            for _ in range(CALIBRATION_STEPS):
+                result = local_quote_service.simulate(snapshot, plan.dex, plan.pair, plan.token_in.symbol, amount, quiet=True)
+                if result is None:
+                    # Bez ticków w snapshocie - tylko próbka przedziału 0
+                    if not seen:
+                        samples.append(((plan.dex, plan.router, plan.zero_for_one, 0), plan, amount))
+                    break
+                if result.amount_in != amount:
+                    break
+                bucket = ticks_bucket(result.ticks_crossed)
+                if bucket not in seen:
+                    seen.add(bucket)
+                    samples.append(((plan.dex, plan.router, plan.zero_for_one, bucket), plan, amount))
+                amount *= 4
+        return samples
+
+    def _estimate_request(self, plan: PoolPlan, amount_in_wei: int) -> Tuple[str, list]:
+        tx = STATE_DEX_SERVICES[plan.dex]._swap_tx(
+            plan.token_in.address, plan.token_out.address, amount_in_wei, plan.fee_tier or 500,
+            plan.router, CALIBRATION_ACCOUNT
+        )
+        overrides = {Web3.to_checksum_address(CALIBRATION_ACCOUNT): {"balance": CALIBRATION_BALANCE}}
+        return "eth_estimateGas", [tx_param(tx), "latest", overrides]
+
+    async def calibrate(self) -> int:
+        """Jeden batch eth_estimateGas dla wszystkich próbek; zwraca liczbę skalibrowanych kluczy."""
+        samples = self._samples(pool_snapshot_service.fresh())
+        if not samples:
+            return 0
+        requests = [self._estimate_request(plan, amount) for _, plan, amount in samples]
+        if rpc_session.is_ready:
+            results = await raw_call_service.batch_async(requests)
+        else:
+            results = await asyncio.to_thread(raw_call_service.batch, requests)
+
+        measured: Dict[GasKey, List[int]] = {}
+        for (key, _, _), result in zip(samples, results):
+            if isinstance(result, Exception):
+                self.samples_failed += 1
+                continue
+            # +5% zapasu jak przy estymacji per żądanie
+            measured.setdefault(key, []).append(int(int(result, 16) * 1.05))
+        if not measured:
+            raise RuntimeError(f"wszystkie {len(samples)} próbek eth_estimateGas nieudane")
+
+        self._model.update({key: int(statistics.median(values)) for key, values in measured.items()})
+        self.calibrated_at = time.time()
+        self.calibrations += 1
+        logger.info("Model gazu: %s kluczy z %s próbek", len(measured), len(samples))
+        return len(measured)
+
+    async def _run(self):
+        # Pierwsza kalibracja na tickach snapshotu (przedziały > 0), bez niego tylko przedział 0
+        if pool_snapshot_service.fresh() is None:
+            await pool_snapshot_service.wait_for_update(CALIBRATION_STARTUP_WAIT)
+        while True:
+            try:
+                await self.calibrate()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failures += 1
+                logger.warning("Błąd kalibracji modelu gazu (wartości domyślne): %s", e)
+            await asyncio.sleep(GAS_MODEL_REFRESH_INTERVAL)
+
+    def stats(self) -> dict:
+        return {
+            "running": self._task is not None,
+            "keys": len(self._model),
+            "calibrations": self.calibrations,
+            "failures": self.failures,
+            "samples_failed": self.samples_failed,
+            "age_s": round(time.time() - self.calibrated_at, 1) if self.calibrated_at else None
+        }
+
+
+gas_model_service = GasModelService()
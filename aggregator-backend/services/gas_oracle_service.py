@@ -0,0 +1,200 @@
+import asyncio
+import time
+from dataclasses import dataclass
+from decimal import Decimal
+from types import MappingProxyType
+from typing import Dict, Mapping, Optional, Tuple
+from config import GAS_ORACLE_ENABLED, GAS_ORACLE_MAX_AGE, SNAPSHOT_POLL_INTERVAL
+from pool_registry import pool_registry
+from pools_config import TOKENS
+from log_manager import get_logger
+from .pool_snapshot_service import pool_snapshot_service, STATE_DEX_SERVICES
+from .raw_call_service import raw_call_service, call_request, GET_PRICES_IN_WEI, GAS_ESTIMATE_L1_COMPONENT
+from .rpc_session import rpc_session
+from .single_flight import single_flight
+
+logger = get_logger(__name__)
+
+# Prekompilaty Arbitrum
+ARB_GAS_INFO_ADDRESS = "0x000000000000000000000000000000000000006C"
+NODE_INTERFACE_ADDRESS = "0x00000000000000000000000000000000000000C8"
+
+# Przykładowy swap per DEX do wyceny calldata w L1 (rozmiar calldata nie zależy od kwoty)
+L1_SAMPLE_ACCOUNT = "0x0000000000000000000000000000000000000001"
+L1_SAMPLE_AMOUNT = 10 ** 18
+
+WETH_ADDRESS = TOKENS["ETH"]["address"].lower()
+
+
+@dataclass(frozen=True, slots=True)
+class GasPrice:
+    """Cena gazu jednego bloku: base fee L2 i gaz komponentu L1 (calldata) swapu per DEX."""
+    block_number: int
+    base_fee: int
+    l1_base_fee: Optional[int]
+    l1_gas: Mapping[str, int]
+    created_at: float
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.created_at
+
+    def swap_cost_wei(self, dex: str, gas: int) -> int:
+        """Koszt transakcji swapu w wei: gaz L2 + gaz L1 DEXa po base fee (NodeInterface podaje L1 w jednostkach gazu L2)."""
+        return (gas + self.l1_gas.get(dex, 0)) * self.base_fee
+
+    def swap_cost_usd(self, dex: str, gas: int, eth_price: Decimal) -> Decimal:
+        """Koszt transakcji swapu w USD."""
+        return Decimal(self.swap_cost_wei(dex, gas)) / Decimal(10 ** 18) * eth_price
+
+
+class GasOracleService:
+    """Cena gazu w pamięci, odświeżana raz na blok jednym batchem JSON-RPC (single-flight)."""
+
+    def __init__(self):
+        self.current: Optional[GasPrice] = None
+        self._task: Optional[asyncio.Task] = None
+        self._l1_samples: Optional[Dict[str, Tuple[str, bytes]]] = None
+        self.refreshes = 0
+        self.failures = 0
+        self.l1_unavailable = 0
+
+    async def get(self) -> GasPrice:
+        """Aktualna cena z pamięci; bez ceny (lub starsza niż GAS_ORACLE_MAX_AGE) - jedno wspólne odświeżenie."""
+        price = self.current
+        if price is not None and price.age <= GAS_ORACLE_MAX_AGE:
+            return price
+        try:
+            return await self.refresh()
+        except Exception:
+            if price is None:
+                raise
+            return price
+
+    async def refresh(self, block_number: Optional[int] = None) -> GasPrice:
+        """Odczyt ceny dla bloku (None - najnowszy); współbieżne odświeżenia tego samego bloku czekają na jedno."""
+        return await single_flight.do(f"gas_price:{block_number or 'latest'}", lambda: self._load(block_number), "gas_price")
+
+    def _samples(self) -> Dict[str, Tuple[str, bytes]]:
+        """Router i calldata exactInputSingle per DEX (pierwsza pula z WETH na wejściu)."""
+        if self._l1_samples is None:
+            samples = {}
+            for plan in pool_registry.all_plans():
+                if plan.dex in samples or plan.token_in.address != WETH_ADDRESS:
+                    continue
+                tx = STATE_DEX_SERVICES[plan.dex]._swap_tx(
+                    plan.token_in.address, plan.token_out.address, L1_SAMPLE_AMOUNT, plan.fee_tier or 500,
+                    plan.router, L1_SAMPLE_ACCOUNT
+                )
+                samples[plan.dex] = (plan.router, tx["data"])
+            self._l1_samples = samples
+        return self._l1_samples
+
+    async def _load(self, block_number: Optional[int]) -> GasPrice:
+        block = block_number if block_number is not None else "latest"
+        samples = self._samples()
+        requests = [
+            ("eth_gasPrice", []),
+            call_request(ARB_GAS_INFO_ADDRESS, GET_PRICES_IN_WEI.encode(), block),
+            *(
+                call_request(NODE_INTERFACE_ADDRESS, GAS_ESTIMATE_L1_COMPONENT.encode(router, False, data), block)
+                for router, data in samples.values()
+            )
+        ]
+        if block_number is None:
+            requests.append(("eth_blockNumber", []))
+        if rpc_session.is_ready:
+            results = await raw_call_service.batch_async(requests)
+        else:
+            results = await asyncio.to_thread(raw_call_service.batch, requests)
+
+        gas_price_result, prices_result, *l1_results = results
+        if block_number is None:
+            block_result = l1_results.pop()
+            if isinstance(block_result, Exception):
+                raise block_result
+            block_number = int(block_result, 16)
+
+        if not isinstance(prices_result, Exception):
+            # perArbGasTotal - base fee L2 (łącznie z komponentem congestion)
+            base_fee = GET_PRICES_IN_WEI.decode(bytes.fromhex(prices_result[2:]))[5]
+        elif not isinstance(gas_price_result, Exception):
+            # Węzeł bez prekompilatów Arbitrum
+            base_fee = int(gas_price_result, 16)
+        else:
+            raise gas_price_result
+
+        l1_gas = {}
+        l1_base_fee = None
+        for dex, result in zip(samples, l1_results):
+            if isinstance(result, Exception):
+                continue
+            gas_estimate_for_l1, _, l1_base_fee = GAS_ESTIMATE_L1_COMPONENT.decode(bytes.fromhex(result[2:]))
+            l1_gas[dex] = gas_estimate_for_l1
+        if len(l1_gas) < len(samples):
+            self.l1_unavailable += 1
+
+        price = GasPrice(
+            block_number=block_number,
+            base_fee=base_fee,
+            l1_base_fee=l1_base_fee,
+            l1_gas=MappingProxyType(l1_gas),
+            created_at=time.time()
+        )
+        # Starszy blok (spóźniony odczyt) nie nadpisuje nowszego
+        if self.current is None or price.block_number >= self.current.block_number:
+            self.current = price
+        self.refreshes += 1
+        return price
+
+    async def start(self):
+        if not GAS_ORACLE_ENABLED:
+            logger.info("GAS_ORACLE_ENABLED=0 - cena gazu odświeżana przez żądania co GAS_ORACLE_MAX_AGE")
+            return
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            logger.info("Uruchomiono wyrocznię ceny gazu (raz na blok)")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        delay = SNAPSHOT_POLL_INTERVAL
+        while True:
+            try:
+                # Blok ze snapshotu pul (bez dodatkowego eth_blockNumber), gdy snapshot wyłączony - własny odczyt
+                snapshot = pool_snapshot_service.fresh()
+                block_number = snapshot.block_number if snapshot else await pool_snapshot_service.block_number()
+                if self.current is None or block_number > self.current.block_number:
+                    await self.refresh(block_number)
+                delay = SNAPSHOT_POLL_INTERVAL
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failures += 1
+                delay = min(delay * 2, 30)
+                logger.warning("Błąd odświeżania ceny gazu (ponowienie za %.1fs): %s", delay, e)
+            # Budzi się na snapshot nowego bloku albo po interwale odpytywania
+            await pool_snapshot_service.wait_for_update(delay)
+
+    def stats(self) -> dict:
+        price = self.current
+        return {
+            "running": self._task is not None,
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+            "l1_unavailable": self.l1_unavailable,
+            "block_number": price.block_number if price else None,
+            "base_fee": price.base_fee if price else None,
+            "l1_gas": dict(price.l1_gas) if price else None,
+            "age_s": round(price.age, 1) if price else None
+        }
+
+
+gas_oracle_service = GasOracleService()
@@ -0,0 +1,62 @@
+import asyncio
+import random
+import aiohttp
+from typing import Optional, Any
+from config import PRICE_HTTP_MAX_CONNECTIONS, PRICE_HTTP_KEEPALIVE_TIMEOUT
+from log_manager import get_logger
+from .metrics_service import UPSTREAM_REQUESTS, UPSTREAM_ERRORS
+
+logger = get_logger(__name__)
+
+
+class HttpClientService:
+    """Współdzielona sesja HTTP keep-alive dla API cenowych: timeouty i nieblokujące ponowienia z jitterem."""
+
+    def __init__(self):
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        # Tworzona leniwie - wymaga działającej pętli zdarzeń
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=PRICE_HTTP_MAX_CONNECTIONS,
+                keepalive_timeout=PRICE_HTTP_KEEPALIVE_TIMEOUT,
+                ttl_dns_cache=300
+            )
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    async def get_json(self, url: str, timeout: float, attempts: int = 3, base_delay: float = 0.2, label: str = "HTTP") -> Optional[Any]:
+        """GET z JSON w odpowiedzi; ponawia błędy sieci, timeouty, 429 i 5xx. None po wyczerpaniu prób."""
+        delay = base_delay
+        # "DefiLlama batch" -> "defillama"
+        upstream = label.split()[0].lower()
+        for attempt in range(attempts):
+            UPSTREAM_REQUESTS.inc(upstream)
+            try:
+                async with self._get_session().get(url, timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+                    response.raise_for_status()
+                    return await response.json(content_type=None)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                UPSTREAM_ERRORS.inc(upstream)
+                status = getattr(e, "status", None)
+                retryable = status is None or status == 429 or status >= 500
+                if not retryable or attempt == attempts - 1:
+                    logger.warning("%s: błąd %r (próba %s/%s)", label, e, attempt + 1, attempts)
+                    return None
+                sleep_time = delay + random.uniform(0, delay)
+                logger.warning("%s: błąd %r, ponawiam za %.2fs...", label, e, sleep_time)
+                await asyncio.sleep(sleep_time)
+                delay *= 2
+        return None
+
+    async def close(self):
+        if self._session is not None:
+            try:
+                await self._session.close()
+            except Exception as e:
+                logger.warning("Błąd zamykania sesji HTTP: %s", e)
+            self._session = None
+
+
+http_client = HttpClientService()
@@ -0,0 +1,97 @@
+import asyncio
+import json
+import os
+import uuid
+from typing import Optional, Iterable
+from config import L1_CACHE_MAX_SIZE, L1_CACHE_TTLS, CACHE_INVALIDATION_CHANNEL
+from log_manager import get_logger
+from .redis_service import redis_service
+from .ttl_cache import TTLCache
+
+logger = get_logger(__name__)
+
+# Identyfikator workera - własne komunikaty invalidacji są pomijane
+WORKER_ID = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+
+def key_class(key: str) -> str:
+    """Klasa klucza cache (price, mid_price, quote, liquidity, tx_cost) - decyduje o TTL w L1."""
+    if key.startswith("coingecko_"):
+        return "price"
+    if "_quote_" in key:
+        return "quote"
+    if key.endswith("_liquidity"):
+        return "liquidity"
+    if "_dexfee_" in key:
+        return "tx_cost"
+    return "mid_price"
+
+
+def l1_ttl(key: str, redis_ttl: Optional[float]) -> float:
+    """TTL wpisu L1: TTL klasy klucza, nigdy dłuższy niż pozostały TTL w Redis."""
+    ttl = L1_CACHE_TTLS.get(key_class(key), 0)
+    if redis_ttl is not None:
+        ttl = min(ttl, redis_ttl)
+    return ttl
+
+
+def invalidation_message(keys: Iterable[str]) -> str:
+    return json.dumps({"origin": WORKER_ID, "keys": list(keys)})
+
+
+class CacheInvalidationService:
+    """Nasłuch kanału pub/sub: zapisy innych workerów usuwają klucze z lokalnego L1."""
+
+    def __init__(self, cache: TTLCache):
+        self.cache = cache
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        if self._task is None and self.cache.max_size > 0:
+            self._task = asyncio.create_task(self._run())
+            logger.info("Uruchomiono invalidację L1 (kanał %s, worker %s)", CACHE_INVALIDATION_CHANNEL, WORKER_ID)
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def handle(self, data) -> None:
+        try:
+            message = json.loads(data)
+        except (TypeError, ValueError):
+            return
+        if message.get("origin") != WORKER_ID:
+            self.cache.invalidate(message.get("keys", []))
+
+    async def _run(self):
+        delay = 1.0
+        while True:
+            try:
+                async with redis_service.get_client() as client:
+                    pubsub = client.pubsub()
+                    await pubsub.subscribe(CACHE_INVALIDATION_CHANNEL)
+                    # Komunikaty z okresu bez subskrypcji mogły przepaść - L1 od zera
+                    self.cache.clear()
+                    delay = 1.0
+                    try:
+                        async for message in pubsub.listen():
+                            if message.get("type") == "message":
+                                self.handle(message["data"])
+                    finally:
+                        await pubsub.aclose()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.cache.clear()
+                logger.warning("Błąd nasłuchu invalidacji L1 (ponowienie za %.0fs): %s", delay, e)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 30)
+
+
+local_cache = TTLCache(L1_CACHE_MAX_SIZE)
+cache_invalidation_service = CacheInvalidationService(local_cache)
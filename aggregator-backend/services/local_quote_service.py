@@ -0,0 +1,63 @@
+from decimal import Decimal
+from typing import Optional
+from pools_config import TOKENS
+from price_calculation.v3_swap_math import swap_exact_in, SwapResult, TickDataOutOfRange
+from token_manager import TokenManager
+from log_manager import get_logger
+
+logger = get_logger(__name__)
+
+token_manager = TokenManager(TOKENS)
+
+
+class LocalQuoteService:
+    """Quote exact input symulowany lokalnie z ticków snapshotu (wynik jak z Quotera dla tego bloku)."""
+
+    def simulate(self, snapshot, dex_name: str, pair: str, token_from: str, amount_in_wei: int, quiet: bool = False) -> Optional[SwapResult]:
+        """Symulacja swapu lub None, gdy brak danych albo swap wychodzi poza załadowane ticki."""
+        if snapshot is None:
+            return None
+        key = (dex_name, pair)
+        state = snapshot.pools.get(key)
+        tick_data = snapshot.ticks.get(key)
+        if state is None or tick_data is None:
+            return None
+
+        token_in_address = token_manager.get_address_by_symbol(token_from)
+        fee = state.fee_for(token_in_address)
+        if fee is None:
+            return None
+
+        try:
+            return swap_exact_in(
+                sqrt_price_x96=state.sqrt_price_x96,
+                tick=state.tick,
+                liquidity=tick_data.liquidity,
+                fee_pips=fee,
+                tick_spacing=tick_data.tick_spacing,
+                bitmap=tick_data.bitmap,
+                liquidity_net=tick_data.liquidity_net,
+                zero_for_one=token_in_address.lower() == state.token0,
+                amount_in=amount_in_wei
+            )
+        except TickDataOutOfRange:
+            if not quiet:
+                logger.debug("Swap %s (%s) poza załadowanymi tickami - fallback do Quotera", pair, dex_name)
+            return None
+        except Exception as e:
+            logger.warning("Błąd lokalnej symulacji swapu %s (%s): %s", pair, dex_name, e)
+            return None
+
+    def quote_exact_in(self, snapshot, dex_name: str, pair: str, token_from: str, token_to: str, amount_in: Decimal) -> Optional[Decimal]:
+        """amount_out w jednostkach tokena (None - użyj Quotera on-chain)."""
+        dec_in = token_manager.get_decimals_by_symbol(token_from)
+        dec_out = token_manager.get_decimals_by_symbol(token_to)
+        amount_in_wei = int(amount_in * Decimal(10 ** dec_in))
+
+        result = self.simulate(snapshot, dex_name, pair, token_from, amount_in_wei)
+        if result is None or result.amount_in != amount_in_wei:
+            return None
+        return Decimal(result.amount_out) / Decimal(10 ** dec_out)
+
+
+local_quote_service = LocalQuoteService()
@@ -0,0 +1,183 @@
+import asyncio
+import bisect
+import threading
+import time
+from typing import Callable, Dict, List, Sequence, Tuple
+
+# Granice przedziałów histogramów czasu (sekundy)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Counter:
+    """Licznik rosnący per zestaw etykiet."""
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = list(self._values.items())
+        for label_values, value in sorted(values):
+            lines.append(f"{self.name}{_labels(self.label_names, label_values)} {_number(value)}")
+        return lines
+
+
+class _Timer:
+    """Mierzy czas bloku with (także z await w środku) i zapisuje go w histogramie."""
+    __slots__ = ("_histogram", "_label_values", "_start")
+
+    def __init__(self, histogram: "Histogram", label_values: LabelValues):
+        self._histogram = histogram
+        self._label_values = label_values
+
+    def __enter__(self) -> "_Timer":
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._histogram.observe(time.perf_counter() - self._start, *self._label_values)
+
+
+class Histogram:
+    """Histogram kumulatywny (przedziały jak w Prometheus) per zestaw etykiet."""
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        # etykiety -> [liczniki przedziałów (ostatni: +Inf), suma]
+        self._values: Dict[LabelValues, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(label_values)
+            if entry is None:
+                entry = self._values[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    def time(self, *label_values: str) -> _Timer:
+        return _Timer(self, label_values)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            values = [(label_values, list(counts), total) for label_values, (counts, total) in self._values.items()]
+        for label_values, counts, total in sorted(values):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound!r}"'
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, label_values, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, label_values)} {repr(total)}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, label_values)} {cumulative}")
+        return lines
+
+
+class Gauge:
+    """Wartość odczytywana przy scrape (callback zwraca {etykiety: wartość})."""
+
+    def __init__(self, name: str, documentation: str, collect: Callable[[], Dict[LabelValues, float]], label_names: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._collect = collect
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} gauge"]
+        for label_values, value in sorted(self._collect().items()):
+            lines.append(f"{self.name}{_labels(self.label_names, label_values)} {_number(value)}")
+        return lines
+
+
+class MetricsService:
+    """Rejestr metryk procesu w formacie tekstowym Prometheus (bez zależności od prometheus_client)."""
+
+    def __init__(self):
+        self._metrics = []
+
+    def counter(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, label_names))
+
+    def histogram(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> Histogram:
+        return self._register(Histogram(name, documentation, label_names))
+
+    def gauge(self, name: str, documentation: str, collect: Callable[[], Dict[LabelValues, float]], label_names: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, collect, label_names))
+
+    def _register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+def _thread_pool_stats() -> Dict[LabelValues, float]:
+    """Kolejka i wątki domyślnego executora pętli (asyncio.to_thread - sync Web3, fallbacki)."""
+    try:
+        executor = asyncio.get_running_loop()._default_executor
+    except RuntimeError:
+        executor = None
+    if executor is None:
+        return {("queued",): 0, ("threads",): 0}
+    return {("queued",): executor._work_queue.qsize(), ("threads",): len(executor._threads)}
+
+
+metrics_service = MetricsService()
+
+# Etapy /exchange: price_fetch, redis_get, redis_set, mid_price, quote, liquidity, dex_fee, tx_cost (gaz), ranking, serialization
+# (dex/pool puste dla etapów wspólnych dla żądania)
+STAGE_SECONDS = metrics_service.histogram(
+    "aggregator_stage_seconds", "Czas etapu obliczenia opcji wymiany", ("stage", "dex", "pool")
+)
+# result: l1_hit (pamięć procesu), redis_hit, miss
+CACHE_LOOKUPS = metrics_service.counter(
+    "aggregator_cache_lookups_total", "Odczyty cache per klasa klucza i wynik", ("key_class", "result")
+)
+# upstream: rpc, redis, defillama, coingecko
+UPSTREAM_REQUESTS = metrics_service.counter(
+    "aggregator_upstream_requests_total", "Żądania do usług zewnętrznych", ("upstream",)
+)
+UPSTREAM_ERRORS = metrics_service.counter(
+    "aggregator_upstream_errors_total", "Błędy usług zewnętrznych (odpowiedź z błędem albo wyjątek)", ("upstream",)
+)
+# Brak wolnego połączenia w BlockingConnectionPool po REDIS_POOL_TIMEOUT (wywołanie obsłużone z lokalnego cache)
+REDIS_POOL_TIMEOUTS = metrics_service.counter(
+    "aggregator_redis_pool_timeouts_total", "Wywołania Redis bez wolnego połączenia w puli"
+)
+metrics_service.gauge(
+    "aggregator_thread_pool", "Zadania w kolejce i wątki domyślnego executora pętli", _thread_pool_stats, ("state",)
+)
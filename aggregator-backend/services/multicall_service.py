@@ -0,0 +1,50 @@
+import asyncio
+from functools import lru_cache
+from typing import List, Tuple, Sequence, Any
+from eth_abi import encode
+from web3 import Web3
+from .raw_call_service import raw_call_service, TRY_AGGREGATE
+
+MULTICALL3_ADDRESS = Web3.to_checksum_address("0xcA11bde05977b3631167028862bE2a173976CA11")
+
+# Limit wywołań w jednym tryAggregate (gas limit eth_call na publicznym RPC)
+MULTICALL_CHUNK_SIZE = 300
+
+@lru_cache(maxsize=None)
+def function_selector(signature: str) -> bytes:
+    """4-bajtowy selektor funkcji, np. 'slot0()'."""
+    return bytes(Web3.keccak(text=signature)[:4])
+
+
+def encode_call(signature: str, arg_types: Sequence[str] = (), args: Sequence[Any] = ()) -> bytes:
+    """Calldata dla wywołania (selektor + zakodowane argumenty)."""
+    if not arg_types:
+        return function_selector(signature)
+    return function_selector(signature) + encode(list(arg_types), list(args))
+
+
+class MulticallService:
+    """Multicall3 - wiele eth_call w jednym round tripie (tryAggregate, błędy per wywołanie)."""
+
+    def try_aggregate(self, calls: List[Tuple[str, bytes]], block_identifier="latest") -> List[Tuple[bool, bytes]]:
+        """Wykonuje wywołania (target, calldata); zwraca (success, returnData) w tej samej kolejności."""
+        results: List[Tuple[bool, bytes]] = []
+        for chunk in self._chunks(calls):
+            data = raw_call_service.call(MULTICALL3_ADDRESS, TRY_AGGREGATE.encode(False, chunk), block_identifier)
+            results.extend(TRY_AGGREGATE.decode(data)[0])
+        return results
+
+    async def try_aggregate_async(self, calls: List[Tuple[str, bytes]], block_identifier="latest") -> List[Tuple[bool, bytes]]:
+        """try_aggregate przez AsyncWeb3 (paczki wysyłane równolegle)."""
+        responses = await asyncio.gather(*(
+            raw_call_service.call_async(MULTICALL3_ADDRESS, TRY_AGGREGATE.encode(False, chunk), block_identifier)
+            for chunk in self._chunks(calls)
+        ))
+        return [result for data in responses for result in TRY_AGGREGATE.decode(data)[0]]
+
+    def _chunks(self, calls: List[Tuple[str, bytes]]):
+        for start in range(0, len(calls), MULTICALL_CHUNK_SIZE):
+            yield calls[start:start + MULTICALL_CHUNK_SIZE]
+
+
+multicall_service = MulticallService()
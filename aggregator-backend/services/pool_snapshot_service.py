@@ -0,0 +1,160 @@
+import asyncio
+import itertools
+import time
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Optional, Mapping, Tuple
+from config import w3, async_w3, SNAPSHOT_ENABLED, SNAPSHOT_POLL_INTERVAL, SNAPSHOT_MAX_AGE, LOCAL_QUOTES_ENABLED
+from pools_config import DEX_CONFIGS, TOKENS
+from token_manager import TokenManager
+from log_manager import get_logger
+from .camelot_service import CamelotService
+from .pool_state import PoolState, TickData, load_pool_states, load_tick_spacings, load_tick_data
+from .rpc_session import rpc_session
+from .sushiswap_service import SushiswapService
+from .uniswap_service import UniswapService
+
+logger = get_logger(__name__)
+
+token_manager = TokenManager(TOKENS)
+
+# Serwisy używane tylko do budowania/dekodowania wywołań stanu (bez I/O)
+STATE_DEX_SERVICES = {
+    "Uniswap": UniswapService(),
+    "SushiSwap": SushiswapService(),
+    "Camelot": CamelotService()
+}
+
+
+@dataclass(frozen=True)
+class PoolSnapshot:
+    """Niemutowalny, wersjonowany stan wszystkich pul z DEX_CONFIGS dla jednego bloku."""
+    version: int
+    block_number: int
+    created_at: float
+    pools: Mapping[Tuple[str, str], PoolState]
+    ticks: Mapping[Tuple[str, str], TickData]
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.created_at
+
+    def info(self) -> dict:
+        """Metadane snapshotu do odpowiedzi API."""
+        return {
+            "block_number": self.block_number,
+            "version": self.version,
+            "age_ms": round(self.age * 1000, 1)
+        }
+
+
+class PoolSnapshotService:
+    """Zadanie w tle: przy każdym nowym bloku odświeża stan wszystkich pul (jeden tryAggregate)."""
+
+    def __init__(self):
+        self.current: Optional[PoolSnapshot] = None
+        self._versions = itertools.count(1)
+        self._task: Optional[asyncio.Task] = None
+        self._entries = self._build_entries()
+        self._tick_spacings = {}
+        self._updated = asyncio.Event()
+
+    def _build_entries(self) -> dict:
+        entries = {}
+        for dex_name, dex_config in DEX_CONFIGS.items():
+            dex_service = STATE_DEX_SERVICES.get(dex_name)
+            if dex_service is None:
+                continue
+            for pair, data in dex_config["pools"].items():
+                token_addresses = token_manager.get_pool_addresses(pair)
+                if len(token_addresses) == 2:
+                    entries[(dex_name, pair)] = (dex_service, data["address"], token_addresses)
+        return entries
+
+    def fresh(self) -> Optional[PoolSnapshot]:
+        """Aktualny snapshot, o ile nie starszy niż SNAPSHOT_MAX_AGE."""
+        snapshot = self.current
+        if snapshot is None or snapshot.age > SNAPSHOT_MAX_AGE:
+            return None
+        return snapshot
+
+    async def start(self):
+        if not SNAPSHOT_ENABLED:
+            logger.info("SNAPSHOT_ENABLED=0 - stan pul czytany per żądanie")
+            return
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            logger.info("Uruchomiono snapshot pul (%s pul, co %ss)", len(self._entries), SNAPSHOT_POLL_INTERVAL)
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def block_number(self) -> int:
+        """Numer najnowszego bloku."""
+        if rpc_session.is_ready:
+            return await async_w3.eth.block_number
+        return await asyncio.to_thread(lambda: w3.eth.block_number)
+
+    async def refresh(self, block_number: int) -> PoolSnapshot:
+        """Buduje nowy snapshot dla bloku i podmienia referencję (czytelnicy widzą stary albo nowy)."""
+        states = await load_pool_states(self._entries, block_number)
+        pools = {key: state for key, state in states.items() if state is not None}
+        ticks = await self._load_ticks(pools, block_number) if LOCAL_QUOTES_ENABLED else {}
+        snapshot = PoolSnapshot(
+            version=next(self._versions),
+            block_number=block_number,
+            created_at=time.time(),
+            pools=MappingProxyType(pools),
+            ticks=MappingProxyType(ticks)
+        )
+        self.current = snapshot
+        # Budzi czekających na nowy blok (subskrypcje quote)
+        self._updated.set()
+        self._updated = asyncio.Event()
+        return snapshot
+
+    async def wait_for_update(self, timeout: float) -> Optional[PoolSnapshot]:
+        """Czeka na snapshot nowego bloku (najwyżej timeout sekund) i zwraca aktualny."""
+        try:
+            await asyncio.wait_for(self._updated.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return self.fresh()
+
+    async def _load_ticks(self, pools: dict, block_number: int) -> dict:
+        """Ticki pul dla tego samego bloku co stan (błąd nie blokuje snapshotu - quote z Quotera)."""
+        try:
+            missing = {key: entry for key, entry in self._entries.items() if key not in self._tick_spacings}
+            if missing:
+                self._tick_spacings.update(await load_tick_spacings(missing))
+            return await load_tick_data(self._entries, pools, self._tick_spacings, block_number)
+        except Exception as e:
+            logger.warning("Błąd odczytu ticków dla bloku %s: %s", block_number, e)
+            return {}
+
+    async def _run(self):
+        last_block = None
+        delay = SNAPSHOT_POLL_INTERVAL
+        while True:
+            try:
+                block_number = await self.block_number()
+                if block_number != last_block:
+                    snapshot = await self.refresh(block_number)
+                    last_block = block_number
+                    logger.debug("Snapshot pul v%s: blok %s, %s/%s pul, ticki %s", snapshot.version, block_number, len(snapshot.pools), len(self._entries), len(snapshot.ticks))
+                delay = SNAPSHOT_POLL_INTERVAL
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                delay = min(delay * 2, 30)
+                logger.warning("Błąd odświeżania snapshotu pul (ponowienie za %.1fs): %s", delay, e)
+            await asyncio.sleep(delay)
+
+
+pool_snapshot_service = PoolSnapshotService()
@@ -0,0 +1,156 @@
+import asyncio
+from dataclasses import dataclass
+from typing import Optional, Dict, Tuple, List, Mapping
+from log_manager import get_logger
+from .multicall_service import multicall_service
+from .raw_call_service import TICK_SPACING
+from .rpc_session import rpc_session
+
+logger = get_logger(__name__)
+
+
+@dataclass(frozen=True)
+class PoolState:
+    """Stan puli odczytany z blockchain (cena, fee, salda tokenów)."""
+    sqrt_price_x96: int
+    tick: int
+    balance0: int
+    balance1: int
+    token0: str
+    fee: Optional[int] = None
+    fee_zto: Optional[int] = None
+    fee_otz: Optional[int] = None
+
+    def fee_for(self, token_from_address: str) -> Optional[int]:
+        """Fee w milionowych częściach dla kierunku swapu (Camelot: feeZto/feeOtz)."""
+        if self.fee is not None:
+            return self.fee
+        if token_from_address.lower() == self.token0:
+            return self.fee_zto
+        return self.fee_otz
+
+
+@dataclass(frozen=True)
+class TickData:
+    """Ticki wokół bieżącej ceny (okno słów bitmapy) do lokalnej symulacji swapu."""
+    tick_spacing: int
+    liquidity: int
+    bitmap: Mapping[int, int]
+    liquidity_net: Mapping[int, int]
+
+
+async def aggregate_calls(calls: List[Tuple[str, bytes]], block_identifier="latest") -> List[Tuple[bool, bytes]]:
+    """tryAggregate przez AsyncWeb3 albo w wątku (sync Web3)."""
+    if rpc_session.is_ready:
+        return await multicall_service.try_aggregate_async(calls, block_identifier)
+    return await asyncio.to_thread(multicall_service.try_aggregate, calls, block_identifier)
+
+
+async def load_pool_states(entries: Dict[Tuple[str, str], tuple], block_identifier="latest") -> Dict[Tuple[str, str], Optional[PoolState]]:
+    """Stan wielu pul jednym tryAggregate. entries: (dex, para) -> (dex_service, adres puli, adresy tokenów)."""
+    calls = []
+    spans = []
+    for key, (dex_service, pool_address, token_addresses) in entries.items():
+        pool_calls = dex_service.pool_state_calls(pool_address, token_addresses)
+        spans.append((key, dex_service, token_addresses, len(calls), len(pool_calls)))
+        calls.extend(pool_calls)
+
+    results = await aggregate_calls(calls, block_identifier)
+
+    return {
+        key: dex_service.decode_pool_state(results[start:start + count], token_addresses)
+        for key, dex_service, token_addresses, start, count in spans
+    }
+
+
+async def load_tick_spacings(entries: Dict[Tuple[str, str], tuple]) -> Dict[Tuple[str, str], int]:
+    """tickSpacing pul (niezmienny - czytany raz) jednym tryAggregate."""
+    keys = list(entries)
+    results = await aggregate_calls([(entries[key][1], TICK_SPACING.encode()) for key in keys])
+    return {
+        key: TICK_SPACING.decode(data)[0]
+        for key, (success, data) in zip(keys, results)
+        if success
+    }
+
+
+async def load_tick_data(entries: Dict[Tuple[str, str], tuple], states: Mapping[Tuple[str, str], PoolState],
+                         tick_spacings: Mapping[Tuple[str, str], int], block_identifier="latest") -> Dict[Tuple[str, str], TickData]:
+    """Dane ticków pul wokół ceny ze states (ten sam blok) jednym tryAggregate."""
+    calls = []
+    spans = []
+    for key, (dex_service, pool_address, _) in entries.items():
+        state = states.get(key)
+        tick_spacing = tick_spacings.get(key)
+        if state is None or tick_spacing is None:
+            continue
+        pool_calls = dex_service.tick_data_calls(pool_address, state, tick_spacing)
+        if not pool_calls:
+            continue
+        spans.append((key, dex_service, state, tick_spacing, len(calls), len(pool_calls)))
+        calls.extend(pool_calls)
+
+    if not calls:
+        return {}
+
+    results = await aggregate_calls(calls, block_identifier)
+
+    # Druga faza (np. Algebra: ticks() dla bitów z tickTable) - jeden wspólny tryAggregate
+    followup_calls = []
+    followup_spans = {}
+    for key, dex_service, state, tick_spacing, start, count in spans:
+        pool_calls = dex_service.tick_followup_calls(entries[key][1], results[start:start + count], state, tick_spacing)
+        followup_spans[key] = (len(followup_calls), len(pool_calls))
+        followup_calls.extend(pool_calls)
+
+    followup_results = await aggregate_calls(followup_calls, block_identifier) if followup_calls else []
+
+    tick_data = {}
+    for key, dex_service, state, tick_spacing, start, count in spans:
+        followup_start, followup_count = followup_spans[key]
+        pool_results = results[start:start + count] + followup_results[followup_start:followup_start + followup_count]
+        data = dex_service.decode_tick_data(pool_results, state, tick_spacing)
+        if data is not None:
+            tick_data[key] = data
+    return tick_data
+
+
+class PoolStateBatch:
+    """Stan pul żądania: ze snapshotu per blok, a dla brakujących jednym tryAggregate przy pierwszym odczycie."""
+
+    def __init__(self, snapshot=None):
+        self.snapshot = snapshot
+        self._entries: Dict[Tuple[str, str], tuple] = {}
+        self._task: Optional[asyncio.Future] = None
+
+    def add(self, dex_name: str, pair: str, dex_service, pool_address: str, token_addresses: List[str]) -> None:
+        if self.from_snapshot(dex_name, pair) is None:
+            self._entries[(dex_name, pair)] = (dex_service, pool_address, token_addresses)
+
+    def from_snapshot(self, dex_name: str, pair: str) -> Optional[PoolState]:
+        """Stan puli ze snapshotu (bez I/O) lub None."""
+        if self.snapshot is None:
+            return None
+        return self.snapshot.pools.get((dex_name, pair))
+
+    async def get(self, dex_name: str, pair: str) -> Optional[PoolState]:
+        """Stan puli lub None (brak puli w batchu albo błąd odczytu)."""
+        state = self.from_snapshot(dex_name, pair)
+        if state is not None:
+            return state
+        key = (dex_name, pair)
+        if key not in self._entries:
+            return None
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._load())
+        states = await self._task
+        return states.get(key)
+
+    async def _load(self) -> Dict[Tuple[str, str], Optional[PoolState]]:
+        try:
+            states = await load_pool_states(self._entries)
+        except Exception as e:
+            logger.warning("Błąd Multicall3 (%s pul): %s", len(self._entries), e)
+            return {}
+        logger.debug("Multicall3: stan %s pul w jednym żądaniu", len(states))
+        return states
@@ -0,0 +1,136 @@
+import asyncio
+import random
+from decimal import Decimal
+from typing import Optional, Dict, List
+from config import PRICE_CACHE_TTL, PRICE_WARMER_ENABLED, PRICE_REFRESH_INTERVAL, PRICE_REFRESH_JITTER, PRICE_REFRESH_MAX_BACKOFF
+from interfaces import ICacheService
+from pools_config import TOKENS
+from log_manager import get_logger
+from .coingecko_service import CoinGeckoService
+from .defillama_service import DefiLlamaService
+from .redis_cache import RedisCacheService
+
+logger = get_logger(__name__)
+
+
+def price_cache_key(address: str) -> str:
+    """Klucz Redis ceny tokena."""
+    return f"coingecko_{address.lower()}"
+
+
+async def fetch_api_prices(defillama_service: DefiLlamaService, coin_gecko_service: CoinGeckoService,
+                           token_addresses: List[str]) -> Dict[str, Decimal]:
+    """Ceny z API: najpierw DefiLlama (główny), CoinGecko dla brakujących (fallback)."""
+    prices = {}
+    llama_prices = await defillama_service.get_prices_batch(token_addresses)
+    still_missing = []
+    for addr in token_addresses:
+        price = llama_prices.get(addr)
+        if price and price > 0:
+            prices[addr] = price
+        else:
+            still_missing.append(addr)
+
+    if still_missing:
+        logger.warning("DefiLlama nie zwrócił %s cen, próbuję CoinGecko (fallback)...", len(still_missing))
+        cg_prices = await coin_gecko_service.get_prices_batch(still_missing)
+        for addr, price in cg_prices.items():
+            if price and price > 0:
+                prices[addr] = price
+                logger.debug("CoinGecko (fallback): %s... = $%s", addr[:8], price)
+    return prices
+
+
+class PriceWarmerService:
+    """Zadanie w tle: odświeża ceny wszystkich tokenów z TOKENS przed wygaśnięciem w cache (jitter + backoff)."""
+
+    def __init__(self, cache: ICacheService, defillama_service: DefiLlamaService, coin_gecko_service: CoinGeckoService):
+        self.cache = cache
+        self.defillama_service = defillama_service
+        self.coin_gecko_service = coin_gecko_service
+        self.token_addresses = [token["address"] for token in TOKENS.values()]
+        self._task: Optional[asyncio.Task] = None
+        self.refreshes = 0
+        self.failures = 0
+        self.partial_refreshes = 0
+        self.missing_prices = 0
+
+    async def start(self):
+        if not PRICE_WARMER_ENABLED:
+            logger.info("PRICE_WARMER_ENABLED=0 - ceny pobierane per żądanie")
+            return
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            logger.info("Uruchomiono odświeżanie cen (%s tokenów, co ~%ss)", len(self.token_addresses), PRICE_REFRESH_INTERVAL)
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def refresh(self, token_addresses: Optional[List[str]] = None) -> List[str]:
+        """Pobiera ceny tokenów (domyślnie wszystkich) i zapisuje je jednym pipeline; zwraca adresy bez ceny."""
+        token_addresses = token_addresses or self.token_addresses
+        prices = await fetch_api_prices(self.defillama_service, self.coin_gecko_service, token_addresses)
+        if prices:
+            await self.cache.set_cached_prices({
+                price_cache_key(addr): (price, PRICE_CACHE_TTL) for addr, price in prices.items()
+            })
+        return [addr for addr in token_addresses if addr not in prices]
+
+    async def _run(self):
+        delay = PRICE_REFRESH_INTERVAL
+        while True:
+            wait = delay
+            try:
+                missing = await self.refresh()
+                self.refreshes += 1
+                if len(missing) == len(self.token_addresses):
+                    raise RuntimeError(f"brak wszystkich {len(missing)} cen")
+                delay = wait = PRICE_REFRESH_INTERVAL
+                if missing:
+                    # Częściowe odświeżenie: bez backoffu (reszta cen jest świeża), brakujące ponawiane w połowie interwału
+                    self.partial_refreshes += 1
+                    await self._sleep(delay / 2)
+                    await self._retry_missing(missing)
+                    wait = delay / 2
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failures += 1
+                delay = wait = min(delay * 2, PRICE_REFRESH_MAX_BACKOFF)
+                logger.warning("Błąd odświeżania cen (ponowienie za %.1fs): %s", delay, e)
+            await self._sleep(wait)
+
+    async def _retry_missing(self, missing: List[str]):
+        try:
+            still_missing = await self.refresh(missing)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("Błąd ponowienia %s brakujących cen: %s", len(missing), e)
+            return
+        if still_missing:
+            self.missing_prices += len(still_missing)
+            logger.warning("Brak %s/%s cen po ponowieniu", len(still_missing), len(self.token_addresses))
+
+    async def _sleep(self, delay: float):
+        # Jitter rozprasza odświeżenia wielu workerów w czasie
+        await asyncio.sleep(max(0.1, delay + random.uniform(-PRICE_REFRESH_JITTER, PRICE_REFRESH_JITTER)))
+
+    def stats(self) -> dict:
+        return {
+            "running": self._task is not None,
+            "tokens": len(self.token_addresses),
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+            "partial_refreshes": self.partial_refreshes,
+            "missing_prices": self.missing_prices
+        }
+
+
+price_warmer = PriceWarmerService(RedisCacheService(), DefiLlamaService(chain="arbitrum"), CoinGeckoService())
@@ -0,0 +1,216 @@
+import bisect
+import math
+import time
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Optional, Tuple, Dict
+from config import (
+    QUOTE_CURVE_ENABLED, QUOTE_CURVE_MIN_USD, QUOTE_CURVE_MAX_USD, QUOTE_CURVE_POINTS_PER_DECADE,
+    QUOTE_CURVE_TOLERANCE, QUOTE_CURVE_MAX_AGE
+)
+from pools_config import TOKENS
+from token_manager import TokenManager
+from log_manager import get_logger
+from .local_quote_service import local_quote_service
+from .pool_state import aggregate_calls
+from .single_flight import single_flight
+
+logger = get_logger(__name__)
+
+token_manager = TokenManager(TOKENS)
+
+
+@dataclass(frozen=True)
+class QuoteCurve:
+    """amount_out(amount_in) puli w jednym kierunku: punkty drabinki (wei) rosnąco, z punktem (0, 0)."""
+    block_number: Optional[int]
+    created_at: float
+    amounts_in: Tuple[int, ...]
+    amounts_out: Tuple[int, ...]
+
+    def estimate(self, amount_in: int) -> Optional[Tuple[int, int]]:
+        """(amount_out z interpolacji, ograniczenie błędu) albo None poza zakresem drabinki.
+
+        Swap exact input w jednej puli jest rosnący i wklęsły: cięciwa między punktami
+        zaniża wynik, a proste przez sąsiednie odcinki go ograniczają z góry.
+        """
+        xs, ys = self.amounts_in, self.amounts_out
+        if amount_in <= 0 or amount_in > xs[-1]:
+            return None
+        i = bisect.bisect_left(xs, amount_in)
+        if xs[i] == amount_in:
+            return ys[i], 0
+
+        x0, y0, x1, y1 = xs[i - 1], ys[i - 1], xs[i], ys[i]
+        estimate = y0 + (y1 - y0) * (amount_in - x0) // (x1 - x0)
+
+        upper = None
+        if i >= 2:
+            # Styczna w x0 nie bardziej stroma niż odcinek poprzedni
+            upper = y0 + (y0 - ys[i - 2]) * (amount_in - x0) // (x0 - xs[i - 2])
+        if i + 1 < len(xs):
+            # Styczna w x1 nie mniej stroma niż odcinek następny
+            right = y1 - (ys[i + 1] - y1) * (x1 - amount_in) // (xs[i + 1] - x1)
+            upper = right if upper is None else min(upper, right)
+        if upper is None:
+            return None
+        return estimate, max(upper - estimate, 0)
+
+
+def amount_ladder(price_usd: float, decimals: int) -> Tuple[int, ...]:
+    """Kwoty tokena (wei) o wartości od QUOTE_CURVE_MIN_USD do QUOTE_CURVE_MAX_USD w skali log."""
+    decades = math.log10(QUOTE_CURVE_MAX_USD / QUOTE_CURVE_MIN_USD)
+    steps = max(1, math.ceil(decades * QUOTE_CURVE_POINTS_PER_DECADE))
+    ladder = {
+        int(QUOTE_CURVE_MIN_USD * 10 ** (decades * step / steps) / price_usd * 10 ** decimals)
+        for step in range(steps + 1)
+    }
+    return tuple(sorted(amount for amount in ladder if amount > 0))
+
+
+class QuoteCurveService:
+    """Krzywe quote per (DEX, para, token_from) odświeżane per blok; quote dowolnej kwoty bez Quotera."""
+
+    def __init__(self):
+        self._curves: Dict[Tuple[str, str, str], QuoteCurve] = {}
+        self._local_curves: Dict[Tuple[str, str, str], QuoteCurve] = {}
+        self.builds = 0
+        self.hits = 0
+        self.over_tolerance = 0
+        self.out_of_range = 0
+
+    def _fresh(self, key, block_number: Optional[int], curves: Optional[dict] = None) -> Optional[QuoteCurve]:
+        curve = (self._curves if curves is None else curves).get(key)
+        if curve is None:
+            return None
+        if block_number is not None:
+            return curve if curve.block_number == block_number else None
+        return curve if time.time() - curve.created_at <= QUOTE_CURVE_MAX_AGE else None
+
+    async def _build(self, key, dex_service, token_from: str, token_to: str, fee_tier: Optional[int],
+                     price_usd: float, block_number: Optional[int]) -> Optional[QuoteCurve]:
+        """Cała drabinka jednym tryAggregate (dla bloku snapshotu)."""
+        token_in_address = token_manager.get_address_by_symbol(token_from)
+        token_out_address = token_manager.get_address_by_symbol(token_to)
+        ladder = amount_ladder(price_usd, token_manager.get_decimals_by_symbol(token_from))
+        calls = [dex_service.quote_call(token_in_address, token_out_address, amount, fee_tier) for amount in ladder]
+        if not ladder or any(call is None for call in calls):
+            return None
+
+        try:
+            results = await aggregate_calls(calls, block_number if block_number is not None else "latest")
+        except Exception as e:
+            logger.warning("Błąd pobierania krzywej quote %s: %s", key, e)
+            return None
+
+        points = [(0, 0)]
+        for amount, (success, data) in zip(ladder, results):
+            # Kwoty ponad płynność puli revertują - krzywa kończy się na ostatnim udanym punkcie
+            if not success or len(data) < 32:
+                break
+            amount_out = dex_service.decode_quote(data)
+            if amount_out <= points[-1][1]:
+                break
+            points.append((amount, amount_out))
+        if len(points) < 3:
+            return None
+
+        self.builds += 1
+        curve = QuoteCurve(
+            block_number=block_number,
+            created_at=time.time(),
+            amounts_in=tuple(x for x, _ in points),
+            amounts_out=tuple(y for _, y in points)
+        )
+        self._curves[key] = curve
+        logger.debug("Krzywa quote %s: %s punktów, blok %s", key, len(points) - 1, block_number)
+        return curve
+
+    def _build_local(self, key, snapshot, price_usd: float) -> Optional[QuoteCurve]:
+        """Drabinka z lokalnej symulacji ticków snapshotu (bez I/O); kończy się na granicy załadowanych ticków."""
+        dex_name, pair, token_from = key
+        points = [(0, 0)]
+        for amount in amount_ladder(price_usd, token_manager.get_decimals_by_symbol(token_from)):
+            result = local_quote_service.simulate(snapshot, dex_name, pair, token_from, amount, quiet=True)
+            if result is None or result.amount_in != amount or result.amount_out <= points[-1][1]:
+                break
+            points.append((amount, result.amount_out))
+        if len(points) < 3:
+            return None
+        curve = QuoteCurve(
+            block_number=snapshot.block_number,
+            created_at=time.time(),
+            amounts_in=tuple(x for x, _ in points),
+            amounts_out=tuple(y for _, y in points)
+        )
+        self._local_curves[key] = curve
+        return curve
+
+    async def get_curve(self, dex_name: str, pair: str, dex_service, token_from: str, token_to: str, amount_in_wei: int,
+                        all_prices: dict, fee_tier: Optional[int], snapshot=None) -> Optional[QuoteCurve]:
+        """Krzywa obejmująca amount_in_wei: z cache, z ticków snapshotu, a w ostateczności z Quotera (jeden batch)."""
+        price_usd = float(all_prices.get(token_manager.get_address_by_symbol(token_from), 0) or 0)
+        if price_usd <= 0:
+            return None
+        key = (dex_name, pair, token_from)
+        block_number = snapshot.block_number if snapshot is not None else None
+
+        curve = self._fresh(key, block_number)
+        if curve is not None:
+            return curve
+        if snapshot is not None:
+            curve = self._fresh(key, block_number, self._local_curves) or self._build_local(key, snapshot, price_usd)
+            if curve is not None and curve.amounts_in[-1] >= amount_in_wei:
+                return curve
+        return await single_flight.do(
+            f"curve:{dex_name}:{pair}:{token_from}:{block_number}",
+            lambda: self._build(key, dex_service, token_from, token_to, fee_tier, price_usd, block_number),
+            "quote_curve"
+        )
+
+    async def quote_exact_in(self, dex_name: str, pair: str, dex_service, token_from: str, token_to: str,
+                             amount_in: Decimal, all_prices: dict, fee_tier: Optional[int], snapshot=None) -> Optional[Decimal]:
+        """amount_out z krzywej albo None (poza drabinką / błąd ponad tolerancję - użyj dokładnego Quotera)."""
+        if not QUOTE_CURVE_ENABLED:
+            return None
+        price_usd = float(all_prices.get(token_manager.get_address_by_symbol(token_from), 0) or 0)
+        if price_usd <= 0:
+            return None
+
+        key = (dex_name, pair, token_from)
+        block_number = snapshot.block_number if snapshot is not None else None
+        curve = self._fresh(key, block_number)
+        if curve is None:
+            curve = await single_flight.do(
+                f"curve:{dex_name}:{pair}:{token_from}:{block_number}",
+                lambda: self._build(key, dex_service, token_from, token_to, fee_tier, price_usd, block_number),
+                "quote_curve"
+            )
+        if curve is None:
+            return None
+
+        amount_in_wei = int(amount_in * Decimal(10 ** token_manager.get_decimals_by_symbol(token_from)))
+        result = curve.estimate(amount_in_wei)
+        if result is None:
+            self.out_of_range += 1
+            return None
+        amount_out_wei, error = result
+        if amount_out_wei <= 0 or error > amount_out_wei * QUOTE_CURVE_TOLERANCE:
+            self.over_tolerance += 1
+            return None
+
+        self.hits += 1
+        return Decimal(amount_out_wei) / Decimal(10 ** token_manager.get_decimals_by_symbol(token_to))
+
+    def stats(self) -> dict:
+        return {
+            "curves": len(self._curves),
+            "local_curves": len(self._local_curves),
+            "builds": self.builds,
+            "hits": self.hits,
+            "over_tolerance": self.over_tolerance,
+            "out_of_range": self.out_of_range
+        }
+
+
+quote_curve_service = QuoteCurveService()
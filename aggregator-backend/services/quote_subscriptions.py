@@ -0,0 +1,116 @@
+import asyncio
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Dict, Optional, Set, Tuple
+from config import SUBSCRIPTION_POLL_INTERVAL, SUBSCRIPTION_MAX_CONCURRENCY
+from log_manager import get_logger
+from .pool_snapshot_service import pool_snapshot_service
+from .single_flight import single_flight
+
+logger = get_logger(__name__)
+
+SubscriptionKey = Tuple[str, str, float]
+
+
+def subscription_key(token_from: str, token_to: str, amount: float) -> SubscriptionKey:
+    return token_from.upper(), token_to.upper(), float(amount)
+
+
+class QuoteSubscriptionService:
+    """Subskrypcje (token_from, token_to, amount): jedno przeliczenie na blok per klucz, push tylko zmienionych rankingów."""
+
+    def __init__(self, compute: Callable[[SubscriptionKey], Awaitable[Dict[str, Any]]]):
+        self.compute = compute
+        self._subscribers: Dict[SubscriptionKey, Set[asyncio.Queue]] = defaultdict(set)
+        self._last: Dict[SubscriptionKey, Dict[str, Any]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._semaphore = asyncio.Semaphore(SUBSCRIPTION_MAX_CONCURRENCY)
+        self.computations = 0
+        self.pushes = 0
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            logger.info("Uruchomiono subskrypcje quote (przeliczenie per blok)")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def subscribe(self, key: SubscriptionKey, queue: asyncio.Queue) -> None:
+        """Dodaje subskrybenta; ostatni wynik dla klucza wysyłany od razu, klucz bez wyniku liczony od razu."""
+        self._subscribers[key].add(queue)
+        if key in self._last:
+            self._send(queue, self._last[key])
+        else:
+            # Także gdy poprzednie obliczenie klucza się nie powiodło (współbieżne - jedno dzięki single-flight)
+            await self._refresh(key)
+
+    def unsubscribe(self, key: SubscriptionKey, queue: asyncio.Queue) -> None:
+        subscribers = self._subscribers.get(key)
+        if subscribers is None:
+            return
+        subscribers.discard(queue)
+        if not subscribers:
+            del self._subscribers[key]
+            self._last.pop(key, None)
+
+    def unsubscribe_all(self, queue: asyncio.Queue) -> None:
+        for key in list(self._subscribers):
+            self.unsubscribe(key, queue)
+
+    def _send(self, queue: asyncio.Queue, message: Dict[str, Any]) -> None:
+        # Wolny klient dostaje najnowszy stan - najstarsze wiadomości są odrzucane
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(message)
+
+    async def _refresh(self, key: SubscriptionKey) -> None:
+        """Przelicza klucz i wysyła wynik wszystkim subskrybentom, o ile ranking się zmienił."""
+        async with self._semaphore:
+            try:
+                # Subskrypcja nowego klucza w trakcie przeliczenia bloku - jedno obliczenie
+                message = await single_flight.do(f"subscription:{key}", lambda: self.compute(key), "subscription")
+            except Exception as e:
+                logger.warning("Błąd przeliczenia subskrypcji %s: %s", key, e)
+                return
+        self.computations += 1
+        previous = self._last.get(key)
+        if key not in self._subscribers:
+            return
+        if previous is not None and previous.get("options") == message.get("options") and previous.get("event") == message.get("event"):
+            return
+        self._last[key] = message
+        for queue in list(self._subscribers.get(key, ())):
+            self._send(queue, message)
+            self.pushes += 1
+
+    async def _run(self):
+        last_block = None
+        while True:
+            try:
+                snapshot = await pool_snapshot_service.wait_for_update(SUBSCRIPTION_POLL_INTERVAL)
+                block_number = snapshot.block_number if snapshot else None
+                # Bez snapshotu (SNAPSHOT_ENABLED=0) - przeliczenie co SUBSCRIPTION_POLL_INTERVAL
+                if block_number is not None and block_number == last_block:
+                    continue
+                last_block = block_number
+                if self._subscribers:
+                    await asyncio.gather(*(self._refresh(key) for key in list(self._subscribers)))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Błąd pętli subskrypcji quote: %s", e)
+                await asyncio.sleep(SUBSCRIPTION_POLL_INTERVAL)
+
+    def stats(self) -> dict:
+        return {
+            "keys": len(self._subscribers),
+            "subscribers": sum(len(queues) for queues in self._subscribers.values()),
+            "computations": self.computations,
+            "pushes": self.pushes
+        }
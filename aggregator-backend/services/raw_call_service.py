@@ -0,0 +1,195 @@
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+from eth_abi.decoding import ContextFramesBytesIO
+from eth_abi.registry import registry
+from web3 import Web3
+from config import w3, async_w3
+from .metrics_service import UPSTREAM_REQUESTS, UPSTREAM_ERRORS
+
+BlockIdentifier = Union[str, int]
+
+
+@dataclass(frozen=True, slots=True)
+class AbiFunction:
+    """Funkcja kontraktu ze skompilowanym selektorem i kodekami eth_abi (bez obiektu kontraktu web3)."""
+    signature: str
+    input_types: Tuple[str, ...] = ()
+    output_types: Tuple[str, ...] = ()
+    selector: bytes = field(init=False)
+    _encoder: Optional[Callable] = field(init=False, repr=False)
+    _decoder: Callable = field(init=False, repr=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "selector", bytes(Web3.keccak(text=self.signature)[:4]))
+        object.__setattr__(self, "_encoder", registry.get_encoder(f"({','.join(self.input_types)})") if self.input_types else None)
+        object.__setattr__(self, "_decoder", registry.get_decoder(f"({','.join(self.output_types)})"))
+
+    def encode(self, *args: Any) -> bytes:
+        """Calldata: selektor + argumenty (adresy jako hex, checksum niewymagany dla małych liter)."""
+        if self._encoder is None:
+            return self.selector
+        return self.selector + self._encoder(args)
+
+    def decode(self, data: bytes) -> Tuple[Any, ...]:
+        """Wynik wywołania; nadmiarowe słowa (pola niepotrzebne do wyceny) są pomijane."""
+        return self._decoder(ContextFramesBytesIO(data))
+
+
+# Odczyty stanu pul (output_types - tylko prefiks potrzebnych pól)
+SLOT0 = AbiFunction("slot0()", output_types=("uint160", "int24"))
+GLOBAL_STATE = AbiFunction("globalState()", output_types=("uint160", "int24", "uint16", "uint16"))
+FEE = AbiFunction("fee()", output_types=("uint24",))
+LIQUIDITY = AbiFunction("liquidity()", output_types=("uint128",))
+TICK_SPACING = AbiFunction("tickSpacing()", output_types=("int24",))
+TOKEN0 = AbiFunction("token0()", output_types=("address",))
+TOKEN1 = AbiFunction("token1()", output_types=("address",))
+BALANCE_OF = AbiFunction("balanceOf(address)", ("address",), ("uint256",))
+
+# Quotery (amountOut zawsze w pierwszym słowie wyniku)
+UNISWAP_QUOTE_EXACT_INPUT_SINGLE = AbiFunction(
+    "quoteExactInputSingle(address,address,uint24,uint256,uint160)",
+    ("address", "address", "uint24", "uint256", "uint160"), ("uint256",)
+)
+SUSHISWAP_QUOTE_EXACT_INPUT_SINGLE = AbiFunction(
+    "quoteExactInputSingle((address,address,uint256,uint24,uint160))",
+    ("(address,address,uint256,uint24,uint160)",), ("uint256", "uint160", "uint32", "uint256")
+)
+CAMELOT_QUOTE_EXACT_INPUT_SINGLE = AbiFunction(
+    "quoteExactInputSingle(address,address,uint256,uint160)",
+    ("address", "address", "uint256", "uint160"), ("uint256", "uint16")
+)
+
+# Routery (exactInputSingle do eth_estimateGas)
+V3_EXACT_INPUT_SINGLE = AbiFunction(
+    "exactInputSingle((address,address,uint24,address,uint256,uint256,uint256,uint160))",
+    ("(address,address,uint24,address,uint256,uint256,uint256,uint160)",), ("uint256",)
+)
+ALGEBRA_EXACT_INPUT_SINGLE = AbiFunction(
+    "exactInputSingle((address,address,address,uint256,uint256,uint256,uint160))",
+    ("(address,address,address,uint256,uint256,uint256,uint160)",), ("uint256",)
+)
+
+# Prekompilaty Arbitrum: ArbGasInfo (ceny gazu w wei) i NodeInterface (gaz komponentu L1 transakcji)
+GET_PRICES_IN_WEI = AbiFunction("getPricesInWei()", output_types=("uint256",) * 6)
+GAS_ESTIMATE_L1_COMPONENT = AbiFunction(
+    "gasEstimateL1Component(address,bool,bytes)", ("address", "bool", "bytes"), ("uint64", "uint256", "uint256")
+)
+
+# Multicall3
+TRY_AGGREGATE = AbiFunction(
+    "tryAggregate(bool,(address,bytes)[])", ("bool", "(address,bytes)[]"), ("(bool,bytes)[]",)
+)
+
+
+class RawCallError(ValueError):
+    """Błąd JSON-RPC (revert, brak wyniku) z surowego wywołania."""
+
+
+def _block_param(block_identifier: BlockIdentifier) -> str:
+    return hex(block_identifier) if isinstance(block_identifier, int) else block_identifier
+
+
+def _result(method: str, response: Dict[str, Any]) -> Any:
+    UPSTREAM_REQUESTS.inc("rpc")
+    if "error" in response:
+        UPSTREAM_ERRORS.inc("rpc")
+        raise RawCallError(f"{method}: {response['error']}")
+    if response.get("result") is None:
+        UPSTREAM_ERRORS.inc("rpc")
+        raise RawCallError(f"{method}: brak wyniku")
+    return response["result"]
+
+
+def _transport_error() -> None:
+    """Błąd połączenia z węzłem (bez odpowiedzi JSON-RPC)."""
+    UPSTREAM_REQUESTS.inc("rpc")
+    UPSTREAM_ERRORS.inc("rpc")
+
+
+def _request(method: str, params: list) -> Any:
+    try:
+        response = w3.provider.make_request(method, params)
+    except Exception:
+        _transport_error()
+        raise
+    return _result(method, response)
+
+
+async def _request_async(method: str, params: list) -> Any:
+    try:
+        response = await async_w3.provider.make_request(method, params)
+    except Exception:
+        _transport_error()
+        raise
+    return _result(method, response)
+
+
+class RawCallService:
+    """eth_call / eth_estimateGas bezpośrednio przez provider - bez obiektów kontraktu i middleware web3."""
+
+    def call(self, to: str, data: bytes, block_identifier: BlockIdentifier = "latest") -> bytes:
+        return bytes.fromhex(_request(*call_request(to, data, block_identifier))[2:])
+
+    async def call_async(self, to: str, data: bytes, block_identifier: BlockIdentifier = "latest") -> bytes:
+        return bytes.fromhex((await _request_async(*call_request(to, data, block_identifier)))[2:])
+
+    def read(self, to: str, function: AbiFunction, *args: Any, block_identifier: BlockIdentifier = "latest") -> Tuple[Any, ...]:
+        """Wywołanie view zdekodowane kodekiem funkcji."""
+        return function.decode(self.call(to, function.encode(*args), block_identifier))
+
+    async def read_async(self, to: str, function: AbiFunction, *args: Any, block_identifier: BlockIdentifier = "latest") -> Tuple[Any, ...]:
+        return function.decode(await self.call_async(to, function.encode(*args), block_identifier))
+
+    def estimate_gas(self, tx: Dict[str, Any]) -> int:
+        return int(_request("eth_estimateGas", [tx_param(tx)]), 16)
+
+    async def estimate_gas_async(self, tx: Dict[str, Any]) -> int:
+        return int(await _request_async("eth_estimateGas", [tx_param(tx)]), 16)
+
+    def batch(self, requests: List[Tuple[str, list]]) -> List[Any]:
+        """Wiele żądań JSON-RPC jednym POST; per żądanie wynik albo RawCallError."""
+        try:
+            responses = w3.provider.make_batch_request(requests)
+        except Exception:
+            _transport_error()
+            raise
+        return _batch_results(requests, responses)
+
+    async def batch_async(self, requests: List[Tuple[str, list]]) -> List[Any]:
+        try:
+            responses = await async_w3.provider.make_batch_request(requests)
+        except Exception:
+            _transport_error()
+            raise
+        return _batch_results(requests, responses)
+
+
+def call_request(to: str, data: bytes, block_identifier: BlockIdentifier = "latest") -> Tuple[str, list]:
+    """Żądanie eth_call (np. do batch)."""
+    return "eth_call", [{"to": to, "data": "0x" + data.hex()}, _block_param(block_identifier)]
+
+
+def tx_param(tx: Dict[str, Any]) -> Dict[str, str]:
+    """Transakcja (data jako bytes) w formacie JSON-RPC."""
+    return {
+        "from": tx["from"],
+        "to": tx["to"],
+        "data": "0x" + tx["data"].hex(),
+        "value": hex(tx.get("value", 0))
+    }
+
+
+def _batch_results(requests: List[Tuple[str, list]], responses) -> List[Any]:
+    if not isinstance(responses, list):
+        _transport_error()
+        raise RawCallError(f"batch: {responses.get('error')}")
+    results = []
+    for (method, _), response in zip(requests, responses):
+        try:
+            results.append(_result(method, response))
+        except RawCallError as e:
+            results.append(e)
+    return results
+
+
+raw_call_service = RawCallService()
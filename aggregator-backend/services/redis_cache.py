@@ -1,24 +1,57 @@
-from typing import Optional
+from typing import Optional, List, Dict, Tuple
 from decimal import Decimal
 from interfaces import ICacheService
+from config import CACHE_INVALIDATION_CHANNEL
+from log_manager import get_logger
+from .local_cache import local_cache, l1_ttl, invalidation_message, key_class
+from .metrics_service import CACHE_LOOKUPS
 from .redis_service import redis_service
 
+logger = get_logger(__name__)
+
 class RedisCacheService(ICacheService):
-    """Serwis obsługujący cache w Redis."""
+    """Serwis obsługujący cache w Redis z lokalnym L1 (TTL+LRU) w pamięci procesu."""
 
     async def get_cached_price(self, key: str) -> Optional[float]:
-        """Pobiera wartość z Redis."""
-        price = await redis_service.get(key)
-        if price:
-            print(f"Znaleziono cenę w Redis: {price}")
-        else:
-            print(f"Nie znaleziono ceny w Redis")
-        return float(price) if price else None
+        """Pobiera wartość z L1 albo z Redis."""
+        return (await self.get_cached_prices([key]))[key]
 
     async def set_cached_price(self, key: str, value: Decimal, ttl: int = 60) -> None:
-        """Zapisuje wartość w Redis."""
-        success = await redis_service.set(key, float(value), ex=ttl)
+        """Zapisuje wartość w Redis i L1."""
+        await self.set_cached_prices({key: (value, ttl)})
+
+    async def get_cached_prices(self, keys: List[str]) -> Dict[str, Optional[float]]:
+        """Wartości z L1; brakujące z Redis jednym pipeline (MGET + PTTL)."""
+        result = {key: local_cache.get(key) for key in keys}
+        missing = [key for key, value in result.items() if value is None]
+        for key, value in result.items():
+            if value is not None:
+                CACHE_LOOKUPS.inc(key_class(key), "l1_hit")
+        if not missing:
+            return result
+
+        for key, (value, redis_ttl) in zip(missing, await redis_service.mget_with_ttl(missing)):
+            if value:
+                result[key] = float(value)
+                # L1 nie przeżyje wpisu w Redis
+                local_cache.set(key, result[key], l1_ttl(key, redis_ttl))
+        hits = 0
+        for key in missing:
+            hit = result[key] is not None
+            hits += hit
+            CACHE_LOOKUPS.inc(key_class(key), "redis_hit" if hit else "miss")
+        logger.debug("Cache: %s z L1, %s/%s z Redis", len(keys) - len(missing), hits, len(missing))
+        return result
+
+    async def set_cached_prices(self, items: Dict[str, Tuple[Decimal, int]]) -> None:
+        """Zapisuje wiele wartości w Redis jednym pipeline i unieważnia je w L1 pozostałych workerów."""
+        for key, (value, ttl) in items.items():
+            local_cache.set(key, float(value), l1_ttl(key, ttl))
+        success = await redis_service.set_many(
+            [(key, float(value), ttl) for key, (value, ttl) in items.items()],
+            publish=(CACHE_INVALIDATION_CHANNEL, invalidation_message(items))
+        )
         if success:
-            print(f"Zapisano cenę {value} w Redis dla {key}")
+            logger.debug("Zapisano %s wartości w Redis (pipeline)", len(items))
         else:
-            print(f"Błąd podczas zapisywania ceny {value} w Redis dla {key}")
+            logger.warning("Błąd podczas zapisywania %s wartości w Redis (pipeline)", len(items))
@@ -1,135 +1,278 @@
-import redis.asyncio as redis
-from typing import Optional, Any
-from config import REDIS_URL
 import asyncio
+import redis.asyncio as redis
+from redis.exceptions import ConnectionError as RedisConnectionError, TimeoutError as RedisTimeoutError
+from typing import Optional, Any, List, Tuple
+from config import REDIS_URL, REDIS_MAX_CONNECTIONS, REDIS_POOL_TIMEOUT, REDIS_RETRY_MAX, REDIS_FALLBACK_MAX_SIZE
 from contextlib import asynccontextmanager
+from log_manager import get_logger
+from .metrics_service import STAGE_SECONDS, UPSTREAM_REQUESTS, UPSTREAM_ERRORS, REDIS_POOL_TIMEOUTS
+from .ttl_cache import TTLCache
+import time
+
+logger = get_logger(__name__)
+
+_CONNECTION_ERRORS = (RedisConnectionError, RedisTimeoutError, OSError)
+
+
+def _is_pool_exhausted(error: Exception) -> bool:
+    """BlockingConnectionPool bez wolnego połączenia po timeout - ConnectionError z asyncio.TimeoutError jako przyczyną."""
+    return isinstance(error, RedisConnectionError) and isinstance(error.__cause__, asyncio.TimeoutError)
+
+
+# TTL wpisów lokalnego cache awaryjnego dla zapisów bez EX
+FALLBACK_DEFAULT_TTL = 60
 
 class RedisService:
     """
-    Singleton serwis Redis zarządzający jednym połączeniem dla całej aplikacji.
+    Singleton serwis Redis z pulą połączeń współdzieloną przez całą aplikację.
+    Bez PING przed operacją: połączenia odtwarzane leniwie po błędzie. Gdy Redis jest
+    niedostępny - tryb awaryjny (lokalny cache) i ponowna próba dopiero po backoffie.
+    Wyczerpana pula (timeout oczekiwania na połączenie) nie włącza trybu awaryjnego.
     """
-    
+
     _instance = None
-    _client: Optional[redis.Redis] = None
-    _lock = asyncio.Lock()
-    
+
     def __new__(cls):
         if cls._instance is None:
-            cls._instance = super(RedisService, cls).__new__(cls)
+            instance = super(RedisService, cls).__new__(cls)
+            instance._pool = None
+            instance._client = None
+            instance._backoff = 0.0
+            instance._retry_at = 0.0
+            instance.degraded = False
+            instance.reconnects = 0
+            instance.connection_errors = 0
+            instance.pool_timeouts = 0
+            instance.fallback = TTLCache(REDIS_FALLBACK_MAX_SIZE)
+            cls._instance = instance
         return cls._instance
-    
-    async def _ensure_connection(self) -> redis.Redis:
-        """Zapewnia aktywne połączenie z Redis."""
+
+    def _get_client(self) -> Optional[redis.Redis]:
+        """Klient puli albo None, gdy tryb awaryjny i backoff jeszcze trwa."""
+        if self.degraded and time.monotonic() < self._retry_at:
+            return None
         if self._client is None:
-            async with self._lock:
-                if self._client is None:
-                    self._client = redis.from_url(
-                        REDIS_URL, 
-                        decode_responses=True,
-                        socket_connect_timeout=5,
-                        socket_timeout=10,
-                        health_check_interval=30,
-                        retry_on_timeout=True
-                    )
-                    try:
-                        await self._client.ping()
-                        print(f"Utworzono nowe połączenie z Redis: {REDIS_URL}")
-                    except Exception as e:
-                        print(f"Błąd połączenia z Redis: {e}")
-                        self._client = None
-                        raise
-        else:
-            try:
-                await self._client.ping()
-            except Exception:
-                async with self._lock:
-                    try:
-                        if self._client:
-                            await self._client.close()
-                    except Exception:
-                        pass
-                    
-                    self._client = redis.from_url(
-                        REDIS_URL, 
-                        decode_responses=True,
-                        socket_connect_timeout=5,
-                        socket_timeout=10,
-                        health_check_interval=30,
-                        retry_on_timeout=True
-                    )
-                    await self._client.ping()
-                    print(f"Odtworzono połączenie z Redis: {REDIS_URL}")
-        
+            self._pool = redis.BlockingConnectionPool.from_url(
+                REDIS_URL,
+                max_connections=REDIS_MAX_CONNECTIONS,
+                timeout=REDIS_POOL_TIMEOUT,
+                decode_responses=True,
+                socket_connect_timeout=5,
+                socket_timeout=10,
+                health_check_interval=30,
+                retry_on_timeout=True
+            )
+            self._client = redis.Redis(connection_pool=self._pool)
         return self._client
-    
+
+    def _on_success(self) -> None:
+        UPSTREAM_REQUESTS.inc("redis")
+        if self.degraded:
+            self.degraded = False
+            self._backoff = 0.0
+            self.reconnects += 1
+            logger.info("Redis znowu dostępny - koniec trybu awaryjnego (reconnect #%s)", self.reconnects)
+
+    def _on_connection_error(self, error: Exception) -> None:
+        if _is_pool_exhausted(error):
+            # Redis działa, tylko pula jest zajęta - to wywołanie z lokalnego cache, bez trybu awaryjnego
+            self.pool_timeouts += 1
+            REDIS_POOL_TIMEOUTS.inc()
+            logger.debug("Brak wolnego połączenia w puli Redis po %ss - lokalny cache", REDIS_POOL_TIMEOUT)
+            return
+        self._on_command_error()
+        self.connection_errors += 1
+        self._backoff = min(max(self._backoff * 2, 1.0), REDIS_RETRY_MAX)
+        self._retry_at = time.monotonic() + self._backoff
+        if not self.degraded:
+            logger.warning("Redis niedostępny (%s) - tryb awaryjny z lokalnym cache", error)
+        self.degraded = True
+
+    def _on_command_error(self) -> None:
+        UPSTREAM_REQUESTS.inc("redis")
+        UPSTREAM_ERRORS.inc("redis")
+
     async def connect(self) -> bool:
-        """Publiczna metoda do inicjalizacji połączenia."""
+        """Publiczna metoda do inicjalizacji puli (jeden PING przy starcie)."""
+        client = self._get_client()
+        if client is None:
+            return False
         try:
-            await self._ensure_connection()
+            await client.ping()
+            self._on_success()
+            logger.info("Utworzono pulę połączeń z Redis: %s (max %s)", REDIS_URL, REDIS_MAX_CONNECTIONS)
             return True
-        except Exception as e:
-            print(f"Błąd podczas łączenia z Redis: {e}")
+        except _CONNECTION_ERRORS as e:
+            self._on_connection_error(e)
             return False
-    
+
     async def get(self, key: str) -> Optional[str]:
-        """Pobiera wartość z Redis."""
-        try:
-            client = await self._ensure_connection()
-            return await client.get(key)
-        except Exception as e:
-            print(f"Błąd podczas pobierania z Redis: {e}")
-            return None
-    
+        """Pobiera wartość z Redis (w trybie awaryjnym z lokalnego cache)."""
+        client = self._get_client()
+        if client is not None:
+            try:
+                with STAGE_SECONDS.time("redis_get", "", ""):
+                    value = await client.get(key)
+                self._on_success()
+                return value
+            except _CONNECTION_ERRORS as e:
+                self._on_connection_error(e)
+            except Exception as e:
+                self._on_command_error()
+                logger.warning("Błąd podczas pobierania z Redis: %s", e)
+                return None
+        return self.fallback.get(key)
+
     async def set(self, key: str, value: Any, ex: Optional[int] = None) -> bool:
-        """Zapisuje wartość w Redis."""
+        """Zapisuje wartość w Redis (i w lokalnym cache awaryjnym)."""
+        self.fallback.set(key, str(value), ex or FALLBACK_DEFAULT_TTL)
+        client = self._get_client()
+        if client is None:
+            return False
         try:
-            client = await self._ensure_connection()
-            result = await client.set(key, value, ex=ex)
+            with STAGE_SECONDS.time("redis_set", "", ""):
+                result = await client.set(key, value, ex=ex)
+            self._on_success()
             return bool(result)
+        except _CONNECTION_ERRORS as e:
+            self._on_connection_error(e)
         except Exception as e:
-            print(f"Błąd podczas zapisywania w Redis: {e}")
+            self._on_command_error()
+            logger.warning("Błąd podczas zapisywania w Redis: %s", e)
+        return False
+
+    async def mget_with_ttl(self, keys: List[str]) -> List[Tuple[Optional[str], Optional[float]]]:
+        """MGET + PTTL kluczy w jednym pipeline; zwraca (wartość, pozostały TTL w sekundach)."""
+        if not keys:
+            return []
+        client = self._get_client()
+        if client is not None:
+            try:
+                async with client.pipeline(transaction=False) as pipe:
+                    pipe.mget(keys)
+                    for key in keys:
+                        pipe.pttl(key)
+                    with STAGE_SECONDS.time("redis_get", "", ""):
+                        values, *pttls = await pipe.execute()
+                self._on_success()
+                return [
+                    (value, pttl / 1000 if pttl is not None and pttl >= 0 else None)
+                    for value, pttl in zip(values, pttls)
+                ]
+            except _CONNECTION_ERRORS as e:
+                self._on_connection_error(e)
+            except Exception as e:
+                self._on_command_error()
+                logger.warning("Błąd podczas MGET z Redis: %s", e)
+                return [(None, None)] * len(keys)
+        return [self.fallback.get_with_ttl(key) for key in keys]
+
+    async def set_many(self, items: List[Tuple[str, Any, Optional[int]]], publish: Optional[Tuple[str, str]] = None) -> bool:
+        """Zapisuje wiele wartości jednym pipeline (SET ... EX), bez transakcji; opcjonalnie PUBLISH w tym samym pipeline."""
+        if not items:
+            return True
+        for key, value, ex in items:
+            self.fallback.set(key, str(value), ex or FALLBACK_DEFAULT_TTL)
+        client = self._get_client()
+        if client is None:
             return False
-    
-    async def exists(self, key: str) -> bool:
-        """Sprawdza czy klucz istnieje w Redis."""
         try:
-            client = await self._ensure_connection()
-            result = await client.exists(key)
-            return bool(result)
+            async with client.pipeline(transaction=False) as pipe:
+                for key, value, ex in items:
+                    pipe.set(key, value, ex=ex)
+                if publish is not None:
+                    pipe.publish(*publish)
+                with STAGE_SECONDS.time("redis_set", "", ""):
+                    results = await pipe.execute()
+            self._on_success()
+            return all(results[:len(items)])
+        except _CONNECTION_ERRORS as e:
+            self._on_connection_error(e)
         except Exception as e:
-            print(f"Błąd podczas sprawdzania istnienia klucza w Redis: {e}")
-            return False
-    
+            self._on_command_error()
+            logger.warning("Błąd podczas zapisu pipeline w Redis: %s", e)
+        return False
+
+    async def exists(self, key: str) -> bool:
+        """Sprawdza czy klucz istnieje w Redis."""
+        client = self._get_client()
+        if client is not None:
+            try:
+                result = await client.exists(key)
+                self._on_success()
+                return bool(result)
+            except _CONNECTION_ERRORS as e:
+                self._on_connection_error(e)
+            except Exception as e:
+                self._on_command_error()
+                logger.warning("Błąd podczas sprawdzania istnienia klucza w Redis: %s", e)
+                return False
+        return self.fallback.get(key) is not None
+
     async def delete(self, key: str) -> bool:
         """Usuwa klucz z Redis."""
+        self.fallback.invalidate([key])
+        client = self._get_client()
+        if client is None:
+            return False
         try:
-            client = await self._ensure_connection()
             result = await client.delete(key)
+            self._on_success()
             return bool(result)
+        except _CONNECTION_ERRORS as e:
+            self._on_connection_error(e)
         except Exception as e:
-            print(f"Błąd podczas usuwania klucza z Redis: {e}")
-            return False
-    
+            self._on_command_error()
+            logger.warning("Błąd podczas usuwania klucza z Redis: %s", e)
+        return False
+
     async def close(self):
-        """Zamyka połączenie z Redis."""
+        """Zamyka klienta i pulę połączeń."""
         if self._client:
             try:
-                await self._client.close()
-                self._client = None
-                print("Zamknięto połączenie z Redis")
+                await self._client.aclose()
+                await self._pool.disconnect()
+                logger.info("Zamknięto połączenie z Redis")
             except Exception as e:
-                print(f"Błąd podczas zamykania połączenia Redis: {e}")
+                logger.warning("Błąd podczas zamykania połączenia Redis: %s", e)
+            finally:
                 self._client = None
-    
+                self._pool = None
+
     @asynccontextmanager
     async def get_client(self):
         """Context manager do bezpośredniego dostępu do klienta Redis."""
-        client = await self._ensure_connection()
+        client = self._get_client()
+        if client is None:
+            raise RedisConnectionError("Redis w trybie awaryjnym")
         try:
             yield client
+        except _CONNECTION_ERRORS as e:
+            self._on_connection_error(e)
+            raise
         except Exception as e:
-            print(f"Błąd w kontekście Redis: {e}")
+            logger.warning("Błąd w kontekście Redis: %s", e)
             raise
 
+    def stats(self) -> dict:
+        """Wykorzystanie puli, reconnecty i stan trybu awaryjnego."""
+        pool = self._pool
+        # Wewnętrzne listy puli redis-py (brak publicznego API do liczników)
+        in_use = len(pool._in_use_connections) if pool else 0
+        idle = len(pool._available_connections) if pool else 0
+        return {
+            "degraded": self.degraded,
+            "reconnects": self.reconnects,
+            "connection_errors": self.connection_errors,
+            "pool": {
+                "max_connections": REDIS_MAX_CONNECTIONS,
+                "in_use": in_use,
+                "idle": idle,
+                "utilization": round(in_use / REDIS_MAX_CONNECTIONS, 3) if REDIS_MAX_CONNECTIONS else 0,
+                "timeouts": self.pool_timeouts
+            },
+            "fallback_cache": self.fallback.stats()
+        }
+
 
 redis_service = RedisService()
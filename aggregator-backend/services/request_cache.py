@@ -0,0 +1,62 @@
+import asyncio
+from decimal import Decimal
+from typing import Optional, List, Dict, Tuple, Iterable, Set
+from interfaces import ICacheService
+from log_manager import get_logger
+
+logger = get_logger(__name__)
+
+# Referencje do zadań zapisu w tle (żeby nie zostały zebrane przez GC przed końcem)
+_pending_flushes: Set[asyncio.Task] = set()
+
+
+class RequestCacheService(ICacheService):
+    """Cache jednego żądania: odczyty z jednego MGET, zapisy buforowane i wysyłane jednym pipeline."""
+
+    def __init__(self, backend: ICacheService):
+        self.backend = backend
+        self._values: Dict[str, Optional[float]] = {}
+        self._writes: Dict[str, Tuple[Decimal, int]] = {}
+
+    async def prefetch(self, keys: Iterable[str]) -> None:
+        """Pobiera wszystkie znane z góry klucze żądania jednym MGET."""
+        missing = [key for key in dict.fromkeys(keys) if key not in self._values]
+        if not missing:
+            return
+        self._values.update(await self.backend.get_cached_prices(missing))
+        hits = sum(1 for key in missing if self._values[key] is not None)
+        logger.debug("Redis MGET: %s/%s kluczy w cache", hits, len(missing))
+
+    async def get_cached_price(self, key: str) -> Optional[float]:
+        """Wartość z prefetch/bufora zapisów; klucz spoza prefetch - pojedynczy GET."""
+        if key not in self._values:
+            self._values[key] = await self.backend.get_cached_price(key)
+        return self._values[key]
+
+    async def get_cached_prices(self, keys: List[str]) -> Dict[str, Optional[float]]:
+        await self.prefetch(keys)
+        return {key: self._values[key] for key in keys}
+
+    async def set_cached_price(self, key: str, value: Decimal, ttl: int = 60) -> None:
+        """Zapis do bufora (write-behind) - widoczny od razu w tym żądaniu."""
+        self._values[key] = float(value)
+        self._writes[key] = (value, ttl)
+
+    async def set_cached_prices(self, items: Dict[str, Tuple[Decimal, int]]) -> None:
+        for key, (value, ttl) in items.items():
+            await self.set_cached_price(key, value, ttl)
+
+    async def flush(self) -> None:
+        """Wysyła zbuforowane zapisy jednym pipeline SET ... EX."""
+        if not self._writes:
+            return
+        writes, self._writes = self._writes, {}
+        await self.backend.set_cached_prices(writes)
+
+    def flush_in_background(self) -> None:
+        """Flush po zakończeniu żądania, bez blokowania odpowiedzi."""
+        if not self._writes:
+            return
+        task = asyncio.create_task(self.flush())
+        _pending_flushes.add(task)
+        task.add_done_callback(_pending_flushes.discard)
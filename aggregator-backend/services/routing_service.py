@@ -0,0 +1,195 @@
+import asyncio
+from collections import defaultdict
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+from config import ROUTE_MAX_HOPS, ROUTE_MAX_FANOUT, ROUTE_MAX_PATHS
+from pool_registry import PoolPlan, PoolRegistry, pool_registry
+from log_manager import get_logger
+from .local_quote_service import local_quote_service
+from .pool_state import aggregate_calls
+from .quote_curve_service import quote_curve_service
+
+logger = get_logger(__name__)
+
+
+@dataclass(frozen=True)
+class PoolHop:
+    """Jeden swap trasy: plan puli z rejestru w kierunku token_in -> token_out."""
+    plan: PoolPlan
+
+    @property
+    def dex(self) -> str:
+        return self.plan.dex
+
+    @property
+    def pair(self) -> str:
+        return self.plan.pair
+
+    @property
+    def pool_address(self) -> str:
+        return self.plan.pool_address
+
+    @property
+    def token_in(self) -> str:
+        return self.plan.token_in.symbol
+
+    @property
+    def token_out(self) -> str:
+        return self.plan.token_out.symbol
+
+
+@dataclass(frozen=True)
+class Route:
+    """Trasa wieloskokowa w obrębie jednego DEXa (jeden router, swap exactInput po ścieżce)."""
+    dex: str
+    hops: Tuple[PoolHop, ...]
+
+    @property
+    def name(self) -> str:
+        return "/".join([self.hops[0].token_in] + [hop.token_out for hop in self.hops])
+
+
+class RoutingService:
+    """Indeks sąsiedztwa pul z rejestru (budowany raz przy starcie) + cache tras per para tokenów."""
+
+    def __init__(self, registry: PoolRegistry):
+        self.registry = registry
+        # token -> sąsiedni token -> plany pul w tym kierunku (DEXy w kolejności pools_config)
+        adjacency: Dict[str, Dict[str, List[PoolPlan]]] = defaultdict(lambda: defaultdict(list))
+        for plan in registry.all_plans():
+            adjacency[plan.token_in.symbol][plan.token_out.symbol].append(plan)
+        # Zwykłe dicty (odczyt przez .get) - symbol spoza rejestru z żądania nie dodaje wpisów
+        self.adjacency: Dict[str, Dict[str, Tuple[PoolPlan, ...]]] = {
+            token: {other: tuple(plans) for other, plans in neighbors.items()}
+            for token, neighbors in adjacency.items()
+        }
+        # Ograniczony fan-out: najlepiej połączeni sąsiedzi (najwięcej pul) jako pierwsi
+        self._neighbors = {
+            token: sorted(neighbors, key=lambda other: (-len(neighbors[other]), other))
+            for token, neighbors in self.adjacency.items()
+        }
+        self._route_cache: Dict[Tuple[str, str], Tuple[Route, ...]] = {}
+
+    def _token_paths(self, token_from: str, token_to: str) -> List[Tuple[str, ...]]:
+        """Ścieżki tokenów o 2..ROUTE_MAX_HOPS skokach (bez powtórzeń tokenów), krótsze najpierw."""
+        paths = []
+        stack = [(token_from,)]
+        while stack:
+            path = stack.pop()
+            for other in self._neighbors.get(path[-1], [])[:ROUTE_MAX_FANOUT] + [token_to]:
+                if other in path or other not in self.adjacency.get(path[-1], {}):
+                    continue
+                if other == token_to:
+                    if len(path) >= 2:
+                        paths.append(path + (other,))
+                elif len(path) < ROUTE_MAX_HOPS:
+                    stack.append(path + (other,))
+        return sorted(set(paths), key=lambda p: (len(p), p))
+
+    def find_routes(self, token_from: str, token_to: str) -> Tuple[Route, ...]:
+        """Trasy wieloskokowe pary (z cache); każdy skok w puli tego samego DEXa."""
+        first, last = self.registry.token(token_from), self.registry.token(token_to)
+        # Nieznany token - bez trasy i bez wpisu w cache (cache ograniczony do par tokenów z rejestru)
+        if first is None or last is None:
+            return ()
+        key = (first.symbol, last.symbol)
+        routes = self._route_cache.get(key)
+        if routes is not None:
+            return routes
+
+        found = []
+        for path in self._token_paths(*key):
+            # DEXy z pulą pierwszego skoku; pozostałe skoki w pulach tego samego DEXa
+            for dex_name in dict.fromkeys(plan.dex for plan in self.adjacency[path[0]][path[1]]):
+                hops = []
+                for token_in, token_out in zip(path, path[1:]):
+                    plan = next((p for p in self.adjacency.get(token_in, {}).get(token_out, ()) if p.dex == dex_name), None)
+                    if plan is None:
+                        break
+                    hops.append(PoolHop(plan))
+                else:
+                    found.append(Route(dex_name, tuple(hops)))
+        routes = tuple(found[:ROUTE_MAX_PATHS])
+        self._route_cache[key] = routes
+        return routes
+
+    def route_pools(self, token_from: str, token_to: str) -> Dict[Tuple[str, str], PoolHop]:
+        """Pule wszystkich tras pary: (dex, para) -> skok (do wczytania stanu i cen tokenów)."""
+        return {(hop.dex, hop.pair): hop for route in self.find_routes(token_from, token_to) for hop in route.hops}
+
+    async def quote_routes(self, routes: Tuple[Route, ...], amount_in: Decimal, dex_services: Dict[str, Any],
+                           all_prices: dict, snapshot=None) -> Dict[Route, List[Decimal]]:
+        """Kwoty po każdym skoku; skoki tego samego poziomu wszystkich tras wyceniane razem (bez duplikatów)."""
+        amounts = {route: [amount_in] for route in routes}
+        for level in range(max((len(route.hops) for route in routes), default=0)):
+            requests = {
+                (route.hops[level], amounts[route][-1])
+                for route in amounts if len(route.hops) > level
+            }
+            quotes = await self._quote_many(list(requests), dex_services, all_prices, snapshot)
+            for route in list(amounts):
+                if len(route.hops) <= level:
+                    continue
+                amount_out = quotes.get((route.hops[level], amounts[route][-1]))
+                if not amount_out:
+                    del amounts[route]
+                else:
+                    amounts[route].append(amount_out)
+        return amounts
+
+    async def _quote_many(self, requests: List[Tuple[PoolHop, Decimal]], dex_services: Dict[str, Any],
+                          all_prices: dict, snapshot) -> Dict[Tuple[PoolHop, Decimal], Optional[Decimal]]:
+        """Lokalna symulacja / krzywa quote; reszta jednym tryAggregate wywołań Quotera."""
+        quotes = {}
+        for request in requests:
+            hop, amount = request
+            quotes[request] = local_quote_service.quote_exact_in(snapshot, hop.dex, hop.pair, hop.token_in, hop.token_out, amount)
+
+        missing = [request for request, quote in quotes.items() if quote is None]
+        curve_quotes = await asyncio.gather(*(
+            quote_curve_service.quote_exact_in(
+                hop.dex, hop.pair, dex_services[hop.dex], hop.token_in, hop.token_out, amount,
+                all_prices, hop.plan.fee_tier, snapshot
+            )
+            for hop, amount in missing
+        ))
+        quotes.update(zip(missing, curve_quotes))
+
+        exact = []
+        for request, quote in quotes.items():
+            hop, amount = request
+            if quote is not None:
+                continue
+            plan = hop.plan
+            amount_in_wei = int(amount * Decimal(10 ** plan.token_in.decimals))
+            call = dex_services[hop.dex].quote_call(
+                plan.token_in.address, plan.token_out.address, amount_in_wei, plan.fee_tier
+            )
+            if call is not None:
+                exact.append((request, call))
+        if not exact:
+            return quotes
+
+        try:
+            block = snapshot.block_number if snapshot is not None else "latest"
+            results = await aggregate_calls([call for _, call in exact], block)
+        except Exception as e:
+            logger.warning("Błąd Quotera dla %s skoków tras: %s", len(exact), e)
+            return quotes
+        for (request, _), (success, data) in zip(exact, results):
+            hop = request[0]
+            if success and len(data) >= 32:
+                amount_out_wei = dex_services[hop.dex].decode_quote(data)
+                quotes[request] = Decimal(amount_out_wei) / Decimal(10 ** hop.plan.token_out.decimals)
+        return quotes
+
+    def stats(self) -> dict:
+        return {
+            "tokens": len(self.adjacency),
+            "cached_pairs": len(self._route_cache),
+            "cached_routes": sum(len(routes) for routes in self._route_cache.values())
+        }
+
+
+routing_service = RoutingService(pool_registry)
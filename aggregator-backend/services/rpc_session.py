@@ -0,0 +1,57 @@
+import aiohttp
+from typing import Optional
+from config import (
+    async_w3, RPC_URL, RPC_ASYNC, RPC_MAX_CONNECTIONS,
+    RPC_MAX_CONNECTIONS_PER_HOST, RPC_KEEPALIVE_TIMEOUT, RPC_TIMEOUT
+)
+from log_manager import get_logger
+
+logger = get_logger(__name__)
+
+
+class RpcSessionService:
+    """Współdzielona sesja HTTP keep-alive dla AsyncWeb3 (limit połączeń zamiast puli wątków)."""
+
+    def __init__(self):
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    @property
+    def is_ready(self) -> bool:
+        return self._session is not None and not self._session.closed
+
+    async def start(self) -> bool:
+        """Tworzy sesję i podpina ją pod AsyncHTTPProvider. False = zostaje ścieżka sync."""
+        if not RPC_ASYNC:
+            logger.info("RPC_ASYNC=0 - używam synchronicznego Web3 (asyncio.to_thread)")
+            return False
+        if self.is_ready:
+            return True
+        try:
+            connector = aiohttp.TCPConnector(
+                limit=RPC_MAX_CONNECTIONS,
+                limit_per_host=RPC_MAX_CONNECTIONS_PER_HOST,
+                keepalive_timeout=RPC_KEEPALIVE_TIMEOUT,
+                ttl_dns_cache=300
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=RPC_TIMEOUT)
+            )
+            await async_w3.provider.cache_async_session(self._session)
+            logger.info("Sesja AsyncWeb3 gotowa (%s, max %s połączeń)", RPC_URL, RPC_MAX_CONNECTIONS)
+            return True
+        except Exception as e:
+            logger.warning("Błąd tworzenia sesji AsyncWeb3, fallback do sync Web3: %s", e)
+            await self.close()
+            return False
+
+    async def close(self):
+        if self._session is not None:
+            try:
+                await self._session.close()
+            except Exception as e:
+                logger.warning("Błąd zamykania sesji AsyncWeb3: %s", e)
+            self._session = None
+
+
+rpc_session = RpcSessionService()
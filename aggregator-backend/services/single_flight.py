@@ -0,0 +1,49 @@
+import asyncio
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Dict
+
+
+class SingleFlight:
+    """Współbieżne wywołania z tym samym kluczem czekają na jeden wspólny future (jedno wykonanie)."""
+
+    def __init__(self):
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self.calls = defaultdict(int)
+        self.executions = defaultdict(int)
+        self.coalesced = defaultdict(int)
+
+    async def do(self, key: str, factory: Callable[[], Awaitable[Any]], kind: str = "default") -> Any:
+        """Wynik factory() dla klucza; gdy obliczenie już trwa - dołącza do niego zamiast liczyć drugi raz."""
+        self.calls[kind] += 1
+        task = self._in_flight.get(key)
+        if task is None:
+            self.executions[kind] += 1
+            task = asyncio.ensure_future(factory())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done, key=key: self._finish(key, done))
+        else:
+            self.coalesced[kind] += 1
+        # shield: anulowanie jednego klienta nie przerywa obliczenia pozostałym
+        return await asyncio.shield(task)
+
+    def _finish(self, key: str, task: asyncio.Task) -> None:
+        self._in_flight.pop(key, None)
+        if not task.cancelled():
+            task.exception()  # odebrany także gdy wszyscy czekający zostali anulowani
+
+    def stats(self) -> dict:
+        """Liczniki per rodzaj klucza (mid_price, quote, liquidity, tx_cost)."""
+        return {
+            "in_flight": len(self._in_flight),
+            "by_kind": {
+                kind: {
+                    "calls": self.calls[kind],
+                    "executions": self.executions[kind],
+                    "coalesced": self.coalesced[kind]
+                }
+                for kind in sorted(self.calls)
+            }
+        }
+
+
+single_flight = SingleFlight()
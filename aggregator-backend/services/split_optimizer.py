@@ -0,0 +1,100 @@
+import itertools
+from dataclasses import dataclass
+from typing import Dict, Hashable, List, Optional, Tuple
+import numpy as np
+from config import SPLIT_MAX_LEGS
+from .quote_curve_service import QuoteCurve
+
+
+@dataclass(frozen=True)
+class SplitPlan:
+    """Podział zlecenia: (klucz puli, amount_in, amount_out) per pula, wyjście łączne i po odjęciu gazu (wei)."""
+    legs: Tuple[Tuple[Hashable, int, int], ...]
+    amount_out: int
+    net_amount_out: int
+
+
+class SplitOptimizer:
+    """Podział kwoty między pule maksymalizujący wyjście minus gaz, na krzywych z cache (bez RPC)."""
+
+    def _segments(self, curve: QuoteCurve) -> Tuple[np.ndarray, np.ndarray]:
+        xs = np.asarray(curve.amounts_in, dtype=np.float64)
+        ys = np.asarray(curve.amounts_out, dtype=np.float64)
+        dx = np.diff(xs)
+        return dx, np.diff(ys) / dx
+
+    def _water_fill(self, segments: List[Tuple[np.ndarray, np.ndarray]], amount_in: int) -> Optional[np.ndarray]:
+        """Wyrównanie cen krańcowych: odcinki wszystkich krzywych wg malejącego nachylenia, aż do amount_in.
+
+        Krzywe są wklęsłe i kawałkami liniowe, więc zachłanne wypełnianie jest optymalne.
+        """
+        dx = np.concatenate([seg_dx for seg_dx, _ in segments])
+        slope = np.concatenate([seg_slope for _, seg_slope in segments])
+        owner = np.repeat(np.arange(len(segments)), [len(seg_dx) for seg_dx, _ in segments])
+
+        order = np.argsort(-slope, kind="stable")
+        filled = np.cumsum(dx[order])
+        # Jedna konwersja do float64 - porównanie i searchsorted spójne także dla kwot ponad int64
+        target = float(amount_in)
+        if filled[-1] < target:
+            return None
+        last = int(np.searchsorted(filled, target))
+
+        allocation = np.zeros(len(segments))
+        np.add.at(allocation, owner[order[:last]], dx[order[:last]])
+        allocation[owner[order[last]]] += target - (filled[last - 1] if last else 0.0)
+        return allocation
+
+    def _to_wei(self, allocation: np.ndarray, amount_in: int, capacities: List[int]) -> Optional[List[int]]:
+        """Zaokrąglenie podziału do wei z zachowaniem sumy; żadna część nie przekracza końca drabinki swojej krzywej.
+
+        Reszta (także nadwyżka ponad drabinkę z zaokrągleń float64) trafia do części z wolną pojemnością,
+        od największej; None, gdy pojemność krzywych nie mieści amount_in.
+        """
+        parts = [min(int(part), capacity) for part, capacity in zip(np.floor(allocation), capacities)]
+        remainder = amount_in - sum(parts)
+        for i in np.argsort(-allocation, kind="stable"):
+            if remainder <= 0:
+                break
+            extra = min(remainder, capacities[i] - parts[i])
+            parts[i] += extra
+            remainder -= extra
+        if remainder > 0:
+            return None
+        if remainder < 0:
+            # Suma floor ponad amount_in (float64) - nadmiar odejmowany od największej części
+            parts[int(np.argmax(allocation))] += remainder
+        return parts
+
+    def optimize(self, curves: Dict[Hashable, QuoteCurve], amount_in: int, gas_out: Dict[Hashable, int]) -> Optional[SplitPlan]:
+        """Najlepszy podział na 1..SPLIT_MAX_LEGS pul; gas_out - koszt gazu puli wyrażony w wei tokena wyjściowego."""
+        keys = [key for key, curve in curves.items() if len(curve.amounts_in) >= 2]
+        segments = {key: self._segments(curves[key]) for key in keys}
+        best: Optional[SplitPlan] = None
+
+        # Stały koszt gazu per użyta pula - osobne wypełnienie dla każdego podzbioru pul (mało pul na parę)
+        for size in range(1, min(SPLIT_MAX_LEGS, len(keys)) + 1):
+            for subset in itertools.combinations(keys, size):
+                allocation = self._water_fill([segments[key] for key in subset], amount_in)
+                if allocation is None:
+                    continue
+                parts = self._to_wei(allocation, amount_in, [curves[key].amounts_in[-1] for key in subset])
+                if parts is None:
+                    continue
+                legs = []
+                for key, part in zip(subset, parts):
+                    if part <= 0:
+                        continue
+                    estimate = curves[key].estimate(part)
+                    if estimate is None:
+                        break
+                    legs.append((key, part, estimate[0]))
+                else:
+                    amount_out = sum(out for _, _, out in legs)
+                    net = amount_out - sum(gas_out.get(key, 0) for key, _, _ in legs)
+                    if best is None or net > best.net_amount_out:
+                        best = SplitPlan(legs=tuple(legs), amount_out=amount_out, net_amount_out=net)
+        return best
+
+
+split_optimizer = SplitOptimizer()
@@ -1,97 +1,19 @@
-from decimal import Decimal
-from typing import Tuple, Optional
-from config import uniswap_abi, w3
-from token_manager import TokenManager
+from typing import Optional
 from web3 import Web3
-from pools_config import TOKENS
-from .base_dex_service import BaseDexService
-from .calculation_service import mid_price_from_univ3_sqrt
-
-token_manager = TokenManager(TOKENS)
+from .base_dex_service import BaseDexService, AsyncBaseDexService
+from .raw_call_service import UNISWAP_QUOTE_EXACT_INPUT_SINGLE
 
 QUOTER_ADDRESS = Web3.to_checksum_address("0xb27308f9F90D607463bb33eA1BeBb41C27CE5AB6")
-quoter_abi = [
-    {
-      "inputs":[
-        {"internalType":"address","name":"tokenIn","type":"address"},
-        {"internalType":"address","name":"tokenOut","type":"address"},
-        {"internalType":"uint24","name":"fee","type":"uint24"},
-        {"internalType":"uint256","name":"amountIn","type":"uint256"},
-        {"internalType":"uint160","name":"sqrtPriceLimitX96","type":"uint160"}
-      ],
-      "name":"quoteExactInputSingle",
-      "outputs":[{"internalType":"uint256","name":"amountOut","type":"uint256"}],
-      "stateMutability":"view","type":"function"
-    }
-]
 
 class UniswapService(BaseDexService):
     """Uniswap V3 - mid-price, quotes, liquidity."""
-    abi = uniswap_abi
-
-    def get_dex_fee_percent(self, pool_address: str) -> Optional[Decimal]:
-        """Fee puli (np. 0.003 dla 0.3%)."""
-        try:
-            pool_contract = w3.eth.contract(address=pool_address, abi=self.abi)
-            fee_micro = pool_contract.functions.fee().call()
-            return Decimal(fee_micro) / Decimal(1_000_000)
-        except Exception as e:
-            print(f"Błąd fee Uniswap {pool_address}: {e}")
-            return None
-
-    def get_mid_price(self, pool_address, token_from, token_to, token_decimals, token_addresses=None) -> Optional[Decimal]:
-        """Mid-price z slot0.sqrtPriceX96."""
-        try:
-            pool = w3.eth.contract(address=Web3.to_checksum_address(pool_address), abi=self.abi)
-            
-            if token_addresses and len(token_addresses) == 2:
-                token0 = token_addresses[0].lower()
-            else:
-                token0 = pool.functions.token0().call().lower()
-            
-            dec0, dec1 = token_decimals
-            is0_in = token_manager.get_address_by_symbol(token_from).lower() == token0
-            sqrt_x96 = pool.functions.slot0().call()[0]
-            return mid_price_from_univ3_sqrt(sqrt_x96, dec0, dec1, is0_in)
-        except Exception as e:
-            print(f"Błąd mid_price Uniswap: {e}")
-            return None
-
-    def quote_exact_in(self, pool_address, token_from, token_to, amount_in, token_decimals, token_addresses=None, pool_fee=None, pair=None) -> Optional[Decimal]:
-        """Quote z Quoter V3 (amount_out już uwzględnia fee)."""
-        try:
-            pool   = w3.eth.contract(address=Web3.to_checksum_address(pool_address), abi=self.abi)
-            quoter = w3.eth.contract(address=QUOTER_ADDRESS, abi=quoter_abi)
-            
-            if pool_fee:
-                fee_tier = pool_fee
-            else:
-                fee_tier = pool.functions.fee().call()
+    quote_function = UNISWAP_QUOTE_EXACT_INPUT_SINGLE
+    quoter_address = QUOTER_ADDRESS
 
-            token_in_addr  = Web3.to_checksum_address(token_manager.get_address_by_symbol(token_from))
-            token_out_addr = Web3.to_checksum_address(token_manager.get_address_by_symbol(token_to))
+    def quote_args(self, token_in_address: str, token_out_address: str, amount_in_wei: int, fee_tier: Optional[int]) -> tuple:
+        """quoteExactInputSingle Quotera V1: tokenIn, tokenOut, fee, amountIn, sqrtPriceLimitX96."""
+        return (token_in_address, token_out_address, int(fee_tier), amount_in_wei, 0)
 
-            if token_addresses and len(token_addresses) == 2:
-                token0 = token_addresses[0].lower()
-            else:
-                token0 = pool.functions.token0().call().lower()
-            
-            dec0, dec1 = token_decimals
-            is0_in = token_in_addr.lower() == token0
-            dec_in  = dec0 if is0_in else dec1
-            dec_out = dec1 if is0_in else dec0
 
-            amount_in_wei = int(amount_in * Decimal(10 ** dec_in))
-            
-            print(f"Quoter call: token_in={token_from} ({dec_in} dec), token_out={token_to} ({dec_out} dec), amount_in={amount_in_wei}")
-            
-            amount_out_wei = quoter.functions.quoteExactInputSingle(
-                token_in_addr, token_out_addr, fee_tier, amount_in_wei, 0
-            ).call()
-            
-            print(f"Quoter response: amount_out_wei={amount_out_wei}")
-            
-            return Decimal(amount_out_wei) / Decimal(10 ** dec_out)
-        except Exception as e:
-            print(f"Błąd quote_exact_in Uniswap: {e}")
-            return None
\ No newline at end of file
+class AsyncUniswapService(AsyncBaseDexService, UniswapService):
+    """Uniswap V3 przez AsyncWeb3 (bez asyncio.to_thread)."""
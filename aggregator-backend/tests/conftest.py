@@ -0,0 +1,57 @@
+import sys
+from decimal import Decimal
+from pathlib import Path
+
+import pytest
+
+# Moduły backendu importowane jak w aplikacji (uruchamianej z katalogu aggregator-backend)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def make_option(dex: str, pool: str, amount: float, rate: float):
+    """Opcja wymiany puli o kursie rate (płynność, fee i gaz stałe - ranking zależy od amount_to)."""
+    from models import TransactionOption
+    return TransactionOption(
+        dex=dex, pool=pool, price=rate, liquidity=1e6, dex_fee=0.003, gas_cost=0.1, amount_from=amount,
+        amount_to=amount * rate, value_from_usd=amount, value_to_usd=amount * rate
+    )
+
+
+class MemoryCache:
+    """Backend cache w pamięci (bez Redis)."""
+
+    def __init__(self):
+        self.values = {}
+
+    async def get_cached_price(self, key):
+        return self.values.get(key)
+
+    async def get_cached_prices(self, keys):
+        return {key: self.values.get(key) for key in keys}
+
+    async def set_cached_price(self, key, value, ttl=60):
+        self.values[key] = float(value)
+
+    async def set_cached_prices(self, items):
+        self.values.update({key: float(value) for key, (value, _) in items.items()})
+
+
+@pytest.fixture
+def exchange_app(monkeypatch):
+    """Aplikacja z samym routerem wymiany, bez I/O: ceny, snapshot i serwisy żądania podmienione."""
+    from fastapi import FastAPI
+    import routes
+    from services.request_cache import RequestCacheService
+
+    async def load_prices(redis_cache_service, coin_gecko_service, token_addresses, cache_keys):
+        return {}, Decimal(3000)
+
+    monkeypatch.setattr(routes, "load_prices", load_prices)
+    monkeypatch.setattr(routes.pool_snapshot_service, "fresh", lambda: None)
+
+    app = FastAPI()
+    app.include_router(routes.exchange_router)
+    app.dependency_overrides[routes.get_services] = lambda: (
+        RequestCacheService(MemoryCache()), None, "uniswap", "sushiswap", "camelot"
+    )
+    return app
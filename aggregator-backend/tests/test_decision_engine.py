@@ -0,0 +1,65 @@
+from collections import namedtuple
+
+import numpy as np
+import pytest
+
+from decision_engine import DEFAULT_WEIGHTS, rank_many, rank_options
+
+Option = namedtuple("Option", "amount_to liquidity dex_fee gas_cost value_to_usd")
+
+
+def reference_topsis(options, weights=DEFAULT_WEIGHTS):
+    """Ranking per żądanie sprzed wektoryzacji (pętla po jednym zbiorze opcji)."""
+    matrix = np.array([[o.amount_to, np.log1p(o.liquidity), o.dex_fee, o.gas_cost] for o in options])
+    weighted = matrix / (np.sqrt((matrix ** 2).sum(axis=0)) + 1e-10) * weights
+    ideal_best = np.array([weighted[:, 0].max(), weighted[:, 1].max(), weighted[:, 2].min(), weighted[:, 3].min()])
+    ideal_worst = np.array([weighted[:, 0].min(), weighted[:, 1].min(), weighted[:, 2].max(), weighted[:, 3].max()])
+    dist_best = np.linalg.norm(weighted - ideal_best, axis=1)
+    dist_worst = np.linalg.norm(weighted - ideal_worst, axis=1)
+    scores = dist_worst / (dist_best + dist_worst)
+    ranked = sorted(zip(scores, options), reverse=True, key=lambda item: item[0])
+    return [option for _, option in ranked]
+
+
+def random_options(rng, count):
+    return [
+        Option(
+            amount_to=rng.uniform(0.5, 2000), liquidity=rng.uniform(0, 1e7), dex_fee=rng.choice([0.0005, 0.003, 0.01]),
+            gas_cost=rng.uniform(0.01, 2), value_to_usd=rng.uniform(1, 2000)
+        )
+        for _ in range(count)
+    ]
+
+
+@pytest.fixture
+def option_sets():
+    rng = np.random.default_rng(7)
+    return [random_options(rng, count) for count in (5, 2, 0, 12, 1, 30, 3)]
+
+
+def test_rank_many_matches_per_request_topsis(option_sets):
+    ranked = rank_many(option_sets)
+    for options, result in zip(option_sets, ranked):
+        expected = reference_topsis(options) if len(options) > 1 else options
+        assert result == expected
+
+
+def test_rank_options_matches_rank_many(option_sets):
+    assert [rank_options(options) for options in option_sets] == rank_many(option_sets)
+
+
+def test_per_request_weights(option_sets):
+    weights = np.array([DEFAULT_WEIGHTS, [0.1, 0.1, 0.4, 0.4]] * 3 + [DEFAULT_WEIGHTS])
+    ranked = rank_many(option_sets, weights=weights)
+    for options, row, result in zip(option_sets, weights, ranked):
+        expected = reference_topsis(options, row) if len(options) > 1 else options
+        assert result == expected
+
+
+def test_mixed_strategies(option_sets):
+    strategies = ["max_output", None, None, "max_net_output", None, "topsis", None]
+    ranked = rank_many(option_sets, strategies)
+    assert ranked[0] == sorted(option_sets[0], key=lambda o: -o.amount_to)
+    assert ranked[3] == sorted(option_sets[3], key=lambda o: -(o.value_to_usd - o.gas_cost))
+    assert ranked[5] == reference_topsis(option_sets[5])
+    assert ranked[1] == reference_topsis(option_sets[1])
@@ -0,0 +1,62 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import routes
+from conftest import make_option
+
+
+@pytest.fixture
+def client(exchange_app, monkeypatch):
+    calls = []
+
+    async def collect_options(dexes, token_from, token_to, amount, redis_cache_service, all_prices, eth_price, pool_states):
+        calls.append((token_from, token_to, amount))
+        return [make_option("Uniswap", f"{token_from}/{token_to}", amount, 0.99), make_option("Camelot", f"{token_from}/{token_to}", amount, 1.01)]
+
+    monkeypatch.setattr(routes, "collect_options", collect_options)
+    client = TestClient(exchange_app)
+    client.calls = calls
+    return client
+
+
+def test_amount_list_expanded_and_ranked_per_item(client):
+    response = client.post("/exchange/batch", json={"token_from": "usdc", "token_to": "eth", "amounts": [10, 20]})
+    assert response.status_code == 200
+    results = response.json()["results"]
+
+    assert [(r["token_from"], r["token_to"], r["amount"]) for r in results] == [("usdc", "eth", 10), ("usdc", "eth", 20)]
+    for result in results:
+        assert [option["dex"] for option in result["options"]] == ["Camelot", "Uniswap"]
+        assert result["options"][0]["amount_to"] == pytest.approx(result["amount"] * 1.01)
+    assert client.calls == [("USDC", "ETH", 10), ("USDC", "ETH", 20)]
+
+
+def test_unsupported_pair_reported_without_computing(client):
+    response = client.post("/exchange/batch", json={"requests": [
+        {"token_from": "ETH", "token_to": "USDC", "amount": 1},
+        {"token_from": "ETH", "token_to": "NOPE", "amount": 1}
+    ]})
+    results = response.json()["results"]
+
+    assert "options" in results[0]
+    assert results[1]["error"] == "No exchange options available."
+    assert client.calls == [("ETH", "USDC", 1)]
+
+
+def test_per_item_strategy(client):
+    response = client.post("/exchange/batch", json={"requests": [
+        {"token_from": "ETH", "token_to": "USDC", "amount": 1, "strategy": "max_output"},
+        {"token_from": "ETH", "token_to": "USDC", "amount": 2, "weights": [0.1, 0.1, 0.4, 0.4]}
+    ]})
+    assert response.status_code == 200
+    assert [len(result["options"]) for result in response.json()["results"]] == [2, 2]
+
+
+@pytest.mark.parametrize("payload", [
+    {},
+    {"requests": [{"token_from": "ETH", "token_to": "USDC", "amount": 1, "strategy": "unknown"}]},
+    {"token_from": "ETH", "token_to": "USDC", "amounts": [1] * (routes.EXCHANGE_BATCH_MAX_ITEMS + 1)},
+])
+def test_invalid_batch_rejected(client, payload):
+    assert client.post("/exchange/batch", json=payload).status_code == 422
+    assert client.calls == []
@@ -0,0 +1,74 @@
+import asyncio
+
+import orjson
+import pytest
+from fastapi.testclient import TestClient
+
+import routes
+from conftest import make_option
+
+REQUEST = {"token_from": "ETH", "token_to": "USDC", "amount": 1}
+# Camelot najlepszy kurs, ale liczony najdłużej - w strumieniu ostatni, w rankingu pierwszy
+RATES = {"Uniswap": (0.99, 0.0), "SushiSwap": (0.98, 0.01), "Camelot": (1.01, 0.02)}
+
+
+@pytest.fixture
+def client(exchange_app, monkeypatch):
+    async def process_single_pool(plan, dex_service, token_from, token_to, amount, *args):
+        rate, delay = RATES[plan.dex]
+        await asyncio.sleep(delay)
+        return make_option(plan.dex, plan.pair, amount, rate)
+
+    async def process_routes(token_from, token_to, amount, *args):
+        await asyncio.sleep(0.03)
+        return []
+
+    monkeypatch.setattr(routes, "process_single_pool", process_single_pool)
+    monkeypatch.setattr(routes, "process_routes", process_routes)
+    return TestClient(exchange_app)
+
+
+def test_ndjson_options_in_completion_order_then_ranking(client):
+    response = client.post("/exchange/stream", json=REQUEST)
+    assert response.headers["content-type"] == "application/x-ndjson"
+    events = [orjson.loads(line) for line in response.text.splitlines()]
+
+    assert [event["event"] for event in events] == ["option"] * 3 + ["ranked"]
+    assert [event["data"]["dex"] for event in events[:3]] == ["Uniswap", "SushiSwap", "Camelot"]
+    assert [option["dex"] for option in events[-1]["data"]["options"]] == ["Camelot", "Uniswap", "SushiSwap"]
+
+
+def test_sse_when_requested(client):
+    response = client.post("/exchange/stream", json=REQUEST, headers={"Accept": "text/event-stream"})
+    assert response.headers["content-type"].startswith("text/event-stream")
+    blocks = [block for block in response.text.split("\n\n") if block]
+
+    assert [block.split("\n")[0] for block in blocks] == ["event: option"] * 3 + ["event: ranked"]
+    assert orjson.loads(blocks[0].split("\n")[1].removeprefix("data: "))["dex"] == "Uniswap"
+
+
+def test_failed_pool_skipped(client, monkeypatch):
+    async def process_single_pool(plan, *args):
+        if plan.dex == "SushiSwap":
+            raise RuntimeError("rpc")
+        return make_option(plan.dex, plan.pair, 1, RATES[plan.dex][0])
+
+    monkeypatch.setattr(routes, "process_single_pool", process_single_pool)
+    events = [orjson.loads(line) for line in client.post("/exchange/stream", json=REQUEST).text.splitlines()]
+
+    assert [event["event"] for event in events] == ["option"] * 2 + ["ranked"]
+    assert {option["dex"] for option in events[-1]["data"]["options"]} == {"Uniswap", "Camelot"}
+
+
+def test_error_event_when_no_options(client, monkeypatch):
+    async def process_single_pool(plan, *args):
+        return None
+
+    monkeypatch.setattr(routes, "process_single_pool", process_single_pool)
+    events = [orjson.loads(line) for line in client.post("/exchange/stream", json=REQUEST).text.splitlines()]
+
+    assert events == [{"event": "error", "data": {"detail": "No exchange options available."}}]
+
+
+def test_unsupported_pair_is_404(client):
+    assert client.post("/exchange/stream", json={**REQUEST, "token_to": "NOPE"}).status_code == 404
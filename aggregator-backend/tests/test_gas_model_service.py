@@ -0,0 +1,80 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from config import GAS_PER_TICK_CROSSED
+from pool_registry import pool_registry
+from services import gas_model_service as gas_model_module
+from services.gas_model_service import GasModelService, TICK_BUCKETS, ticks_bucket
+from services.pool_snapshot_service import STATE_DEX_SERVICES
+
+PLAN = next(plan for plan in pool_registry.all_plans() if plan.dex == "Uniswap")
+
+
+def key(plan, bucket, zero_for_one=None):
+    return plan.dex, plan.router, plan.zero_for_one if zero_for_one is None else zero_for_one, bucket
+
+
+@pytest.mark.parametrize("ticks, bucket", [(0, 0), (1, 1), (3, 2), (4, 4), (15, 8), (16, 16), (500, 16)])
+def test_ticks_bucket(ticks, bucket):
+    assert TICK_BUCKETS[ticks_bucket(ticks)] == bucket
+
+
+class TestEstimate:
+    def test_default_gas_without_calibration(self):
+        model = GasModelService()
+        default = STATE_DEX_SERVICES[PLAN.dex].default_swap_gas
+        assert model.estimate(PLAN) == default
+        assert model.estimate(PLAN, ticks_crossed=5) == default + GAS_PER_TICK_CROSSED * 4
+
+    def test_calibrated_bucket(self):
+        model = GasModelService()
+        model._model[key(PLAN, 0)] = 100_000
+        model._model[key(PLAN, ticks_bucket(5))] = 140_000
+        assert model.estimate(PLAN) == 100_000
+        assert model.estimate(PLAN, ticks_crossed=5) == 140_000
+        # Przedział bez próbki - bazowy gaz kierunku + dopłata za ticki
+        assert model.estimate(PLAN, ticks_crossed=20) == 100_000 + GAS_PER_TICK_CROSSED * 16
+
+    def test_opposite_direction_of_same_router(self):
+        model = GasModelService()
+        model._model[key(PLAN, 0, not PLAN.zero_for_one)] = 110_000
+        assert model.estimate(PLAN) == 110_000
+
+
+class TestCalibrate:
+    @pytest.fixture
+    def model(self, monkeypatch):
+        model = GasModelService()
+        samples = [(key(PLAN, 0), PLAN, 10 ** 14)] * 3 + [(key(PLAN, 1), PLAN, 10 ** 16)]
+        monkeypatch.setattr(model, "_samples", lambda snapshot: samples)
+        monkeypatch.setattr(gas_model_module, "rpc_session", SimpleNamespace(is_ready=False))
+        monkeypatch.setattr(gas_model_module.pool_snapshot_service, "fresh", lambda: None)
+        return model
+
+    def use_results(self, monkeypatch, results):
+        requests = []
+
+        def batch(batch_requests):
+            requests.extend(batch_requests)
+            return results
+
+        monkeypatch.setattr(gas_model_module, "raw_call_service", SimpleNamespace(batch=batch))
+        return requests
+
+    def test_median_per_key_with_buffer(self, model, monkeypatch):
+        requests = self.use_results(monkeypatch, [hex(100_000), hex(120_000), RuntimeError("revert"), hex(150_000)])
+
+        assert asyncio.run(model.calibrate()) == 2
+        assert all(method == "eth_estimateGas" for method, _ in requests)
+        assert model._model == {key(PLAN, 0): 115_500, key(PLAN, 1): 157_500}
+        assert (model.calibrations, model.samples_failed) == (1, 1)
+
+    def test_all_samples_failed_keeps_model(self, model, monkeypatch):
+        model._model[key(PLAN, 0)] = 90_000
+        self.use_results(monkeypatch, [RuntimeError("revert")] * 4)
+
+        with pytest.raises(RuntimeError):
+            asyncio.run(model.calibrate())
+        assert model._model == {key(PLAN, 0): 90_000}
@@ -0,0 +1,107 @@
+import asyncio
+import time
+from decimal import Decimal
+from types import MappingProxyType, SimpleNamespace
+
+import pytest
+from eth_abi import encode
+
+from services import gas_oracle_service as gas_oracle_module
+from services.gas_oracle_service import GasOracleService, GasPrice
+
+BASE_FEE = 10_000_000
+GAS_PRICE = 20_000_000
+L1_GAS = 1_500
+
+
+def hex_result(types, values) -> str:
+    return "0x" + encode(types, values).hex()
+
+
+def prices_in_wei() -> str:
+    return hex_result(["uint256"] * 6, [1, 2, 3, 4, 5, BASE_FEE])
+
+
+def l1_component(gas: int) -> str:
+    return hex_result(["uint64", "uint256", "uint256"], [gas, BASE_FEE, 30_000_000_000])
+
+
+@pytest.fixture
+def oracle(monkeypatch):
+    oracle = GasOracleService()
+    oracle.batches = []
+    oracle.fail = set()
+
+    def batch(requests):
+        oracle.batches.append(requests)
+        results = []
+        for index, (method, params) in enumerate(requests):
+            if method == "eth_gasPrice":
+                result = hex(GAS_PRICE)
+            elif method == "eth_blockNumber":
+                result = hex(1234)
+            elif index == 1:
+                result = prices_in_wei()
+            else:
+                result = l1_component(L1_GAS + index)
+            results.append(RuntimeError("execution reverted") if index in oracle.fail else result)
+        return results
+
+    monkeypatch.setattr(gas_oracle_module, "rpc_session", SimpleNamespace(is_ready=False))
+    monkeypatch.setattr(gas_oracle_module, "raw_call_service", SimpleNamespace(batch=batch))
+    return oracle
+
+
+def test_swap_cost_includes_l1_component():
+    price = GasPrice(block_number=1, base_fee=BASE_FEE, l1_base_fee=None,
+                     l1_gas=MappingProxyType({"Uniswap": L1_GAS}), created_at=time.time())
+    assert price.swap_cost_wei("Uniswap", 100_000) == (100_000 + L1_GAS) * BASE_FEE
+    assert price.swap_cost_wei("Camelot", 100_000) == 100_000 * BASE_FEE
+    assert price.swap_cost_usd("Camelot", 100_000, Decimal(3000)) == Decimal(100_000 * BASE_FEE) / Decimal(10 ** 18) * 3000
+
+
+def test_latest_block_read_in_one_batch(oracle):
+    price = asyncio.run(oracle.refresh())
+    dexes = list(oracle._samples())
+
+    assert len(oracle.batches) == 1
+    assert (price.block_number, price.base_fee, price.l1_base_fee) == (1234, BASE_FEE, 30_000_000_000)
+    assert dict(price.l1_gas) == {dex: L1_GAS + 2 + index for index, dex in enumerate(dexes)}
+    assert oracle.current is price
+
+
+def test_gas_price_fallback_without_arbitrum_precompiles(oracle):
+    oracle.fail = {1, 2}
+    price = asyncio.run(oracle.refresh(99))
+
+    assert (price.block_number, price.base_fee) == (99, GAS_PRICE)
+    assert list(oracle._samples())[0] not in price.l1_gas
+    assert oracle.l1_unavailable == 1
+    # Blok podany - bez eth_blockNumber w batchu
+    assert all(method != "eth_blockNumber" for method, _ in oracle.batches[0])
+
+
+def test_older_block_does_not_replace_current(oracle):
+    asyncio.run(oracle.refresh(100))
+    asyncio.run(oracle.refresh(99))
+    assert oracle.current.block_number == 100
+
+
+def test_get_serves_memory_and_coalesces_refresh(oracle):
+    async def main():
+        return await asyncio.gather(*(oracle.get() for _ in range(5)))
+
+    prices = asyncio.run(main())
+    assert len(oracle.batches) == 1
+    assert all(price is prices[0] for price in prices)
+
+    assert asyncio.run(oracle.get()) is prices[0]
+    assert len(oracle.batches) == 1
+
+
+def test_get_keeps_stale_price_when_refresh_fails(oracle):
+    stale = GasPrice(block_number=1, base_fee=BASE_FEE, l1_base_fee=None, l1_gas=MappingProxyType({}), created_at=0.0)
+    oracle.current = stale
+    oracle.fail = {0, 1}
+
+    assert asyncio.run(oracle.get()) is stale
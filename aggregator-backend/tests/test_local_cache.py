@@ -0,0 +1,118 @@
+import asyncio
+import json
+from decimal import Decimal
+
+import pytest
+
+from config import L1_CACHE_TTLS
+from exchange_utils import pool_cache_keys
+from services import local_cache as local_cache_module
+from services import redis_cache as redis_cache_module
+from services.local_cache import CacheInvalidationService, invalidation_message, key_class, l1_ttl
+from services.price_warmer import price_cache_key
+from services.redis_cache import RedisCacheService
+from services.ttl_cache import TTLCache
+
+
+class TestTTLCache:
+    def test_entry_expires_after_ttl(self, monkeypatch):
+        now = [100.0]
+        monkeypatch.setattr("services.ttl_cache.time.monotonic", lambda: now[0])
+        cache = TTLCache(10)
+        cache.set("a", 1, ttl=5)
+        assert cache.get_with_ttl("a") == (1, 5)
+        now[0] += 5
+        assert cache.get("a") is None
+
+    def test_lru_eviction_keeps_recently_used(self):
+        cache = TTLCache(2)
+        cache.set("a", 1, ttl=60)
+        cache.set("b", 2, ttl=60)
+        cache.get("a")
+        cache.set("c", 3, ttl=60)
+        assert (cache.get("a"), cache.get("b"), cache.get("c")) == (1, None, 3)
+        assert cache.evictions == 1
+
+    def test_non_positive_ttl_or_size_stores_nothing(self):
+        cache = TTLCache(10)
+        cache.set("a", 1, ttl=60)
+        cache.set("a", 2, ttl=0)
+        assert cache.get("a") is None
+        disabled = TTLCache(0)
+        disabled.set("a", 1, ttl=60)
+        assert disabled.get("a") is None
+
+
+def test_key_class_of_pool_keys():
+    keys = pool_cache_keys("Uniswap", "USDC/ETH", "USDC", "ETH", 100)
+    assert {name: key_class(key) for name, key in keys.items()} == {
+        "mid_price": "mid_price", "quote": "quote", "liquidity": "liquidity", "dex_fee": "tx_cost"
+    }
+    assert key_class(price_cache_key("0xABC")) == "price"
+
+
+def test_l1_ttl_never_outlives_redis():
+    assert l1_ttl("coingecko_0xabc", None) == L1_CACHE_TTLS["price"]
+    assert l1_ttl("coingecko_0xabc", 0.5) == 0.5
+
+
+def test_invalidation_from_other_worker_only():
+    cache = TTLCache(10)
+    cache.set("a", 1, ttl=60)
+    cache.set("b", 2, ttl=60)
+    service = CacheInvalidationService(cache)
+
+    service.handle(invalidation_message(["a"]))
+    assert cache.get("a") == 1
+    service.handle(json.dumps({"origin": "other-worker", "keys": ["a"]}))
+    service.handle("not json")
+    assert (cache.get("a"), cache.get("b")) == (None, 2)
+
+
+class FakeRedis:
+    def __init__(self, values=None):
+        self.values = dict(values or {})
+        self.reads, self.writes = [], []
+
+    async def mget_with_ttl(self, keys):
+        self.reads.append(list(keys))
+        return [(self.values.get(key), 30.0 if key in self.values else None) for key in keys]
+
+    async def set_many(self, items, publish=None):
+        self.writes.append((list(items), publish))
+        return True
+
+
+@pytest.fixture
+def l1(monkeypatch):
+    cache = TTLCache(100)
+    monkeypatch.setattr(redis_cache_module, "local_cache", cache)
+    return cache
+
+
+def test_l1_served_before_redis(monkeypatch, l1):
+    redis = FakeRedis({"coingecko_0xa": "2.5"})
+    monkeypatch.setattr(redis_cache_module, "redis_service", redis)
+    service = RedisCacheService()
+
+    async def main():
+        first = await service.get_cached_prices(["coingecko_0xa", "coingecko_0xb"])
+        second = await service.get_cached_prices(["coingecko_0xa"])
+        return first, second
+
+    first, second = asyncio.run(main())
+    assert first == {"coingecko_0xa": 2.5, "coingecko_0xb": None}
+    assert second == {"coingecko_0xa": 2.5}
+    assert redis.reads == [["coingecko_0xa", "coingecko_0xb"]]
+
+
+def test_write_fills_l1_and_publishes_invalidation(monkeypatch, l1):
+    redis = FakeRedis()
+    monkeypatch.setattr(redis_cache_module, "redis_service", redis)
+
+    asyncio.run(RedisCacheService().set_cached_prices({"coingecko_0xa": (Decimal(3), 10)}))
+
+    assert l1.get("coingecko_0xa") == 3.0
+    (items, (channel, message)), = redis.writes
+    assert items == [("coingecko_0xa", 3.0, 10)]
+    assert json.loads(message) == {"origin": local_cache_module.WORKER_ID, "keys": ["coingecko_0xa"]}
@@ -0,0 +1,67 @@
+import asyncio
+from decimal import Decimal
+
+import pytest
+
+from config import PRICE_REFRESH_INTERVAL
+from services import price_warmer as price_warmer_module
+from services.price_warmer import PriceWarmerService, price_cache_key
+
+
+class FakeCache:
+    def __init__(self):
+        self.prices = {}
+
+    async def set_cached_prices(self, items):
+        self.prices.update(items)
+
+
+def run_cycles(monkeypatch, responses, sleeps: int):
+    """Uruchamia _run z kolejnymi odpowiedziami API; zwraca serwis, żądane adresy i opóźnienia."""
+    warmer = PriceWarmerService(FakeCache(), None, None)
+    requested, delays = [], []
+
+    async def fake_fetch(defillama_service, coin_gecko_service, token_addresses):
+        requested.append(list(token_addresses))
+        response = responses.pop(0)
+        return {addr: Decimal(1) for addr in token_addresses if response(addr)}
+
+    async def fake_sleep(delay):
+        delays.append(delay)
+        if len(delays) == sleeps:
+            raise asyncio.CancelledError
+
+    monkeypatch.setattr(price_warmer_module, "fetch_api_prices", fake_fetch)
+    monkeypatch.setattr(warmer, "_sleep", fake_sleep)
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(warmer._run())
+    return warmer, requested, delays
+
+
+def test_partial_refresh_retries_missing_without_backoff(monkeypatch):
+    missing = PriceWarmerService(FakeCache(), None, None).token_addresses[0]
+    responses = [lambda addr: addr != missing, lambda addr: True]
+    warmer, requested, delays = run_cycles(monkeypatch, responses, sleeps=2)
+
+    assert requested == [warmer.token_addresses, [missing]]
+    assert delays == [PRICE_REFRESH_INTERVAL / 2, PRICE_REFRESH_INTERVAL / 2]
+    assert price_cache_key(missing) in warmer.cache.prices
+    stats = warmer.stats()
+    assert (stats["failures"], stats["partial_refreshes"], stats["missing_prices"]) == (0, 1, 0)
+
+
+def test_missing_after_retry_counted(monkeypatch):
+    missing = PriceWarmerService(FakeCache(), None, None).token_addresses[0]
+    responses = [lambda addr: addr != missing, lambda addr: False]
+    warmer, _, _ = run_cycles(monkeypatch, responses, sleeps=2)
+
+    stats = warmer.stats()
+    assert (stats["failures"], stats["partial_refreshes"], stats["missing_prices"]) == (0, 1, 1)
+
+
+def test_backoff_only_when_nothing_refreshed(monkeypatch):
+    responses = [lambda addr: False, lambda addr: False, lambda addr: True]
+    warmer, _, delays = run_cycles(monkeypatch, responses, sleeps=3)
+
+    assert delays == [PRICE_REFRESH_INTERVAL * 2, PRICE_REFRESH_INTERVAL * 4, PRICE_REFRESH_INTERVAL]
+    assert warmer.stats()["failures"] == 2
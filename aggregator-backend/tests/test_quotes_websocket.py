@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+import routes
+from services.quote_subscriptions import QuoteSubscriptionService, subscription_key
+
+SUBSCRIBE = {"action": "subscribe", "token_from": "eth", "token_to": "usdc", "amount": 1}
+
+
+def quote(key, amount_to):
+    token_from, token_to, amount = key
+    return {"event": "quote", "token_from": token_from, "token_to": token_to, "amount": amount,
+            "options": [{"dex": "Uniswap", "amount_to": amount_to}]}
+
+
+@pytest.fixture
+def subscriptions(monkeypatch):
+    computed = []
+
+    async def compute(key):
+        computed.append(key)
+        return quote(key, 3000.0)
+
+    service = QuoteSubscriptionService(compute)
+    service.computed = computed
+    monkeypatch.setattr(routes, "quote_subscriptions", service)
+    return service
+
+
+@pytest.fixture
+def client(exchange_app, subscriptions):
+    return TestClient(exchange_app)
+
+
+def test_subscribe_gets_quote_immediately(client, subscriptions):
+    with client.websocket_connect("/ws/quotes") as ws:
+        ws.send_json(SUBSCRIBE)
+        message = ws.receive_json()
+        assert (message["event"], message["token_from"], message["token_to"], message["amount"]) == ("quote", "ETH", "USDC", 1.0)
+
+        # Drugi subskrybent tego samego klucza dostaje ostatni wynik bez przeliczenia
+        with client.websocket_connect("/ws/quotes") as other:
+            other.send_json(SUBSCRIBE)
+            assert other.receive_json() == message
+        assert subscriptions.computed == [("ETH", "USDC", 1.0)]
+    assert subscriptions.stats()["keys"] == 0
+
+
+def test_invalid_frames_get_error_and_keep_connection(client):
+    with client.websocket_connect("/ws/quotes") as ws:
+        ws.send_text("not json")
+        assert ws.receive_json()["event"] == "error"
+        ws.send_json({"action": "subscribe", "token_from": "ETH"})
+        assert ws.receive_json()["event"] == "error"
+        ws.send_json(SUBSCRIBE)
+        assert ws.receive_json()["event"] == "quote"
+
+
+def test_unsupported_pair_error(client, subscriptions):
+    with client.websocket_connect("/ws/quotes") as ws:
+        ws.send_json({**SUBSCRIBE, "token_to": "NOPE"})
+        message = ws.receive_json()
+        assert (message["event"], message["token_to"]) == ("error", "NOPE")
+    assert subscriptions.computed == []
+
+
+def test_subscription_limit_per_connection(client, monkeypatch):
+    monkeypatch.setattr(routes, "SUBSCRIPTION_MAX_PER_CONNECTION", 1)
+    with client.websocket_connect("/ws/quotes") as ws:
+        ws.send_json(SUBSCRIBE)
+        assert ws.receive_json()["event"] == "quote"
+        ws.send_json({**SUBSCRIBE, "amount": 2})
+        assert ws.receive_json()["event"] == "error"
+
+
+def test_refresh_pushes_only_changed_ranking():
+    key = subscription_key("ETH", "USDC", 1)
+    results = [3000.0, 3000.0, 3001.0]
+
+    async def compute(key):
+        return quote(key, results.pop(0))
+
+    async def main():
+        service = QuoteSubscriptionService(compute)
+        queue = asyncio.Queue()
+        await service.subscribe(key, queue)
+        await service._refresh(key)
+        await service._refresh(key)
+        return [queue.get_nowait()["options"][0]["amount_to"] for _ in range(queue.qsize())], service.stats()
+
+    pushed, stats = asyncio.run(main())
+    assert pushed == [3000.0, 3001.0]
+    assert (stats["computations"], stats["pushes"]) == (3, 2)
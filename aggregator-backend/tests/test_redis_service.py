@@ -0,0 +1,86 @@
+import asyncio
+import time
+
+import pytest
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from services.redis_service import RedisService
+
+
+class FailingClient:
+    def __init__(self, error: Exception):
+        self.error = error
+
+    async def get(self, key):
+        raise self.error
+
+    async def set(self, key, value, ex=None):
+        raise self.error
+
+
+def pool_exhausted_error() -> RedisConnectionError:
+    """Jak BlockingConnectionPool.get_connection po upływie timeout."""
+    try:
+        try:
+            raise asyncio.TimeoutError
+        except asyncio.TimeoutError as err:
+            raise RedisConnectionError("No connection available.") from err
+    except RedisConnectionError as error:
+        return error
+
+
+@pytest.fixture
+def service(monkeypatch):
+    service = RedisService()
+    for name, value in (("degraded", False), ("_backoff", 0.0), ("_retry_at", 0.0), ("pool_timeouts", 0), ("connection_errors", 0)):
+        monkeypatch.setattr(service, name, value)
+    service.fallback.clear()
+    yield service
+    service.fallback.clear()
+
+
+def test_pool_exhaustion_served_from_fallback_without_degrading(service, monkeypatch):
+    monkeypatch.setattr(service, "_get_client", lambda: FailingClient(pool_exhausted_error()))
+    service.fallback.set("key", "value", 60)
+
+    assert asyncio.run(service.get("key")) == "value"
+    assert asyncio.run(service.set("other", "1", ex=10)) is False
+    assert service.fallback.get("other") == "1"
+    assert not service.degraded
+    assert service.pool_timeouts == 2
+    assert service.connection_errors == 0
+
+
+def test_connection_loss_enters_degraded_mode(service, monkeypatch):
+    monkeypatch.setattr(service, "_get_client", lambda: FailingClient(RedisConnectionError("Connection refused")))
+    service.fallback.set("key", "value", 60)
+
+    assert asyncio.run(service.get("key")) == "value"
+    assert service.degraded
+    assert service.connection_errors == 1
+    assert service.pool_timeouts == 0
+
+
+class WorkingClient:
+    async def get(self, key):
+        return "remote"
+
+
+def test_degraded_mode_skips_redis_until_backoff_expires(service, monkeypatch):
+    monkeypatch.setattr(service, "degraded", True)
+    monkeypatch.setattr(service, "_retry_at", time.monotonic() + 60)
+    service.fallback.set("a", "1", 60)
+
+    assert service._get_client() is None
+    assert asyncio.run(service.mget_with_ttl(["a", "b"]))[1] == (None, None)
+    assert asyncio.run(service.mget_with_ttl(["a"]))[0][0] == "1"
+
+
+def test_recovery_ends_degraded_mode(service, monkeypatch):
+    monkeypatch.setattr(service, "degraded", True)
+    monkeypatch.setattr(service, "reconnects", 0)
+    monkeypatch.setattr(service, "_get_client", lambda: WorkingClient())
+
+    assert asyncio.run(service.get("key")) == "remote"
+    assert not service.degraded
+    assert service.reconnects == 1
@@ -0,0 +1,84 @@
+import asyncio
+from decimal import Decimal
+
+from interfaces import ICacheService
+from services.request_cache import RequestCacheService
+
+
+class CountingBackend(ICacheService):
+    """Backend w pamięci liczący wywołania (MGET, GET, pipeline SET)."""
+
+    def __init__(self, values=None):
+        self.values = dict(values or {})
+        self.batch_reads, self.single_reads, self.batch_writes = [], [], []
+
+    async def get_cached_price(self, key):
+        self.single_reads.append(key)
+        return self.values.get(key)
+
+    async def get_cached_prices(self, keys):
+        self.batch_reads.append(list(keys))
+        return {key: self.values.get(key) for key in keys}
+
+    async def set_cached_price(self, key, value, ttl=60):
+        await self.set_cached_prices({key: (value, ttl)})
+
+    async def set_cached_prices(self, items):
+        self.batch_writes.append(dict(items))
+        self.values.update({key: float(value) for key, (value, _) in items.items()})
+
+
+def test_prefetch_reads_all_keys_in_one_batch():
+    backend = CountingBackend({"a": 1.0, "b": 2.0})
+    cache = RequestCacheService(backend)
+
+    async def main():
+        await cache.prefetch(["a", "b", "c", "a"])
+        return [await cache.get_cached_price(key) for key in ("a", "b", "c")]
+
+    assert asyncio.run(main()) == [1.0, 2.0, None]
+    assert backend.batch_reads == [["a", "b", "c"]]
+    assert backend.single_reads == []
+
+
+def test_key_outside_prefetch_read_once():
+    backend = CountingBackend({"x": 3.0})
+    cache = RequestCacheService(backend)
+
+    async def main():
+        return await cache.get_cached_price("x"), await cache.get_cached_price("x")
+
+    assert asyncio.run(main()) == (3.0, 3.0)
+    assert backend.single_reads == ["x"]
+
+
+def test_writes_buffered_until_flush_and_sent_in_one_pipeline():
+    backend = CountingBackend()
+    cache = RequestCacheService(backend)
+
+    async def main():
+        await cache.set_cached_price("a", Decimal("1.5"), ttl=10)
+        await cache.set_cached_prices({"b": (Decimal(2), 20)})
+        visible = await cache.get_cached_price("a")
+        assert backend.batch_writes == []
+        await cache.flush()
+        await cache.flush()
+        return visible
+
+    assert asyncio.run(main()) == 1.5
+    assert backend.batch_writes == [{"a": (Decimal("1.5"), 10), "b": (Decimal(2), 20)}]
+    assert backend.single_reads == []
+
+
+def test_flush_in_background_sends_writes_after_request():
+    backend = CountingBackend()
+    cache = RequestCacheService(backend)
+
+    async def main():
+        await cache.set_cached_price("a", Decimal(1), ttl=10)
+        cache.flush_in_background()
+        assert backend.batch_writes == []
+        await asyncio.sleep(0)
+
+    asyncio.run(main())
+    assert backend.batch_writes == [{"a": (Decimal(1), 10)}]
@@ -0,0 +1,35 @@
+from pool_registry import pool_registry
+from services.routing_service import RoutingService
+
+
+def test_routes_are_multi_hop_within_one_dex():
+    routing = RoutingService(pool_registry)
+    routes = routing.find_routes("USDC", "USDT")
+    assert routes
+    for route in routes:
+        assert len(route.hops) >= 2
+        assert {hop.dex for hop in route.hops} == {route.dex}
+        assert route.hops[0].token_in == "USDC" and route.hops[-1].token_out == "USDT"
+        for hop, next_hop in zip(route.hops, route.hops[1:]):
+            assert hop.token_out == next_hop.token_in
+        # Skok niesie plan z rejestru (adresy, decimals, fee)
+        for hop in route.hops:
+            assert hop.plan in pool_registry.plans(hop.token_in, hop.token_out)
+
+
+def test_symbols_are_case_insensitive_and_share_cache():
+    routing = RoutingService(pool_registry)
+    assert routing.find_routes("usdc", "usdt") == routing.find_routes("USDC", "USDT")
+    assert routing.stats()["cached_pairs"] == 1
+
+
+def test_unknown_symbols_do_not_grow_index_or_cache():
+    routing = RoutingService(pool_registry)
+    tokens = routing.stats()["tokens"]
+    for i in range(1000):
+        assert routing.find_routes(f"FAKE{i}", "USDC") == ()
+        assert routing.find_routes("USDC", f"FAKE{i}") == ()
+        assert routing.route_pools(f"FAKE{i}", f"OTHER{i}") == {}
+    stats = routing.stats()
+    assert stats["tokens"] == tokens
+    assert stats["cached_pairs"] == 0
@@ -0,0 +1,107 @@
+import asyncio
+from decimal import Decimal
+
+import pytest
+
+from exchange_utils import shared_load
+from services.single_flight import SingleFlight
+
+
+class RecordingCache:
+    def __init__(self):
+        self.writes = {}
+
+    async def set_cached_price(self, key, value, ttl=10):
+        self.writes[key] = (value, ttl)
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    executions = 0
+
+    async def load():
+        nonlocal executions
+        executions += 1
+        await asyncio.sleep(0.01)
+        return executions
+
+    async def main():
+        return await asyncio.gather(*(flight.do("key", load, "quote") for _ in range(10)))
+
+    assert asyncio.run(main()) == [1] * 10
+    assert executions == 1
+    assert flight.stats() == {"in_flight": 0, "by_kind": {"quote": {"calls": 10, "executions": 1, "coalesced": 9}}}
+
+
+def test_sequential_calls_execute_again():
+    flight = SingleFlight()
+
+    async def load():
+        return object()
+
+    async def main():
+        return await flight.do("key", load), await flight.do("key", load)
+
+    first, second = asyncio.run(main())
+    assert first is not second
+
+
+def test_error_reaches_every_waiter():
+    flight = SingleFlight()
+
+    async def load():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("rpc")
+
+    async def main():
+        return await asyncio.gather(*(flight.do("key", load) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+def test_cancelled_waiter_does_not_cancel_shared_load():
+    flight = SingleFlight()
+
+    async def load():
+        await asyncio.sleep(0.02)
+        return "done"
+
+    async def main():
+        first = asyncio.create_task(flight.do("key", load))
+        second = asyncio.create_task(flight.do("key", load))
+        await asyncio.sleep(0.005)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(main()) == "done"
+
+
+def test_shared_load_writes_fresh_value_to_every_waiting_cache():
+    caches = [RecordingCache() for _ in range(3)]
+    loads = 0
+
+    async def load():
+        nonlocal loads
+        loads += 1
+        await asyncio.sleep(0.01)
+        return Decimal("1.5"), True
+
+    async def main():
+        return await asyncio.gather(*(shared_load(cache, "pool_mid_USDC", load, "mid_price", ttl=5) for cache in caches))
+
+    assert asyncio.run(main()) == [Decimal("1.5")] * 3
+    assert loads == 1
+    assert all(cache.writes == {"pool_mid_USDC": (Decimal("1.5"), 5)} for cache in caches)
+
+
+def test_shared_load_skips_write_for_cached_value():
+    cache = RecordingCache()
+
+    async def load():
+        return Decimal(2), False
+
+    assert asyncio.run(shared_load(cache, "key", load, "quote")) == Decimal(2)
+    assert cache.writes == {}
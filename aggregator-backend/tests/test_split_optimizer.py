@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from services.quote_curve_service import QuoteCurve
+from services.split_optimizer import SplitOptimizer
+
+
+def curve(amounts_in, amounts_out) -> QuoteCurve:
+    return QuoteCurve(block_number=1, created_at=0.0, amounts_in=tuple(amounts_in), amounts_out=tuple(amounts_out))
+
+
+@pytest.fixture
+def optimizer() -> SplitOptimizer:
+    return SplitOptimizer()
+
+
+class TestWaterFill:
+    # Nachylenia odcinków: A - 2.0, 1.0; B - 1.5, 0.5 -> kolejność wypełniania A1, B1, A2, B2
+    CURVE_A = curve((0, 100, 200), (0, 200, 300))
+    CURVE_B = curve((0, 100, 200), (0, 150, 200))
+
+    def segments(self, optimizer):
+        return [optimizer._segments(self.CURVE_A), optimizer._segments(self.CURVE_B)]
+
+    @pytest.mark.parametrize("amount_in, expected", [
+        (100, [100, 0]),
+        (200, [100, 100]),
+        (300, [200, 100]),
+        (400, [200, 200]),
+    ])
+    def test_amount_on_cumulative_segment_boundary(self, optimizer, amount_in, expected):
+        allocation = optimizer._water_fill(self.segments(optimizer), amount_in)
+        np.testing.assert_array_equal(allocation, expected)
+
+    def test_amount_inside_segment(self, optimizer):
+        np.testing.assert_array_equal(optimizer._water_fill(self.segments(optimizer), 250), [150, 100])
+
+    def test_amount_over_capacity(self, optimizer):
+        assert optimizer._water_fill(self.segments(optimizer), 401) is None
+
+
+class TestToWei:
+    def test_parts_clamped_to_curve_capacity(self, optimizer):
+        # float64 nie odróżnia tych kwot - floor daje o kilka wei za mało, reszta nie może przekroczyć drabinki
+        capacities = [10 ** 21 + 7, 10 ** 21 + 5]
+        amount_in = sum(capacities)
+        allocation = np.array([float(capacity) for capacity in capacities])
+
+        parts = optimizer._to_wei(allocation, amount_in, capacities)
+        assert sum(parts) == amount_in
+        assert all(part <= capacity for part, capacity in zip(parts, capacities))
+
+    def test_none_when_capacity_too_small(self, optimizer):
+        assert optimizer._to_wei(np.array([100.0, 100.0]), 201, [100, 100]) is None
+
+
+def test_optimize_keeps_saturated_split(optimizer):
+    """Podział wypełniający obie krzywe do końca drabinki nie jest odrzucany przez zaokrąglenie do wei."""
+    curves = {
+        "a": curve((0, 5 * 10 ** 20, 10 ** 21 + 7), (0, 10 ** 21, 15 * 10 ** 20)),
+        "b": curve((0, 5 * 10 ** 20, 10 ** 21 + 5), (0, 10 ** 21, 15 * 10 ** 20)),
+    }
+    amount_in = 2 * 10 ** 21 + 12
+
+    plan = optimizer.optimize(curves, amount_in, {"a": 0, "b": 0})
+    assert plan is not None
+    assert {key for key, _, _ in plan.legs} == {"a", "b"}
+    assert sum(part for _, part, _ in plan.legs) == amount_in
+    assert plan.amount_out == 3 * 10 ** 21
@@ -0,0 +1,143 @@
+from decimal import Decimal, ROUND_FLOOR, ROUND_HALF_UP, localcontext
+
+import pytest
+
+from price_calculation.v3_swap_math import (
+    MAX_SQRT_RATIO, MAX_TICK, MIN_SQRT_RATIO, MIN_TICK, Q96, TickDataOutOfRange,
+    compute_swap_step_exact_in, get_amount0_delta, get_amount1_delta, get_next_sqrt_price_from_input,
+    get_sqrt_ratio_at_tick, get_tick_at_sqrt_ratio, swap_exact_in
+)
+
+# Wektory z testów Uniswap v3-core (TickMath.spec, SqrtPriceMath.spec, SwapMath.spec)
+
+E18 = 10 ** 18
+
+
+def encode_price_sqrt(reserve1: int, reserve0: int) -> int:
+    """encodePriceSqrt z v3-core: sqrt(reserve1 / reserve0) z 40 miejscami po przecinku, * 2^96, w dół."""
+    with localcontext() as context:
+        context.prec = 100
+        root = (Decimal(reserve1) / Decimal(reserve0)).sqrt().quantize(Decimal(10) ** -40, rounding=ROUND_HALF_UP)
+        return int((root * Q96).to_integral_value(rounding=ROUND_FLOOR))
+
+
+def test_encode_price_sqrt():
+    assert encode_price_sqrt(1, 1) == Q96
+    assert encode_price_sqrt(101, 100) == 79623317895830914510639640423
+
+
+class TestTickMath:
+    def test_sqrt_ratio_at_tick_bounds(self):
+        assert get_sqrt_ratio_at_tick(MIN_TICK) == MIN_SQRT_RATIO == 4295128739
+        assert get_sqrt_ratio_at_tick(MIN_TICK + 1) == 4295343490
+        assert get_sqrt_ratio_at_tick(MAX_TICK - 1) == 1461373636630004318706518188784493106690254656249
+        assert get_sqrt_ratio_at_tick(MAX_TICK) == MAX_SQRT_RATIO == 1461446703485210103287273052203988822378723970342
+        assert get_sqrt_ratio_at_tick(0) == Q96
+
+    @pytest.mark.parametrize("tick", [MIN_TICK - 1, MAX_TICK + 1])
+    def test_sqrt_ratio_at_tick_out_of_range(self, tick):
+        with pytest.raises(ValueError):
+            get_sqrt_ratio_at_tick(tick)
+
+    def test_tick_at_sqrt_ratio_bounds(self):
+        assert get_tick_at_sqrt_ratio(MIN_SQRT_RATIO) == MIN_TICK
+        assert get_tick_at_sqrt_ratio(4295343490) == MIN_TICK + 1
+        assert get_tick_at_sqrt_ratio(1461373636630004318706518188784493106690254656249) == MAX_TICK - 1
+        assert get_tick_at_sqrt_ratio(MAX_SQRT_RATIO - 1) == MAX_TICK - 1
+
+    @pytest.mark.parametrize("ratio", [MIN_SQRT_RATIO - 1, MAX_SQRT_RATIO])
+    def test_tick_at_sqrt_ratio_out_of_range(self, ratio):
+        with pytest.raises(ValueError):
+            get_tick_at_sqrt_ratio(ratio)
+
+    @pytest.mark.parametrize("tick", [
+        MIN_TICK + 1, -500000, -50000, -887, -60, -1, 0, 1, 60, 887, 50000, 500000, MAX_TICK - 1
+    ])
+    def test_round_trip(self, tick):
+        ratio = get_sqrt_ratio_at_tick(tick)
+        assert get_tick_at_sqrt_ratio(ratio) == tick
+        assert get_tick_at_sqrt_ratio(ratio - 1) == tick - 1
+        assert get_tick_at_sqrt_ratio(get_sqrt_ratio_at_tick(tick + 1) - 1) == tick
+
+
+class TestSqrtPriceMath:
+    def test_amount_deltas(self):
+        price, target = encode_price_sqrt(1, 1), encode_price_sqrt(121, 100)
+        assert get_amount0_delta(price, target, E18, True) == 90909090909090910
+        assert get_amount0_delta(price, target, E18, False) == 90909090909090909
+        assert get_amount1_delta(price, target, E18, True) == 100000000000000000
+        assert get_amount1_delta(price, target, E18, False) == 99999999999999999
+
+    def test_next_sqrt_price_from_input(self):
+        price = encode_price_sqrt(1, 1)
+        assert get_next_sqrt_price_from_input(price, E18, E18 // 10, False) == 87150978765690771352898345369
+        assert get_next_sqrt_price_from_input(price, E18, E18 // 10, True) == 72025602285694852357767227579
+
+
+class TestComputeSwapStep:
+    def test_exact_in_capped_at_price_target_one_for_zero(self):
+        target = encode_price_sqrt(101, 100)
+        sqrt_next, amount_in, amount_out, fee = compute_swap_step_exact_in(encode_price_sqrt(1, 1), target, 2 * E18, E18, 600)
+        assert (amount_in, fee, amount_out) == (9975124224178055, 5988667735148, 9925619580021728)
+        assert amount_in + fee < E18
+        assert sqrt_next == target
+
+    def test_exact_in_fully_spent_one_for_zero(self):
+        price, target = encode_price_sqrt(1, 1), encode_price_sqrt(1000, 100)
+        sqrt_next, amount_in, amount_out, fee = compute_swap_step_exact_in(price, target, 2 * E18, E18, 600)
+        assert (amount_in, fee, amount_out) == (999400000000000000, 600000000000000, 666399946655997866)
+        assert amount_in + fee == E18
+        assert sqrt_next == get_next_sqrt_price_from_input(price, 2 * E18, E18 - fee, False)
+        assert sqrt_next < target
+
+    def test_target_price_of_one_uses_partial_input(self):
+        sqrt_next, amount_in, amount_out, fee = compute_swap_step_exact_in(2, 1, 1, 3915081100057732413702495386755767, 1)
+        assert (amount_in, fee, amount_out) == (39614081257132168796771975168, 39614120871253040049813, 0)
+        assert amount_in + fee <= 3915081100057732413702495386755767
+        assert sqrt_next == 1
+
+    def test_entire_input_taken_as_fee(self):
+        result = compute_swap_step_exact_in(2413, 79887613182836312, 1985041575832132834610021537970, 10, 1872)
+        assert result == (2413, 0, 0, 10)
+
+
+class TestSwapExactIn:
+    """Pętla swapu na puli z dwoma zakresami płynności: [-120, 120] (1e18) i [-60, 60] (2e18), tick spacing 60."""
+
+    FEE = 3000
+    SPACING = 60
+    # Słowo -1: ticki -60 i -120 (skompresowane -1, -2); słowo 0: ticki 60 i 120 (1, 2)
+    BITMAP = {-1: (1 << 255) | (1 << 254), 0: (1 << 1) | (1 << 2)}
+    LIQUIDITY_NET = {-120: E18, -60: 2 * E18, 60: -2 * E18, 120: -E18}
+
+    def swap(self, zero_for_one: bool, amount_in: int):
+        return swap_exact_in(Q96, 0, 3 * E18, self.FEE, self.SPACING, self.BITMAP, self.LIQUIDITY_NET, zero_for_one, amount_in)
+
+    @pytest.mark.parametrize("zero_for_one, first, second", [(True, -60, -120), (False, 60, 120)])
+    def test_crosses_initialized_tick(self, zero_for_one, first, second):
+        amount = 12 * E18 // 1000
+        result = self.swap(zero_for_one, amount)
+
+        # Krok do pierwszego zainicjalizowanego ticka przy L = 3e18, dalej L = 1e18 do drugiego
+        sqrt_first = get_sqrt_ratio_at_tick(first)
+        price, in1, out1, fee1 = compute_swap_step_exact_in(Q96, sqrt_first, 3 * E18, amount, self.FEE)
+        assert price == sqrt_first
+        price, in2, out2, fee2 = compute_swap_step_exact_in(sqrt_first, get_sqrt_ratio_at_tick(second), E18, amount - in1 - fee1, self.FEE)
+        assert price != get_sqrt_ratio_at_tick(second)
+
+        assert result.amount_in == amount == in1 + fee1 + in2 + fee2
+        assert result.amount_out == out1 + out2
+        assert result.sqrt_price_x96 == price
+        assert result.tick == get_tick_at_sqrt_ratio(price)
+        assert result.ticks_crossed == 1
+
+    def test_within_one_range_crosses_nothing(self):
+        result = self.swap(True, 10 ** 15)
+        price, amount_in, amount_out, fee = compute_swap_step_exact_in(Q96, get_sqrt_ratio_at_tick(-60), 3 * E18, 10 ** 15, self.FEE)
+        assert (result.amount_in, result.amount_out, result.sqrt_price_x96) == (amount_in + fee, amount_out, price)
+        assert result.ticks_crossed == 0
+
+    def test_beyond_loaded_words_needs_quoter(self):
+        # Po wyjściu z [-120, 120] płynność 0 - pętla dochodzi do niezaładowanego słowa bitmapy
+        with pytest.raises(TickDataOutOfRange):
+            self.swap(True, E18)
@@ -3,6 +3,9 @@ from typing import Optional, List, Tuple
 from pools_config import TOKENS
 from web3 import Web3
 from config import w3
+from log_manager import get_logger
+
+logger = get_logger(__name__)
 
 class TokenManager:
     def __init__(self, tokens_data: dict):
@@ -49,10 +52,10 @@ class TokenManager:
             token1_data = self.tokens.get(token1_symbol.upper())
             
             if not token0_data or not token1_data:
-                print(f"Brak definicji dla tokenów w parze {pair}")
+                logger.warning("Brak definicji dla tokenów w parze %s", pair)
                 return []
             
             return [token0_data["address"].lower(), token1_data["address"].lower()]
         except Exception as e:
-            print(f"Błąd wyprowadzania tokenów z {pair}: {e}")
+            logger.warning("Błąd wyprowadzania tokenów z %s: %s", pair, e)
             return []